@@ -9,7 +9,6 @@ import requests
 
 from django import forms
 from django.conf import settings
-from axel.articles.management.commands.ml_classify import RULES_DICT_START, RULES_DICT_END
 
 from axel.libs import nlp
 from axel.libs.nlp import Stemmer
@@ -82,15 +81,15 @@ class PDFUploadForm(forms.Form):
 
     @staticmethod
     def build_features(article):
-        from axel.stats.scores import compress_pos_tag
+        from axel.stats.scores import compress_pos_tag, RULES_DICT_START, RULES_DICT_END
+        stats_model = article.CollocationModel.COLLECTION_MODEL
 
         component_size_dict = defaultdict(lambda: 0)
         dbpedia_graph = article.dbpedia_graph(redirects=True)
         dblp_component_set = set()
         for component in nx.connected_components(dbpedia_graph):
             nodes = [node for node in component if 'Category' not in node]
-            stats_ngrams = article.CollocationModel.COLLECTION_MODEL.objects.filter(ngram__in=nodes)
-            is_dblp_inside = bool([True for ngram in stats_ngrams if 'dblp' in ngram.source])
+            is_dblp_inside = stats_model.feature_ngrams(ngram__in=nodes, is_dblp=True).exists()
             if is_dblp_inside:
                 dblp_component_set.update(nodes)
             comp_len = len(nodes)
@@ -98,14 +97,17 @@ class PDFUploadForm(forms.Form):
                 component_size_dict[node] = comp_len
 
         features = []
-        for colloc in article.CollocationModel.objects.filter(article=article):
+        collocations = list(article.CollocationModel.objects.filter(article=article))
+        dblp_ngrams = set(stats_model.feature_ngrams(
+            ngram__in=[colloc.ngram for colloc in collocations], is_dblp=True)
+            .values_list('ngram', flat=True))
+        for colloc in collocations:
             max_pos_tag = colloc.max_pos_tag
-            collection_ngram = colloc.COLLECTION_MODEL.objects.get(ngram=colloc.ngram)
             pos_tag_start = str(compress_pos_tag(max_pos_tag, RULES_DICT_START))
             pos_tag_end = str(compress_pos_tag(max_pos_tag, RULES_DICT_END))
             feature = [
                 int(colloc.ngram in dblp_component_set),
-                'dblp' in collection_ngram.source,
+                colloc.ngram in dblp_ngrams,
                 component_size_dict[colloc.ngram],
                 int('NN_STARTS' == pos_tag_start),
                 int('JJ_STARTS' == pos_tag_start),
@@ -118,7 +120,8 @@ class PDFUploadForm(forms.Form):
     @staticmethod
     def generate_temp_article(text):
         # TODO: make this Article class method
-        from axel.articles.models import Article, Venue, TestCollocations
+        from axel.articles.models import Article, Venue, TestCollocations, \
+            occurrence_stats_batch
         import json
         venue = Venue.objects.get(acronym='SIGIR')
         stemmed_text = nlp.Stemmer.stem_wordnet(text)
@@ -128,10 +131,11 @@ class PDFUploadForm(forms.Form):
         # TODO: extract title and abstract
         article.save_base(raw=True)
         article._create_collocations(True)
-        for test_colloc in TestCollocations.objects.filter(article=article):
-            obj = article.CollocationModel(ngram=test_colloc.ngram, count=test_colloc.count,
-                                           article=article, total_count=0, extra_fields={})
-            obj.save()
+        with occurrence_stats_batch():
+            for test_colloc in TestCollocations.objects.filter(article=article):
+                obj = article.CollocationModel(ngram=test_colloc.ngram, count=test_colloc.count,
+                                               article=article, total_count=0, extra_fields={})
+                obj.save()
         TestCollocations.objects.filter(article=article).delete()
         return article
 
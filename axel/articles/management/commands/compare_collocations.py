@@ -1,6 +1,5 @@
 """Compares two different collocation candidate sets"""
 from __future__ import division
-from collections import defaultdict
 from optparse import make_option
 from termcolor import colored
 
@@ -30,11 +29,7 @@ class Command(BaseCommand):
 
         model = CLUSTERS_DICT[cluster]
 
-        self.article_rel_dict = defaultdict(lambda: {0: set(), 1: set()})
-        for key, is_rel in model.judged_data.iteritems():
-            ngram, article_id = key.split(',')
-            is_rel = int(is_rel)
-            self.article_rel_dict[article_id][is_rel].add(ngram)
+        self.judged = model.judged_data
 
         # precision-recall
         old_prec = []
@@ -49,8 +44,8 @@ class Command(BaseCommand):
             test_collocs_keys = zip(*test_collocs)[0] if test_collocs else []
 
             # START: calculate precision-recall
-            correct_objects = self.article_rel_dict[unicode(article)][1]
-            incorrect_objects = self.article_rel_dict[unicode(article)][0]
+            correct_objects = self.judged.relevant(article.id)
+            incorrect_objects = self.judged.irrelevant(article.id)
             true_pos_old = [x for x in zip(*cur_collocs)[0] if x in correct_objects]
             true_pos_new = [x for x in test_collocs_keys if x in correct_objects]
             false_pos_old = [x for x in zip(*cur_collocs)[0] if x in incorrect_objects]
@@ -0,0 +1,37 @@
+"""Fill the category graph store for all DBPedia concepts of the cluster"""
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from axel.articles.utils.category_graph import category_graph
+from axel.stats.models import STATS_CLUSTERS_DICT
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--cluster', '-c',
+                    action='store',
+                    dest='cluster',
+                    help='cluster id for article type'),
+        make_option('--depth', '-d',
+                    action='store',
+                    dest='depth',
+                    type='int',
+                    default=2,
+                    help='expansion depth from the concepts, defaults to 2'),
+    )
+    help = 'Expands DBPedia categories of the cluster concepts breadth-first with batched queries'
+
+    def handle(self, *args, **options):
+        cluster_id = options['cluster']
+        if not cluster_id:
+            raise CommandError("need to specify cluster id")
+        if cluster_id not in STATS_CLUSTERS_DICT:
+            raise CommandError("unknown cluster id: {0}".format(cluster_id))
+        # feature table or cached sources while update_stats has not filled the table
+        stats_model = STATS_CLUSTERS_DICT[cluster_id]
+        roots = list(stats_model.source_ngrams(stats_model.objects.values('ngram'),
+                                               ['dbpedia', 'wiki_redirect']))
+        print 'Expanding {0} concepts...'.format(len(roots))
+        category_graph.expand(roots, options['depth'])
+        print 'Done'
@@ -4,9 +4,9 @@ import os
 from optparse import make_option
 
 from django.core.management.base import BaseCommand, CommandError
-from django.core.files import File
 from test_collection.models import TaggedCollection
 from axel.articles.models import Article, Venue, ArticleCollocation
+from axel.articles.utils.ingest import ingest_pdfs
 from axel.stats.models import SWCollocations
 
 
@@ -22,10 +22,13 @@ class Command(BaseCommand):
         make_option('--year', '-y', action='store', dest='year',
             help='Conference year'),
         make_option('--cluster', '-c', action='store', dest='cluster',
-            help='cluster name')
+            help='cluster name'),
+        make_option('--workers', '-w', action='store', dest='workers', type='int', default=4,
+            help='number of PDF extraction processes, defaults to 4')
         )
 
-    help = 'Imports PDFs from the specified directory'
+    help = 'Imports PDFs from the specified directory, articles are inserted in bulk ' \
+           'and Article post_save handlers do not run for them'
 
     def handle(self, *args, **options):
         dir = options['dir']
@@ -44,16 +47,12 @@ class Command(BaseCommand):
         venue = Venue.objects.get(acronym=venue)
 
         # Traverse and import PDFs
-        article_ids = []
+        paths = []
         for root, dirs, files in os.walk(dir):
             for name in files:
                 if name.endswith('.pdf'):
-                    full_path = os.path.join(root, name)
-                    article = Article(venue=venue, year=year, cluster_id=cluster)
-                    with open(full_path, 'rb') as pdf:
-                        article.pdf.save(name, File(pdf), save=True)
-                    article.save()
-                    article_ids.append(article.id)
+                    paths.append(os.path.join(root, name))
+        ingest_pdfs(paths, venue, year, cluster, workers=options['workers'])
 
         print 'Starting collocation population...'
         Article.create_collocations(cluster)
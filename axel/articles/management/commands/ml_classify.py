@@ -1,13 +1,12 @@
 from __future__ import division
 import os
-import re
 import pickle
 from collections import defaultdict
 from sklearn import cross_validation
 from sklearn.metrics import *
 from sklearn.tree import DecisionTreeClassifier
-from axel.stats.models import STATS_CLUSTERS_DICT
-from axel.stats.scores import compress_pos_tag
+from axel.stats.models import STATS_CLUSTERS_DICT, CollocationFeature
+from axel.stats.scores import compress_pos_tag, RULES_DICT_START, RULES_DICT_END
 from optparse import make_option
 import numpy as np
 import networkx as nx
@@ -16,27 +15,10 @@ from termcolor import colored
 from django.core.management.base import BaseCommand, CommandError
 
 from axel.articles.models import CLUSTERS_DICT, Article
+from axel.articles.utils.db import write_behind, BULK_UPDATE_BATCH
 from axel.stats.scores.binding_scores import populate_article_dict_ML
 
 
-RULES_DICT_START = [(u'STOP_WORD', re.compile(r'(NONE|DT|CC|MD|RP|JJR|JJS|\:)')),
-                    (u'NUMBER_STARTS', re.compile('^CD')),
-                    (u'ADVERB_STARTS', re.compile('^RB')),
-                    (u'PREP_START', re.compile(r'(^IN)')),
-                    (u'NNS_START', re.compile(r'^NNS')),
-                    (u'VB_STARTS', re.compile(r'^VB')),
-                    (u'NN_STARTS', re.compile(r'^NN')),
-                    (u'JJ_STARTS', re.compile(r'^JJ'))]
-RULES_DICT_END = [(u'STOP_WORD', re.compile(r'(NONE|DT|CC|MD|RP|JJR|JJS|\:)')),
-                  (u'NUMBER_ENDS', re.compile('CD$')),
-                  (u'ADVERB_ENDS', re.compile('RB.?$')),
-                  (u'PREP_ENDS', re.compile(r'(IN$)')),
-                  (u'NNS_ENDS', re.compile(r'NNS$')),
-                  (u'VB_ENDS', re.compile(r'VB.?$')),
-                  (u'NN_ENDS', re.compile(r'NN(P|PS)?$')),
-                  (u'JJ_ENDS', re.compile(r'JJ.?$'))]
-
-
 class Command(BaseCommand):
     option_list = BaseCommand.option_list + (
         make_option('--cluster', '-c',
@@ -104,8 +86,29 @@ class Command(BaseCommand):
             for scores in values.itervalues():
                 scored_ngrams.append((article, scores))
 
+        self._complete_features()
         print 'Fitting classifier...'
-        self.fit_ml_algo(scored_ngrams, cv_num)
+        # POS tags computed for the features are written in batches
+        with write_behind():
+            self.fit_ml_algo(scored_ngrams, cv_num)
+
+    def _complete_features(self):
+        """
+        Store feature rows missing for the collection n-grams, POS tags not cached
+        yet are computed like update_stats does
+        """
+        features = self.StatsModel.features_dict()
+        missing = []
+        with write_behind():
+            for collocation in self.StatsModel.objects.all():
+                feature = features.get(collocation.ngram)
+                if feature is None or feature.pos_tag is None:
+                    _ = collocation.max_pos_tag
+                    missing.append(collocation.ngram)
+        if missing:
+            print 'Stored features of {0} n-grams'.format(len(missing))
+            for i in xrange(0, len(missing), BULK_UPDATE_BATCH):
+                self.StatsModel.update_features(missing[i:i + BULK_UPDATE_BATCH])
 
     def fit_ml_algo(self, scored_ngrams, cv_num):
         """
@@ -128,8 +131,8 @@ class Command(BaseCommand):
             dbpedia_graph = article.dbpedia_graph(redirects=self.redirects)
             for component in nx.connected_components(dbpedia_graph):
                 nodes = [node for node in component if 'Category' not in node]
-                stats_ngrams = self.StatsModel.objects.filter(ngram__in=nodes)
-                is_dblp_inside = bool([True for ngram in stats_ngrams if 'dblp' in ngram.source])
+                is_dblp_inside = self.StatsModel.feature_ngrams(ngram__in=nodes,
+                                                                is_dblp=True).exists()
                 # ScienceWISE
                 #is_dblp_inside = bool([True for ngram in stats_ngrams if ngram.is_ontological])
                 if is_dblp_inside:
@@ -139,14 +142,20 @@ class Command(BaseCommand):
                     temp_dict[node] = comp_len
             component_size_dict[article.id] = temp_dict
 
+        features = self.StatsModel.features_dict()
         if self.global_pos_tag:
-            queryset = self.StatsModel.objects.all()
+            pos_tags = CollocationFeature.objects.filter(cluster_id=self.cluster_id)\
+                .values_list('pos_tag', 'pos_start', 'pos_end').distinct()
         else:
-            queryset = self.Model.objects.all()
-        for ngram in queryset:
-            max_pos_tag = ngram.max_pos_tag
-            pos_tag_start = str(compress_pos_tag(max_pos_tag, RULES_DICT_START))
-            pos_tag_end = str(compress_pos_tag(max_pos_tag, RULES_DICT_END))
+            pos_tags = []
+            for ngram in self.Model.objects.all():
+                max_pos_tag = ngram.max_pos_tag
+                pos_tags.append((max_pos_tag,
+                                 compress_pos_tag(max_pos_tag, RULES_DICT_START),
+                                 compress_pos_tag(max_pos_tag, RULES_DICT_END)))
+        for max_pos_tag, pos_tag_start, pos_tag_end in pos_tags:
+            pos_tag_start = str(pos_tag_start)
+            pos_tag_end = str(pos_tag_end)
             if pos_tag_start not in start_pos_tag_list:
                 start_pos_tag_list.append(pos_tag_start)
             if pos_tag_end not in end_pos_tag_list:
@@ -161,18 +170,24 @@ class Command(BaseCommand):
         for article, score_dict in scored_ngrams:
             ngram = score_dict['ngram']
             collection_ngram = score_dict['collection_ngram']
+            ngram_features = features.get(ngram.ngram)
+            if ngram_features is None:
+                raise CommandError(u'No collection statistics for "{0}", run update_stats '
+                                   u'first'.format(ngram.ngram))
 
             # POS TAG enumeration
             if self.global_pos_tag:
-                max_pos_tag = collection_ngram.max_pos_tag
+                max_pos_tag = ngram_features.pos_tag
+                pos_tag_start = str(ngram_features.pos_start)
+                pos_tag_end = str(ngram_features.pos_end)
                 pos_tag_prev = collection_ngram.pos_tag_prev
                 pos_tag_after = collection_ngram.pos_tag_after
             else:
                 max_pos_tag = ngram.max_pos_tag
+                pos_tag_start = str(compress_pos_tag(max_pos_tag, RULES_DICT_START))
+                pos_tag_end = str(compress_pos_tag(max_pos_tag, RULES_DICT_END))
                 pos_tag_prev = ngram.pos_tag_prev
                 pos_tag_after = ngram.pos_tag_after
-            pos_tag_start = str(compress_pos_tag(max_pos_tag, RULES_DICT_START))
-            pos_tag_end = str(compress_pos_tag(max_pos_tag, RULES_DICT_END))
 
             pos_tag_extra = set([' '.join(set(tags)) for tags in zip(*ngram.pos_tag)[0]])
 
@@ -181,12 +196,12 @@ class Command(BaseCommand):
                 ngram.ngram in article.wiki_text_index,
                 ngram.ngram in dblp_component_dict[article.id],
                 ngram.ngram.isupper(),
-                'dblp' in collection_ngram.source,
+                ngram_features.is_dblp,
                 component_size_dict[article.id][ngram.ngram],
                 wiki_edges_count,
                 #collection_ngram.is_ontological,
-                #'dbpedia' in collection_ngram.source,
-                'wiki_redirect' in collection_ngram.source,
+                #ngram_features.is_dbpedia,
+                ngram_features.is_wiki_redirect,
                 bool({'.', ',', ':', ';'}.intersection(zip(*pos_tag_prev)[0])),
                 bool({'.', ',', ':', ';'}.intersection(zip(*pos_tag_after)[0])),
                 len(ngram.ngram.split()),
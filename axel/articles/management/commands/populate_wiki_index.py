@@ -0,0 +1,29 @@
+"""Build Wikipedia text n-gram indexes of the articles"""
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from axel.articles.models import Article
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--cluster', '-c',
+                    action='store',
+                    dest='cluster',
+                    help='cluster id for article type'),
+        make_option('--workers', '-w',
+                    action='store',
+                    dest='workers',
+                    type='int',
+                    default=4,
+                    help='number of processes fetching and lemmatizing Wikipedia pages, '
+                         'one page request per process at a time, defaults to 4'),
+    )
+    help = 'Populates wiki_text_index of the articles from the cached concept pages'
+
+    def handle(self, *args, **options):
+        cluster_id = options['cluster']
+        if not cluster_id:
+            raise CommandError("need to specify cluster id")
+        Article.populate_wiki_index(cluster_id, workers=options['workers'])
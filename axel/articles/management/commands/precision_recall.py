@@ -41,11 +41,7 @@ class Command(BaseCommand):
         self.Model = CLUSTERS_DICT[cluster_id]
         self.redirects = options['redirects']
 
-        self.article_rel_dict = defaultdict(lambda: {0: set(), 1: set()})
-        for key, is_rel in self.Model.judged_data.iteritems():
-            ngram, article_id = key.split(',')
-            is_rel = int(is_rel)
-            self.article_rel_dict[article_id][is_rel].add(ngram)
+        self.judged = self.Model.judged_data
 
         for arg in args:
             eval_method = getattr(self, '_' + arg + '_calculation')
@@ -63,33 +59,21 @@ class Command(BaseCommand):
         for article in Article.objects.filter(cluster_id=self.cluster_id):
             print article
 
-            correct_objects = self.article_rel_dict[unicode(article)][1]
-            incorrect_objects = self.article_rel_dict[unicode(article)][0]
-            article_ngrams = list(self.Model.objects.filter(article=article).values_list('ngram', flat=True))
+            correct_objects = self.judged.relevant(article.id)
+            incorrect_objects = self.judged.irrelevant(article.id)
+            article_ngrams = set(self.Model.objects.filter(article=article).values_list('ngram', flat=True))
             links_graph = article.wikilinks_graph
 
-            for i, ngram1 in enumerate(article_ngrams):
-                try:
-                    ngram1_links = zip(*links_graph.edges(nbunch=[ngram1]))[1]
-                except IndexError:
-                    ngram1_links = set()
-                for j in range(i+1, len(article_ngrams)):
-                    ngram2 = article_ngrams[j]
-                    try:
-                        ngram2_links = zip(*links_graph.edges(nbunch=[ngram2]))[1]
-                    except IndexError:
-                        ngram2_links = set()
-
-                    if ngram1 in correct_objects and ngram2 in correct_objects:
-                        attr = 'valid'
-                    elif ngram1 in incorrect_objects and ngram2 in incorrect_objects:
-                        attr = 'invalid'
-                    else:
-                        attr = 'multi'
-                    if ngram1 in ngram2_links or ngram2 in ngram1_links:
-                        #if attr == 'multi' or attr == 'invalid':
-                        #    print ngram1, ngram2
-                        relation_distibution[attr] += 1
+            for ngram1, ngram2 in links_graph.edges_iter():
+                if ngram1 not in article_ngrams or ngram2 not in article_ngrams:
+                    continue
+                if ngram1 in correct_objects and ngram2 in correct_objects:
+                    attr = 'valid'
+                elif ngram1 in incorrect_objects and ngram2 in incorrect_objects:
+                    attr = 'invalid'
+                else:
+                    attr = 'multi'
+                relation_distibution[attr] += 1
         print relation_distibution
 
     def _dbpedia_cc_size_calculation(self):
@@ -104,8 +88,8 @@ class Command(BaseCommand):
             graph = article.dbpedia_graph()
             results = []
 
-            correct_objects = self.article_rel_dict[unicode(article)][1]
-            incorrect_objects = self.article_rel_dict[unicode(article)][0]
+            correct_objects = self.judged.relevant(article.id)
+            incorrect_objects = self.judged.irrelevant(article.id)
             for component in nx.connected_components(graph):
                 component = [node for node in component if 'Category' not in node]
                 results.append(component)
@@ -144,8 +128,8 @@ class Command(BaseCommand):
             results = set(article.dbpedia_graph(redirects=self.redirects).nodes())
 
             article_ngrams = self.Model.objects.filter(article=article).values_list('ngram', flat=True)
-            correct_objects = self.article_rel_dict[unicode(article)][1]
-            incorrect_objects = self.article_rel_dict[unicode(article)][0]
+            correct_objects = self.judged.relevant(article.id)
+            incorrect_objects = self.judged.irrelevant(article.id)
             all_dbpedia_ngrams = [ngram for ngram in article_ngrams if ngram in dbpedia_ngrams]
 
             true_pos = [x for x in results if x in correct_objects]
@@ -186,8 +170,8 @@ class Command(BaseCommand):
             article_ngrams = self.Model.objects.filter(article=article).values_list('ngram', flat=True)
             results = [ngram for ngram in article_ngrams if ngram in dblp_ngrams]
 
-            correct_objects = self.article_rel_dict[unicode(article)][1]
-            incorrect_objects = self.article_rel_dict[unicode(article)][0]
+            correct_objects = self.judged.relevant(article.id)
+            incorrect_objects = self.judged.irrelevant(article.id)
 
             true_pos = [x for x in results if x in correct_objects]
             false_pos = [x for x in results if x in incorrect_objects]
@@ -225,7 +209,7 @@ class Command(BaseCommand):
                 results_dict[line[1]]['true_pos'].add(line[0])
 
         for article in Article.objects.filter(cluster_id=self.cluster_id):
-            correct_objects = self.article_rel_dict[unicode(article)][1]
+            correct_objects = self.judged.relevant(article.id)
 
             true_pos = results_dict[unicode(article)]['true_pos']
             false_pos = results_dict[unicode(article)]['false_pos']
@@ -244,10 +228,6 @@ class Command(BaseCommand):
         correct_total = 0
         _end = '_end_'
 
-        for line, is_valid in self.Model.judged_data.iteritems():
-            ngram, article = line.split(',')
-            self.article_rel_dict[article][int(is_valid)].add(ngram)
-
         def make_trie(ngrams):
             """
             Make trie out of set of ngrams
@@ -290,7 +270,7 @@ class Command(BaseCommand):
             # skip train generation if tagger exists
             if os.path.exists(TAGGER_PCL) and article_index/queryset_len <= 0.8:
                 continue
-            correct_ngrams_set = self.article_rel_dict[unicode(article)][1]
+            correct_ngrams_set = self.judged.relevant(article.id)
             identified_correct = set()
             correct_ngrams = make_trie(correct_ngrams_set)
             for sentence in nltk.sent_tokenize(article.text):
@@ -340,8 +320,8 @@ class Command(BaseCommand):
                 for tree in result.subtrees():
                     if tree.node != 'S' and len(tree) > 1:
                         ne_set.add(nlp.Stemmer.stem_wordnet(' '.join(zip(*tree)[0]).lower()))
-            correct_objects = self.article_rel_dict[unicode(article)][1]
-            incorrect_objects = self.article_rel_dict[unicode(article)][0]
+            correct_objects = self.judged.relevant(article)
+            incorrect_objects = self.judged.irrelevant(article)
             true_pos = [x for x in ne_set if x in correct_objects]
             false_pos = [x for x in ne_set if x in incorrect_objects]
             true_pos_total += len(true_pos)
@@ -363,8 +343,10 @@ class Command(BaseCommand):
         pos_tag_after = [0, 0, 0, 0]
 
         for article in print_progress(Article.objects.filter(cluster_id=self.cluster_id)):
+            correct_objects = self.judged.relevant(article.id)
+            incorrect_objects = self.judged.irrelevant(article.id)
             for ngram in self.Model.objects.filter(article=article):
-                if ngram.ngram in self.article_rel_dict[unicode(article)][1]:
+                if ngram.ngram in correct_objects:
                     if {'.', ',', ':', ';'}.intersection(zip(*ngram.pos_tag_prev)[0]):
                         pos_tag_prev[0] += 1
                     else:
@@ -374,7 +356,7 @@ class Command(BaseCommand):
                         pos_tag_after[0] += 1
                     else:
                         pos_tag_after[2] += 1
-                elif ngram.ngram in self.article_rel_dict[unicode(article)][0]:
+                elif ngram.ngram in incorrect_objects:
                     if {'.', ',', ':', ';'}.intersection(zip(*ngram.pos_tag_prev)[0]):
                         pos_tag_prev[1] += 1
                     else:
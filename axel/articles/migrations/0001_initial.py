@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'Venue'
+        db.create_table(u'articles_venue', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('name', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('acronym', self.gf('django.db.models.fields.CharField')(max_length=10)),
+        ))
+        db.send_create_signal(u'articles', ['Venue'])
+
+        # Adding model 'Article'
+        db.create_table(u'articles_article', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('title', self.gf('django.db.models.fields.CharField')(default='', max_length=255)),
+            ('abstract', self.gf('django.db.models.fields.TextField')(default='')),
+            ('venue', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['articles.Venue'])),
+            ('year', self.gf('django.db.models.fields.IntegerField')()),
+            ('link', self.gf('django.db.models.fields.URLField')(max_length=200, null=True)),
+            ('citations', self.gf('django.db.models.fields.IntegerField')(default=0)),
+            ('pdf', self.gf('django.db.models.fields.files.FileField')(max_length=100)),
+            ('stemmed_text', self.gf('django.db.models.fields.TextField')(default='')),
+            ('text', self.gf('django.db.models.fields.TextField')(default='')),
+            ('index', self.gf('django.db.models.fields.TextField')(default='')),
+            ('index_nonstemmed', self.gf('jsonfield.fields.JSONField')()),
+            ('cluster_id', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('wiki_text_index', self.gf('jsonfield.fields.JSONField')(null=True)),
+        ))
+        db.send_create_signal(u'articles', ['Article'])
+
+        # Adding model 'TestCollocations'
+        db.create_table(u'articles_testcollocations', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('ngram', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('count', self.gf('django.db.models.fields.IntegerField')()),
+            ('article', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['articles.Article'])),
+        ))
+        db.send_create_signal(u'articles', ['TestCollocations'])
+
+        # Adding model 'ArticleCollocation'
+        db.create_table(u'articles_articlecollocation', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('ngram', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('count', self.gf('django.db.models.fields.IntegerField')()),
+            ('total_count', self.gf('django.db.models.fields.IntegerField')()),
+            ('article', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['articles.Article'])),
+            ('extra_fields', self.gf('jsonfield.fields.JSONField')()),
+        ))
+        db.send_create_signal(u'articles', ['ArticleCollocation'])
+
+        # Adding unique constraint on 'ArticleCollocation', fields ['ngram', 'article']
+        db.create_unique(u'articles_articlecollocation', ['ngram', 'article_id'])
+
+        # Adding model 'Author'
+        db.create_table(u'articles_author', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('name', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('first_name', self.gf('django.db.models.fields.CharField')(max_length=50, null=True, blank=True)),
+            ('last_name', self.gf('django.db.models.fields.CharField')(max_length=50, null=True, blank=True)),
+            ('middle_name', self.gf('django.db.models.fields.CharField')(max_length=50, null=True, blank=True)),
+        ))
+        db.send_create_signal(u'articles', ['Author'])
+
+        # Adding model 'ArticleAuthor'
+        db.create_table(u'articles_articleauthor', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('article', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['articles.Article'])),
+            ('author', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['articles.Author'])),
+        ))
+        db.send_create_signal(u'articles', ['ArticleAuthor'])
+
+    def backwards(self, orm):
+        # Removing unique constraint on 'ArticleCollocation', fields ['ngram', 'article']
+        db.delete_unique(u'articles_articlecollocation', ['ngram', 'article_id'])
+
+        # Deleting model 'Venue'
+        db.delete_table(u'articles_venue')
+
+        # Deleting model 'Article'
+        db.delete_table(u'articles_article')
+
+        # Deleting model 'TestCollocations'
+        db.delete_table(u'articles_testcollocations')
+
+        # Deleting model 'ArticleCollocation'
+        db.delete_table(u'articles_articlecollocation')
+
+        # Deleting model 'Author'
+        db.delete_table(u'articles_author')
+
+        # Deleting model 'ArticleAuthor'
+        db.delete_table(u'articles_articleauthor')
+
+    models = {
+        u'articles.article': {
+            'Meta': {'ordering': "['-year']", 'object_name': 'Article'},
+            'abstract': ('django.db.models.fields.TextField', [], {'default': "''"}),
+            'citations': ('django.db.models.fields.IntegerField', [], {'default': '0'}),
+            'cluster_id': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'index': ('django.db.models.fields.TextField', [], {'default': "''"}),
+            'index_nonstemmed': ('jsonfield.fields.JSONField', [], {}),
+            'link': ('django.db.models.fields.URLField', [], {'max_length': '200', 'null': 'True'}),
+            'pdf': ('django.db.models.fields.files.FileField', [], {'max_length': '100'}),
+            'stemmed_text': ('django.db.models.fields.TextField', [], {'default': "''"}),
+            'text': ('django.db.models.fields.TextField', [], {'default': "''"}),
+            'title': ('django.db.models.fields.CharField', [], {'default': "''", 'max_length': '255'}),
+            'venue': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['articles.Venue']"}),
+            'wiki_text_index': ('jsonfield.fields.JSONField', [], {'null': 'True'}),
+            'year': ('django.db.models.fields.IntegerField', [], {})
+        },
+        u'articles.articleauthor': {
+            'Meta': {'object_name': 'ArticleAuthor'},
+            'article': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['articles.Article']"}),
+            'author': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['articles.Author']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'})
+        },
+        u'articles.articlecollocation': {
+            'Meta': {'ordering': "['-total_count', '-count']", 'unique_together': "(('ngram', 'article'),)", 'object_name': 'ArticleCollocation'},
+            'article': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['articles.Article']"}),
+            'count': ('django.db.models.fields.IntegerField', [], {}),
+            'extra_fields': ('jsonfield.fields.JSONField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'total_count': ('django.db.models.fields.IntegerField', [], {})
+        },
+        u'articles.author': {
+            'Meta': {'ordering': "['name']", 'object_name': 'Author'},
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '50', 'null': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '50', 'null': 'True', 'blank': 'True'}),
+            'middle_name': ('django.db.models.fields.CharField', [], {'max_length': '50', 'null': 'True', 'blank': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        },
+        u'articles.testcollocations': {
+            'Meta': {'object_name': 'TestCollocations'},
+            'article': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['articles.Article']"}),
+            'count': ('django.db.models.fields.IntegerField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        },
+        u'articles.venue': {
+            'Meta': {'ordering': "['acronym']", 'object_name': 'Venue'},
+            'acronym': ('django.db.models.fields.CharField', [], {'max_length': '10'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        }
+    }
+
+    complete_apps = ['articles']
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding index on 'Article', fields ['year', 'id']
+        db.create_index(u'articles_article', ['year', 'id'])
+
+    def backwards(self, orm):
+        # Removing index on 'Article', fields ['year', 'id']
+        db.delete_index(u'articles_article', ['year', 'id'])
+
+    models = {
+        u'articles.article': {
+            'Meta': {'ordering': "['-year']", 'object_name': 'Article', 'index_together': "[('year', 'id')]"},
+            'abstract': ('django.db.models.fields.TextField', [], {'default': "''"}),
+            'citations': ('django.db.models.fields.IntegerField', [], {'default': '0'}),
+            'cluster_id': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'index': ('django.db.models.fields.TextField', [], {'default': "''"}),
+            'index_nonstemmed': ('jsonfield.fields.JSONField', [], {}),
+            'link': ('django.db.models.fields.URLField', [], {'max_length': '200', 'null': 'True'}),
+            'pdf': ('django.db.models.fields.files.FileField', [], {'max_length': '100'}),
+            'stemmed_text': ('django.db.models.fields.TextField', [], {'default': "''"}),
+            'text': ('django.db.models.fields.TextField', [], {'default': "''"}),
+            'title': ('django.db.models.fields.CharField', [], {'default': "''", 'max_length': '255'}),
+            'venue': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['articles.Venue']"}),
+            'wiki_text_index': ('jsonfield.fields.JSONField', [], {'null': 'True'}),
+            'year': ('django.db.models.fields.IntegerField', [], {})
+        },
+        u'articles.articleauthor': {
+            'Meta': {'object_name': 'ArticleAuthor'},
+            'article': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['articles.Article']"}),
+            'author': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['articles.Author']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'})
+        },
+        u'articles.articlecollocation': {
+            'Meta': {'ordering': "['-total_count', '-count']", 'unique_together': "(('ngram', 'article'),)", 'object_name': 'ArticleCollocation', 'index_together': "[('cluster_id', 'ngram'), ('article', 'ngram')]"},
+            'article': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['articles.Article']"}),
+            'cluster_id': ('django.db.models.fields.CharField', [], {'default': "''", 'max_length': '255'}),
+            'count': ('django.db.models.fields.IntegerField', [], {}),
+            'extra_fields': ('jsonfield.fields.JSONField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'total_count': ('django.db.models.fields.IntegerField', [], {})
+        },
+        u'articles.author': {
+            'Meta': {'ordering': "['name']", 'object_name': 'Author'},
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '50', 'null': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '50', 'null': 'True', 'blank': 'True'}),
+            'middle_name': ('django.db.models.fields.CharField', [], {'max_length': '50', 'null': 'True', 'blank': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        },
+        u'articles.testcollocations': {
+            'Meta': {'object_name': 'TestCollocations'},
+            'article': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['articles.Article']"}),
+            'count': ('django.db.models.fields.IntegerField', [], {}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        },
+        u'articles.venue': {
+            'Meta': {'ordering': "['acronym']", 'object_name': 'Venue'},
+            'acronym': ('django.db.models.fields.CharField', [], {'max_length': '10'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        }
+    }
+
+    complete_apps = ['articles']
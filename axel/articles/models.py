@@ -1,20 +1,24 @@
+from collections import defaultdict
+from contextlib import contextmanager
 import json
 import os
+import threading
 
 from django.conf import settings
 from django.contrib.contenttypes import generic
 from django.db import models
 from django.db.models import F, Sum
-from django.db.models.signals import pre_delete, post_save
+from django.db.models.signals import pre_delete, post_save, post_delete
 from django.dispatch import receiver
 
 from jsonfield import JSONField
 from test_collection.models import TaggedCollection
 
 from .utils.db import db_cache
+from .utils.judged import JudgedData
 from axel.libs import nlp
 from axel.libs.utils import get_contexts, get_contexts_ngrams, print_progress
-from axel.stats.models import SWCollocations, Collocations
+from axel.stats.models import SWCollocations, Collocations, STATS_CLUSTERS_DICT
 import axel.stats.scores as scores
 
 
@@ -41,6 +45,20 @@ def pdf_upload_to(instance, filename):
     return '/'.join((instance.venue.acronym, str(instance.year), filename))
 
 
+class ArticleManager(models.Manager):
+    """Adds querysets without the large text columns"""
+
+    # columns holding full texts and indexes, megabytes per article
+    LARGE_FIELDS = ('text', 'stemmed_text', 'index', 'index_nonstemmed', 'wiki_text_index')
+
+    def listing(self):
+        """
+        Articles with the venue and without the large columns, for list displays
+        :rtype: QuerySet
+        """
+        return self.get_query_set().select_related('venue').defer(*self.LARGE_FIELDS)
+
+
 class Article(models.Model):
     """Main article model"""
     title = models.CharField(max_length=255, default='')
@@ -59,9 +77,13 @@ class Article(models.Model):
     # Populated from the classmethod: populate_wiki_index
     wiki_text_index = JSONField(null=True)
 
+    objects = ArticleManager()
+
     class Meta:
         """Meta info"""
         ordering = ['-year']
+        # keyset pagination of article lists by ('-year', '-id'), scanned backwards
+        index_together = [('year', 'id')]
 
     def __unicode__(self):
         """String representation"""
@@ -83,79 +105,14 @@ class Article(models.Model):
         Generate a dbpedia category TREE using networkx
         :rtype: nx.Graph
         """
-        import tempfile
-        import requests
-        from networkx.readwrite import json_graph
-        tmpdir = tempfile.gettempdir()
-        if redirects:
-            graph_object = tmpdir + '/' + str(self.id) + 'redirects.' + '.dbpedia.json'
-        else:
-            graph_object = tmpdir + '/' + str(self.id) + '.dbpedia.json'
-        if not os.path.exists(graph_object):
-
-            stop_uris_set = open(settings.ABS_PATH('stop_uri.txt')).read().split()
-            stop_uris_set = set([x.split('/')[-1] for x in stop_uris_set])
-
-            def recurse_populate_graph(resource, graph, depth):
-                if resource in stop_uris_set:
-                    return
-                if depth == 0:
-                    return
-                if 'Category' in resource:
-                    query = u'SELECT ?broader, ?related, ?broaderof WHERE' \
-                            u' {{{{ <http://dbpedia.org/resource/{0}> skos:broader ?broader }}' \
-                            u' UNION {{ ?broaderof skos:broader <http://dbpedia.org/resource/{0}> }}' \
-                            u' UNION {{ ?related skos:related <http://dbpedia.org/resource/{0}> }}' \
-                            u' UNION {{ <http://dbpedia.org/resource/{0}> skos:related ?related }}}}'.format(resource)
-
-                    results = []
-                    sparql = SPARQLWrapper("http://dbpedia.org/sparql")
-                    sparql.setReturnFormat(JSON)
-                    sparql.setQuery(query)
-                    results.extend(sparql.query().convert()['results']['bindings'])
-                    for result in results:
-                        for rel_type, value in result.iteritems():
-                            uri = value['value']
-                            parent_resource = uri.split('/')[-1]
-                            #print '  ' * (3 - depth), resource, '->', parent_resource
-                            graph.add_edge(resource, parent_resource, type=rel_type)
-                            recurse_populate_graph(parent_resource, graph, depth-1)
-                else:
-                    if resource == 'cumulative gain':
-                        resource = 'Discounted_cumulative_gain'
-                    elif resource == 'world wide web conference':
-                        resource = 'International_World_Wide_Web_Conference'
-                    wiki_cat_query = u'http://en.wikipedia.org/w/api.php?action=query&titles={0}&prop=categories&cllimit=50&clshow=!hidden&format=json&redirects'
-                    results = json.loads(requests.get(wiki_cat_query.format(resource)).text)['query']['pages'].values()[0]
-                    if 'missing' in results:
-                        results = json.loads(requests.get(wiki_cat_query.format(resource.title())).text)['query']['pages'].values()[0]
-                        if 'missing' in results:
-                            print results, resource
-                            results = []
-                        else:
-                            results = [c['title'].replace(' ', '_') for c in results['categories']]
-                    else:
-                        results = [c['title'].replace(' ', '_') for c in results['categories']]
-                    rel_type = "subject"
-                    for parent_resource in results:
-                        #print '  ' * (3 - depth), resource, '->', parent_resource
-                        graph.add_edge(resource, parent_resource, type=rel_type)
-                        recurse_populate_graph(parent_resource, graph, depth-1)
-
-            import networkx as nx
-            from SPARQLWrapper import SPARQLWrapper, JSON
-
-            graph = nx.Graph()
-            ngrams = set(self.articlecollocation_set.values_list('ngram', flat=True))
-            ngrams = self.CollocationModel.COLLECTION_MODEL.objects.filter(ngram__in=ngrams)
-            for ngram in ngrams:
-                if 'dbpedia' in ngram.source or (redirects and 'wiki_redirect' in ngram.source):
-                    recurse_populate_graph(ngram.ngram, graph, 2)
-
-            json_graph.dump(graph, open(graph_object, 'w'))
-        else:
-            graph = json_graph.load(open(graph_object))
-        return graph
+        from axel.articles.utils.category_graph import category_graph
+        from axel.articles.utils.graph_store import graph_store, graph_version
+        sources = ('dbpedia', 'wiki_redirect') if redirects else ('dbpedia',)
+        roots = sorted(self.CollocationModel.COLLECTION_MODEL.source_ngrams(
+            self.articlecollocation_set.values('ngram'), sources))
+        kind = 'dbpedia_redirects' if redirects else 'dbpedia'
+        return graph_store.get_or_build(self.id, kind, graph_version(roots),
+                                        lambda: category_graph.graph(roots, 2))
 
     @property
     def wikilinks_graph(self):
@@ -163,51 +120,11 @@ class Article(models.Model):
         Generate a wikilinks graph using networkx
         :rtype: Graph
         """
-        import tempfile
-        from networkx.readwrite import json_graph
-        import networkx as nx
-        import re
-        import requests
-
-        tmpdir = tempfile.gettempdir()
-        graph_object = tmpdir + '/' + str(self.id) + '.wikilinks.json'
-
-        def _get_links(ngram):
-            ngram_links = json.loads(requests.get(template_query.format(ngram)).text)
-            try:
-                ngram_links = ngram_links['query']['pages'].values()[0]['links']
-            except KeyError:
-                return []
-            ngram_links = [re.sub(r' \(.+\)', '', link['title'].lower()) for link in ngram_links]
-            ngram_links = set([ngram for ngram in ngram_links if len(ngram.split()) > 1])
-            return ngram_links
-
-        if not os.path.exists(graph_object):
-            graph = nx.Graph()
-            links_dict = {}
-            template_query = u'http://en.wikipedia.org/w/api.php?action=query&titles={0}&prop=links&plnamespace=0&pllimit=500&format=json'
-            article_ngrams = list(self.articlecollocation_set.values_list('ngram', flat=True))
-            for i, ngram1 in enumerate(article_ngrams):
-                if ngram1 in links_dict:
-                    ngram1_links = links_dict[ngram1]
-                else:
-                    ngram1_links = _get_links(ngram1)
-                    links_dict[ngram1] = ngram1_links
-                for j in range(i+1, len(article_ngrams)):
-                    ngram2 = article_ngrams[j]
-                    if ngram2 in links_dict:
-                        ngram2_links = links_dict[ngram2]
-                    else:
-                        ngram2_links = _get_links(ngram2)
-                        links_dict[ngram2] = ngram2_links
-                    if ngram1 in ngram2_links or ngram2 in ngram1_links:
-                        graph.add_edge(ngram1, ngram2)
-            json_graph.dump(graph, open(graph_object, 'w'))
-            return graph
-
-        else:
-            graph = json_graph.load(open(graph_object))
-            return graph
+        from axel.articles.utils.graph_store import graph_store, graph_version
+        from axel.articles.utils.wikilinks import wikilinks_graph
+        ngrams = list(self.articlecollocation_set.values_list('ngram', flat=True))
+        return graph_store.get_or_build(self.id, 'wikilinks', graph_version(ngrams),
+                                        lambda: wikilinks_graph(ngrams))
 
     def _create_collocations(self, lemmas):
         """Create collocation for the article"""
@@ -317,21 +234,13 @@ class Article(models.Model):
         locals()[method]()
 
     @classmethod
-    def populate_wiki_index(cls, cluster_id):
-        import networkx as nx
-        from axel.stats.models import STATS_CLUSTERS_DICT
-        for article in print_progress(cls.objects.filter(cluster_id=cluster_id)):
-            text = ''
-            dbpedia_graph = article.dbpedia_graph(redirects=True)
-            # by default components are ordered descending by size
-            max_comp = nx.connected_components(dbpedia_graph)[0]
-            nodes = [node for node in max_comp if 'Category' not in node]
-            statsModel = STATS_CLUSTERS_DICT[cluster_id]
-            ngrams = statsModel.objects.filter(ngram__in=nodes)
-            for ngram in ngrams:
-                text += ngram.wikipedia_text + '\n'
-            article.wiki_text_index = nlp.build_ngram_index(nlp.Stemmer.stem_wordnet(text))
-            article.save()
+    def populate_wiki_index(cls, cluster_id, workers=4):
+        """
+        Build wiki_text_index of the articles from the cached per-concept indexes
+        :param workers: number of processes fetching and lemmatizing the concept pages
+        """
+        from axel.articles.utils.wiki_index import populate_wiki_index
+        populate_wiki_index(cluster_id, workers)
 
     def articlecollocations(self):
         return self.CollocationModel.objects.filter(article=self)
@@ -352,7 +261,7 @@ class ArticleCollocationsManager(models.Manager):
 
     def get_query_set(self):
         return super(ArticleCollocationsManager, self).get_query_set()\
-            .filter(article__cluster_id=self.model.CLUSTER_ID)
+            .filter(cluster_id=self.model.CLUSTER_ID)
 
 
 class ArticleCollocation(models.Model):
@@ -365,38 +274,48 @@ class ArticleCollocation(models.Model):
     # duplication to efficiently perform ordering
     total_count = models.IntegerField()
     article = models.ForeignKey(Article)
+    # duplication of article cluster to filter collections without joins
+    cluster_id = models.CharField(max_length=255, default='')
     tags = generic.GenericRelation(TaggedCollection, for_concrete_model=False)
 
     extra_fields = JSONField()
 
     # Populated by subclasses
     judged_data = None
+    """:type: JudgedData"""
 
     class Meta:
         """Meta info"""
         ordering = ['-total_count', '-count']
         unique_together = ('ngram', 'article')
+        index_together = [('cluster_id', 'ngram'), ('article', 'ngram')]
 
     def __unicode__(self):
         """String representation"""
         return u"{0},{1}".format(self.ngram, self.article)
 
+    def save(self, *args, **kwargs):
+        """Populate cluster from the article if not set"""
+        if not self.cluster_id:
+            self.cluster_id = getattr(self, 'CLUSTER_ID', None) or self.article.cluster_id
+        super(ArticleCollocation, self).save(*args, **kwargs)
+
     @classmethod
     def quick_stats(cls):
         """print collection statistics"""
         print '{0}, Total:'.format(cls.__name__), cls.objects.all().count()
         print 'Total different collocations:', cls.COLLECTION_MODEL.objects.all().count()
-        print 'Judged count (including maxent):', len(cls.judged_data), 'Valid:', cls.judged_data.values().count('1'),\
-            'Invalid:', cls.judged_data.values().count('0')
-        colloc_data = set()
-        for article in Article.objects.filter(cluster_id=cls.CLUSTER_ID):
-            for ngram in cls.objects.filter(article=article):
-                colloc_data.add(u"{0},{1}".format(ngram.ngram, article))
-
-        maxent_data = set(cls.judged_data.keys()) - colloc_data
+        judged_data = cls.judged_data
+        print 'Judged count (including maxent):', len(judged_data), 'Valid:', judged_data.count(1),\
+            'Invalid:', judged_data.count(0)
+        colloc_data = set([(ngram, judged_data.article_key(article_id)) for ngram, article_id
+                           in cls.objects.values_list('ngram', 'article')])
+
+        maxent_data = set(judged_data) - colloc_data
         print 'MaxEnt Data Total:', len(maxent_data)
-        print 'MaxEnt Data Different:', len(set([c.split(',')[0] for c in maxent_data]))
-        print 'MaxEnt Total Valid:', len([c for c in maxent_data if cls.judged_data[c] == '1'])
+        print 'MaxEnt Data Different:', len(set([ngram for ngram, _ in maxent_data]))
+        print 'MaxEnt Total Valid:', len([ngram for ngram, article in maxent_data
+                                          if judged_data.is_relevant(ngram, article) == 1])
 
     @property
     def is_relevant(self):
@@ -404,10 +323,7 @@ class ArticleCollocation(models.Model):
         Get relevance information.
         Used in article detail view.
         """
-        try:
-            return int(self.judged_data[unicode(self)])
-        except KeyError:
-            return -1
+        return self.judged_data.is_relevant(self.ngram, self.article_id)
 
     @property
     @db_cache('extra_fields')
@@ -500,7 +416,7 @@ class CSArticleCollocations(ArticleCollocation):
     CLUSTER_ID = 'CS_COLLOCS'
     COLLECTION_MODEL = Collocations
     objects = ArticleCollocationsManager()
-    judged_data = dict([line.rsplit(',', 1) for line in open(settings.ABS_PATH('CSArticleCollocations.csv')).read().split('\n')])
+    judged_data = JudgedData('CSArticleCollocations.csv', CLUSTER_ID)
 
     class Meta:
         proxy = True
@@ -510,7 +426,7 @@ class SWArticleCollocations(ArticleCollocation):
     CLUSTER_ID = 'SW_COLLOCS'
     COLLECTION_MODEL = SWCollocations
     objects = ArticleCollocationsManager()
-    judged_data = dict([line.rsplit(',', 1) for line in open(settings.ABS_PATH('SWArticleCollocations.csv')).read().split('\n')])
+    judged_data = JudgedData('SWArticleCollocations.csv', CLUSTER_ID)
 
     class Meta:
         proxy = True
@@ -561,8 +477,76 @@ def clean_pdf(sender, instance, **kwargs):
     Remove PDF on deletion
     :type instance: Article
     """
+    from axel.articles.utils.graph_store import graph_store
     if instance.pdf:
         os.unlink(instance.pdf.path)
+    graph_store.invalidate(article_id=instance.id)
+
+
+def clear_article_keys(sender, instance, **kwargs):
+    """
+    Drop cached article keys of the judged data, keys are article string representations
+    :type instance: Article
+    """
+    if instance.cluster_id in CLUSTERS_DICT:
+        CLUSTERS_DICT[instance.cluster_id].judged_data.clear_article_keys()
+
+
+# n-grams with outdated occurrence stats per cluster, collected while a batch is open
+_occurrence_batch = threading.local()
+# n-grams of the articles being deleted, recalculated once per delete cascade
+_deleted_article_ngrams = {}
+
+
+@contextmanager
+def occurrence_stats_batch():
+    """
+    Collect the n-grams of the saved and deleted collocations and recalculate
+    their occurrence stats once on exit, nested batches join the outer one
+    """
+    if getattr(_occurrence_batch, 'ngrams', None) is not None:
+        yield
+        return
+    _occurrence_batch.ngrams = defaultdict(set)
+    try:
+        yield
+    finally:
+        touched, _occurrence_batch.ngrams = _occurrence_batch.ngrams, None
+    for cluster_id, ngrams in touched.iteritems():
+        STATS_CLUSTERS_DICT[cluster_id].update_occurrence_stats(list(ngrams))
+
+
+def _outdate_occurrence_stats(cluster_id, ngram):
+    """Recalculate occurrence stats of the n-gram now or on exit of the open batch"""
+    if cluster_id not in STATS_CLUSTERS_DICT:
+        return
+    batch = getattr(_occurrence_batch, 'ngrams', None)
+    if batch is not None:
+        batch[cluster_id].add(ngram)
+    else:
+        STATS_CLUSTERS_DICT[cluster_id].update_occurrence_stats([ngram])
+
+
+@receiver(pre_delete, sender=Article)
+def collect_deleted_ngrams(sender, instance, **kwargs):
+    """
+    Remember n-grams of the deleted article, the cascade deletes its collocations
+    before the article itself
+    :type instance: Article
+    """
+    _deleted_article_ngrams[instance.id] = (instance.cluster_id, set(
+        ArticleCollocation.objects.filter(article=instance).values_list('ngram', flat=True)))
+
+
+@receiver(post_delete, sender=Article)
+def update_deleted_occurrence_stats(sender, instance, **kwargs):
+    """
+    Recalculate occurrence stats of the deleted article n-grams in one go
+    :type instance: Article
+    """
+    cluster_id, ngrams = _deleted_article_ngrams.pop(instance.id, (None, None))
+    if ngrams and cluster_id in STATS_CLUSTERS_DICT:
+        STATS_CLUSTERS_DICT[cluster_id].update_occurrence_stats(list(ngrams))
 
 
 def update_global_collocations(sender, instance, created, **kwargs):
@@ -584,9 +568,51 @@ def update_global_collocations(sender, instance, created, **kwargs):
     # update total count locally
     instance.total_count = colloc.count
     instance.save_base(raw=True)
+    _outdate_occurrence_stats(instance.cluster_id, instance.ngram)
+
+
+def update_occurrence_stats(sender, instance, **kwargs):
+    """
+    Recalculate document frequency and count histogram on delete for ArticleCollocation,
+    deletes cascading from the article are recalculated by the article handler
+    :type instance: ArticleCollocation
+    """
+    if instance.article_id not in _deleted_article_ngrams:
+        _outdate_occurrence_stats(instance.cluster_id, instance.ngram)
+
+
+def index_collocation(sender, instance, **kwargs):
+    """
+    Apply the saved collocation to the concept search index
+    :type instance: ArticleCollocation
+    """
+    if kwargs.get('raw'):
+        return
+    from axel.articles.utils.search_index import search_index
+    search_index.collocation_saved(instance)
+
+
+def unindex_collocation(sender, instance, **kwargs):
+    """
+    Outdate the concept search index on delete
+    :type instance: ArticleCollocation
+    """
+    from axel.articles.utils.search_index import search_index
+    search_index.collocation_deleted(instance)
 
+post_save.connect(clear_article_keys, sender=Article)
+post_delete.connect(clear_article_keys, sender=Article)
 post_save.connect(update_global_collocations, sender=CSArticleCollocations)
 post_save.connect(update_global_collocations, sender=SWArticleCollocations)
+post_delete.connect(update_occurrence_stats, sender=ArticleCollocation)
+post_delete.connect(update_occurrence_stats, sender=CSArticleCollocations)
+post_delete.connect(update_occurrence_stats, sender=SWArticleCollocations)
+post_save.connect(index_collocation, sender=ArticleCollocation)
+post_save.connect(index_collocation, sender=CSArticleCollocations)
+post_save.connect(index_collocation, sender=SWArticleCollocations)
+post_delete.connect(unindex_collocation, sender=ArticleCollocation)
+post_delete.connect(unindex_collocation, sender=CSArticleCollocations)
+post_delete.connect(unindex_collocation, sender=SWArticleCollocations)
 
 #@receiver(post_save, sender=Article)
 #def create_acronyms(sender, instance, created, **kwargs):
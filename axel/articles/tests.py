@@ -1,10 +1,17 @@
 """Unit-tests for articles app"""
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
 import os
+import threading
+import urlparse
 from django.test import TestCase
 from django.conf import settings
 from django.core.files import File
-from axel.articles.models import Article
-from axel.stats.models import Collocations
+from django.core.management import call_command
+from axel.articles.models import Article, CSArticleCollocations
+from axel.articles.utils.boolean_query import parse_query, intersect_all, difference
+from axel.articles.utils.ngram_index import NgramIndex
+from axel.libs import nlp
+from axel.stats.models import Collocations, AcmSearchCount
 
 
 class CollocationsTest(TestCase):
@@ -28,3 +35,103 @@ class CollocationsTest(TestCase):
         collocs = Collocations.objects.filter(count__gt=0).exists()
         self.assertFalse(collocs)
 
+
+class JudgedDataTest(TestCase):
+    """Tests judged relevance indexes"""
+
+    def test_indexes(self):
+        """Test judgements are consistent across article and n-gram indexes"""
+        judged_data = CSArticleCollocations.judged_data
+        (ngram, article), is_rel = judged_data.items()[0]
+        self.assertEqual(judged_data.for_article(article)[ngram], is_rel)
+        self.assertEqual(judged_data.for_ngram(ngram)[article], is_rel)
+        self.assertEqual(judged_data.is_relevant(ngram, article), is_rel)
+        self.assertEqual(judged_data.is_relevant(ngram, u'unknown article'), -1)
+        self.assertEqual(len(judged_data), judged_data.count(0) + judged_data.count(1))
+
+
+class NgramIndexTest(TestCase):
+    """Tests autocomplete n-gram index"""
+
+    def test_search(self):
+        """Test substring and prefix matches are ordered by count"""
+        # bulk creation skips external source matching
+        Collocations.objects.bulk_create([
+            Collocations(ngram='latent semantic indexing', count=3),
+            Collocations(ngram='semantic web', count=5),
+            Collocations(ngram='information retrieval', count=7)])
+        index = NgramIndex(Collocations)
+        self.assertEqual(index.search('Semantic'), [('semantic web', 5),
+                                                    ('latent semantic indexing', 3)])
+        self.assertEqual(index.search('semantic', limit=1), [('semantic web', 5)])
+        self.assertEqual(index.search('in'), [('information retrieval', 7)])
+        self.assertEqual(index.search('xyz'), [])
+        self.assertIn('semantic web', index)
+        self.assertNotIn('Semantic web', index)
+
+
+class BooleanQueryTest(TestCase):
+    """Tests boolean query parsing and posting operations"""
+
+    def test_parse(self):
+        """Test operator precedence, phrases and filters"""
+        self.assertEqual(parse_query('"Semantic  web" AND NOT venue:SIGIR year:2005-2010 OR xml'),
+                         ('or', [('and', [('concept', 'semantic web'),
+                                          ('not', ('venue', 'SIGIR')),
+                                          ('year', 2005, 2010)]),
+                                 ('concept', 'xml')]))
+        self.assertEqual(parse_query('(a OR b) c'),
+                         ('and', [('or', [('concept', 'a'), ('concept', 'b')]), ('concept', 'c')]))
+        self.assertEqual(parse_query('"Neural Networks" OR LSI', nlp.Stemmer.stem_wordnet),
+                         ('or', [('concept', 'neural network'), ('concept', 'LSI')]))
+        self.assertRaises(ValueError, parse_query, '(a OR b')
+        self.assertRaises(ValueError, parse_query, 'a AND')
+
+    def test_postings(self):
+        """Test galloping intersection and difference"""
+        self.assertEqual(intersect_all([[1, 3, 5, 7, 9, 11], [2, 3, 11, 12], [3, 4, 11]]), [3, 11])
+        self.assertEqual(difference([1, 2, 3, 4, 5], [2, 5, 6]), [1, 3, 4])
+
+
+class _AcmStandInHandler(BaseHTTPRequestHandler):
+    """ACM DL results page with a count for every query except 'unknown'"""
+    queries = []
+
+    def do_GET(self):
+        query = urlparse.parse_qs(urlparse.urlparse(self.path).query)['query'][0]
+        self.queries.append(query)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.end_headers()
+        if 'unknown' not in query:
+            self.wfile.write('Results 1 - 20 of 1,234')
+
+    def log_message(self, *args):
+        pass
+
+
+class AcmScoringTest(TestCase):
+    """Tests batch ACM DL scoring against a local stand-in server"""
+
+    def test_score_acm(self):
+        """Test counts are stored and a second run only retries failures"""
+        Collocations.objects.bulk_create([Collocations(ngram='latent semantic indexing'),
+                                          Collocations(ngram='unknown phrase')])
+        server = HTTPServer(('127.0.0.1', 0), _AcmStandInHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        url = 'http://127.0.0.1:{0}/results.cfm'.format(server.server_port)
+        try:
+            call_command('score_acm', cluster=Collocations.CLUSTER_ID, url=url, rate=0)
+            self.assertEqual(AcmSearchCount.counts(['latent semantic indexing', 'unknown phrase']),
+                             {'latent semantic indexing': 1234})
+            failed = AcmSearchCount.objects.get(ngram='unknown phrase')
+            self.assertEqual((failed.status, failed.attempts), (AcmSearchCount.STATUS_FAILED, 1))
+
+            del _AcmStandInHandler.queries[:]
+            call_command('score_acm', cluster=Collocations.CLUSTER_ID, url=url, rate=0)
+            self.assertEqual(_AcmStandInHandler.queries, ['"unknown phrase"'])
+            self.assertEqual(AcmSearchCount.objects.get(ngram='unknown phrase').attempts, 2)
+        finally:
+            server.shutdown()
@@ -1,14 +1,16 @@
 """Url mappings"""
 from django.conf.urls import patterns, url
 
-from axel.articles.views import PDFCollocationsView, ArticleList, ArticleDetailView,\
-    ConceptAutocompleteView
+from axel.articles.views import PDFCollocationsView, ArticleList, ArticleListJSONView,\
+    ArticleDetailView, ConceptAutocompleteView, ConceptSuggestionView
 
 
 urlpatterns = patterns('axel.articles.views',
     url(r'pdfcollocations/$', PDFCollocationsView.as_view(), name='pdf_collocations'),
     url(r'^$', ArticleList.as_view(), name='articles'),
+    url(r'^json/$', ArticleListJSONView.as_view(), name='articles_json'),
     url(r'^(?P<pk>\d+)/$', ArticleDetailView.as_view(), name='article_detail'),
     url(r'^concept_autocomplete/$', ConceptAutocompleteView.as_view(), name='concept_autocomplete'),
+    url(r'^concept_suggestions/$', ConceptSuggestionView.as_view(), name='concept_suggestions'),
     url(r'^filter_articles/$', 'filter_articles_view', name='filter_articles'),
 )
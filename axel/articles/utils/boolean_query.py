@@ -0,0 +1,185 @@
+"""
+Boolean concept queries: parsing and operations over sorted posting lists.
+
+Query syntax:
+    "latent semantic indexing" AND (retrieval OR ranking) NOT venue:SIGIR year:2005-2010
+Quoted phrases are multi-word concepts, bare words are single-word concepts,
+adjacent terms are joined with AND. Concept terms are normalized like the stored n-grams
+by the caller supplied function, e.g. the WordNet lemmatizer.
+"""
+from bisect import bisect_left
+import re
+
+
+TOKEN_RE = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+OPERATORS = ('AND', 'OR', 'NOT')
+
+
+class QueryParseError(ValueError):
+    """Malformed boolean query"""
+
+
+def _lower(term):
+    return term.lower()
+
+
+def parse_query(query, normalize=_lower):
+    """
+    Parse query into a tree of tuples:
+    ('concept', ngram), ('venue', acronym), ('year', start, end),
+    ('and', [nodes]), ('or', [nodes]), ('not', node)
+    :type query: unicode
+    :param normalize: function applied to the concept terms, lowercase by default
+    :rtype: tuple
+    :raises QueryParseError: on malformed queries
+    """
+    tokens = TOKEN_RE.findall(query)
+    if not tokens:
+        raise QueryParseError('Empty query')
+    parser = _Parser(tokens, normalize)
+    node = parser.parse_or()
+    if parser.pos != len(tokens):
+        raise QueryParseError(u'Unexpected token: {0}'.format(tokens[parser.pos]))
+    return node
+
+
+class _Parser(object):
+    """Recursive descent parser, NOT binds tighter than AND, AND tighter than OR"""
+
+    def __init__(self, tokens, normalize):
+        self.tokens = tokens
+        self.normalize = normalize
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise QueryParseError('Unexpected end of query')
+        self.pos += 1
+        return token
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self._peek() == 'OR':
+            self._next()
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while self._peek() not in (None, 'OR', ')'):
+            if self._peek() == 'AND':
+                self._next()
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not(self):
+        if self._peek() == 'NOT':
+            self._next()
+            return 'not', self.parse_not()
+        return self.parse_atom()
+
+    def parse_atom(self):
+        token = self._next()
+        if token == '(':
+            node = self.parse_or()
+            if self._next() != ')':
+                raise QueryParseError('Missing closing parenthesis')
+            return node
+        if token in OPERATORS or token == ')':
+            raise QueryParseError(u'Unexpected token: {0}'.format(token))
+        if token.startswith('"'):
+            phrase = self.normalize(' '.join(token[1:-1].split()))
+            if not phrase:
+                raise QueryParseError('Empty phrase')
+            return 'concept', phrase
+        if token.startswith('venue:'):
+            return 'venue', token[len('venue:'):]
+        if token.startswith('year:'):
+            try:
+                years = [int(year) for year in token[len('year:'):].split('-', 1)]
+            except ValueError:
+                raise QueryParseError(u'Invalid year: {0}'.format(token))
+            return 'year', years[0], years[-1]
+        term = self.normalize(token)
+        if not term:
+            raise QueryParseError(u'Invalid term: {0}'.format(token))
+        return 'concept', term
+
+
+def gallop(seq, value, lo=0):
+    """
+    Position of the first element not less than value, searching from lo with
+    exponentially growing steps, cheap when the position is close to lo
+    :type seq: array
+    :rtype: int
+    """
+    size = len(seq)
+    step = 1
+    hi = lo
+    while hi < size and seq[hi] < value:
+        lo = hi + 1
+        hi = lo + step
+        step *= 2
+    return bisect_left(seq, value, lo, min(hi + 1, size))
+
+
+def intersect(first, second):
+    """
+    Intersection of sorted sequences, the shorter one drives the galloping search
+    :rtype: list
+    """
+    if len(first) > len(second):
+        first, second = second, first
+    result = []
+    pos = 0
+    size = len(second)
+    for value in first:
+        pos = gallop(second, value, pos)
+        if pos == size:
+            break
+        if second[pos] == value:
+            result.append(value)
+    return result
+
+
+def intersect_all(postings):
+    """
+    Intersection of several sorted sequences, starting from the shortest ones
+    :rtype: list
+    """
+    postings = sorted(postings, key=len)
+    result = list(postings[0])
+    for posting in postings[1:]:
+        if not result:
+            break
+        result = intersect(result, posting)
+    return result
+
+
+def union_all(postings):
+    """
+    :rtype: list
+    """
+    result = set()
+    for posting in postings:
+        result.update(posting)
+    return sorted(result)
+
+
+def difference(first, second):
+    """
+    Elements of sorted first that are not in sorted second
+    :rtype: list
+    """
+    result = []
+    pos = 0
+    size = len(second)
+    for value in first:
+        pos = gallop(second, value, pos)
+        if pos == size or second[pos] != value:
+            result.append(value)
+    return result
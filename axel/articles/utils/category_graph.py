@@ -0,0 +1,240 @@
+"""
+Corpus-wide DBpedia category graph. Resources are expanded once, breadth-first, with
+batched SPARQL and Wikipedia API requests; article graphs are assembled from the store.
+"""
+import os
+import time
+
+from django.conf import settings
+import networkx as nx
+
+from axel.libs.http import http_client, WIKI_API_URL, SPARQL_ENDPOINT
+from axel.libs.sqlite_store import SQLiteStore
+
+
+STORE_NAME = 'category_graph.sqlite'
+RESOURCE_PREFIX = 'http://dbpedia.org/resource/'
+# Resources per SPARQL VALUES clause and titles per Wikipedia API request
+SPARQL_BATCH = 50
+WIKI_BATCH = 50
+# Characters not allowed inside SPARQL IRIs
+IRI_ESCAPES = dict((char, '%{0:02X}'.format(ord(char))) for char in '<>"{}|^`\\ ')
+CATEGORIES_QUERY = u'SELECT ?resource, ?broader, ?related, ?broaderof WHERE {{' \
+                   u' VALUES ?resource {{ {0} }}' \
+                   u' {{ ?resource skos:broader ?broader }}' \
+                   u' UNION {{ ?broaderof skos:broader ?resource }}' \
+                   u' UNION {{ ?related skos:related ?resource }}' \
+                   u' UNION {{ ?resource skos:related ?related }}}}'
+# Wikipedia titles of the n-grams which are not found by themselves
+TITLE_OVERRIDES = {
+    'cumulative gain': 'Discounted_cumulative_gain',
+    'world wide web conference': 'International_World_Wide_Web_Conference',
+}
+
+
+def _resource_iri(resource):
+    return u'<{0}{1}>'.format(RESOURCE_PREFIX,
+                              ''.join(IRI_ESCAPES.get(char, char) for char in resource))
+
+
+def _resource_name(uri):
+    return uri.split('/')[-1]
+
+
+def fetch_category_edges(resources):
+    """
+    Broader, narrower and related categories of the category resources, single query per batch
+    :returns: dict of the form {resource: [(neighbor, relation type), ...]}
+    :rtype: dict
+    """
+    edges = dict((resource, []) for resource in resources)
+    for i in xrange(0, len(resources), SPARQL_BATCH):
+        batch = resources[i:i + SPARQL_BATCH]
+        iris = dict((_resource_iri(resource)[1:-1], resource) for resource in batch)
+        query = CATEGORIES_QUERY.format(u' '.join(_resource_iri(resource) for resource in batch))
+        results = http_client.get_json(SPARQL_ENDPOINT, params={
+            'query': query, 'format': 'application/sparql-results+json'
+        })['results']['bindings']
+        for result in results:
+            resource = iris.get(result.pop('resource')['value'])
+            if resource is None:
+                continue
+            for rel_type, value in result.iteritems():
+                edges[resource].append((_resource_name(value['value']), rel_type))
+    return edges
+
+
+def _fetch_wiki_categories(titles):
+    """
+    :returns: dict of the form {title: [category, ...]}, missing titles are absent
+    :rtype: dict
+    """
+    categories = {}
+    for i in xrange(0, len(titles), WIKI_BATCH):
+        batch = titles[i:i + WIKI_BATCH]
+        params = {'action': 'query', 'titles': u'|'.join(batch), 'prop': 'categories',
+                  'cllimit': 'max', 'clshow': '!hidden', 'format': 'json', 'redirects': ''}
+        pages = {}
+        aliases = {}
+        while True:
+            result = http_client.get_json(WIKI_API_URL, params=params)
+            query = result.get('query', {})
+            for alias in query.get('normalized', []) + query.get('redirects', []):
+                aliases[alias['from']] = alias['to']
+            for page in query.get('pages', {}).itervalues():
+                missing = 'missing' in page or 'invalid' in page
+                entry = pages.setdefault(page['title'], {'missing': missing, 'categories': []})
+                entry['categories'].extend(c['title'].replace(' ', '_')
+                                           for c in page.get('categories', []))
+            # categories of all pages are limited together, follow the continuation
+            if 'continue' in result:
+                params.update(result['continue'])
+            elif 'query-continue' in result:
+                params.update(result['query-continue']['categories'])
+            else:
+                break
+        for title in batch:
+            page_title = title
+            # normalization first, then the redirect
+            for _ in xrange(2):
+                page_title = aliases.get(page_title, page_title)
+            page = pages.get(page_title)
+            if page is not None and not page['missing']:
+                categories[title] = page['categories']
+    return categories
+
+
+def fetch_page_categories(resources):
+    """
+    Wikipedia categories of the n-gram resources, retried title-cased when missing
+    :returns: dict of the form {resource: [(category, 'subject'), ...]}
+    :rtype: dict
+    """
+    titles = dict((resource, TITLE_OVERRIDES.get(resource, resource)) for resource in resources)
+    found = _fetch_wiki_categories(list(set(titles.values())))
+    missing = set(title.title() for title in titles.itervalues() if title not in found)
+    if missing:
+        found.update((title, categories) for title, categories
+                     in _fetch_wiki_categories(list(missing)).iteritems())
+    edges = {}
+    for resource, title in titles.iteritems():
+        categories = found.get(title, found.get(title.title(), []))
+        edges[resource] = [(category, 'subject') for category in categories]
+    return edges
+
+
+class CategoryGraphStore(SQLiteStore):
+    """
+    Adjacency lists of the expanded resources. A resource is expanded when its neighbors
+    are stored, the neighbors themselves are expanded on demand.
+    """
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS expanded (resource TEXT PRIMARY KEY, created REAL)',
+        'CREATE TABLE IF NOT EXISTS edges (source TEXT, target TEXT, type TEXT)',
+        'CREATE INDEX IF NOT EXISTS edges_source ON edges (source)',
+    )
+
+    def __init__(self, path=None):
+        super(CategoryGraphStore, self).__init__(path or os.path.join(settings.CACHE_ROOT,
+                                                                      STORE_NAME))
+        self._stop_uris = None
+
+    @property
+    def stop_uris(self):
+        """
+        :rtype: set
+        """
+        if self._stop_uris is None:
+            with open(settings.ABS_PATH('stop_uri.txt')) as stop_file:
+                self._stop_uris = set(uri.split('/')[-1] for uri in stop_file.read().split())
+        return self._stop_uris
+
+    def expanded(self, resources):
+        """
+        :rtype: set
+        """
+        return set(row[0] for row in
+                   self._select_in('SELECT resource FROM expanded WHERE resource IN (%s)',
+                                   resources))
+
+    def neighbors(self, resources):
+        """
+        :returns: dict of the form {resource: [(neighbor, relation type), ...]}
+        :rtype: dict
+        """
+        result = dict((resource, []) for resource in resources)
+        for source, target, rel_type in \
+                self._select_in('SELECT source, target, type FROM edges WHERE source IN (%s)',
+                                resources):
+            result[source].append((target, rel_type))
+        return result
+
+    def _store(self, edges):
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            for resource, neighbors in edges.iteritems():
+                connection.execute('DELETE FROM edges WHERE source = ?', (resource,))
+                connection.executemany('INSERT INTO edges VALUES (?, ?, ?)',
+                                       [(resource, target, rel_type)
+                                        for target, rel_type in neighbors])
+                connection.execute('INSERT OR REPLACE INTO expanded VALUES (?, ?)',
+                                   (resource, now))
+
+    def expand(self, resources, depth):
+        """
+        Breadth-first expansion of the resources up to the depth, only the resources
+        missing in the store are requested, level by level in batches
+        :type resources: iterable
+        """
+        level = set(resources)
+        seen = set(level)
+        for _ in xrange(depth):
+            level = [resource for resource in level if resource not in self.stop_uris]
+            if not level:
+                break
+            new = set(level).difference(self.expanded(level))
+            categories = [resource for resource in new if 'Category' in resource]
+            pages = [resource for resource in new if 'Category' not in resource]
+            if categories:
+                self._store(fetch_category_edges(categories))
+            if pages:
+                self._store(fetch_page_categories(pages))
+            next_level = set()
+            for neighbors in self.neighbors(level).itervalues():
+                next_level.update(target for target, _ in neighbors)
+            level = next_level.difference(seen)
+            seen.update(level)
+
+    def graph(self, resources, depth):
+        """
+        Category graph around the resources, expanded up to the depth
+        :rtype: nx.Graph
+        """
+        self.expand(resources, depth)
+        graph = nx.Graph()
+        level = set(resources)
+        seen = set(level)
+        for _ in xrange(depth):
+            level = [resource for resource in level if resource not in self.stop_uris]
+            next_level = set()
+            for resource, neighbors in self.neighbors(level).iteritems():
+                for target, rel_type in neighbors:
+                    graph.add_edge(resource, target, type=rel_type)
+                    next_level.add(target)
+            level = next_level.difference(seen)
+            seen.update(level)
+        return graph
+
+    def clear(self):
+        """Drop all expanded resources and the article graphs built from them"""
+        from axel.articles.utils.graph_store import graph_store
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM edges')
+            connection.execute('DELETE FROM expanded')
+        graph_store.invalidate(kind='dbpedia')
+        graph_store.invalidate(kind='dbpedia_redirects')
+
+
+category_graph = CategoryGraphStore()
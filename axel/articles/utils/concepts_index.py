@@ -1,16 +1,177 @@
 """
 Building and maintaining index of words-concepts
-This file is imported from settings
+Postings are kept in memory as arrays of sorted concept ids and persisted as a single
+snapshot file under CACHE_ROOT.
 """
+from array import array
+import atexit
+from bisect import bisect_left
 from collections import defaultdict
-from django.core.cache import cache
+import cPickle as pickle
+import os
+import tempfile
+import threading
 
-import sys
+from django.conf import settings
+from django.db.models import Count, Max
 
 
-CONCEPT_PREFIX = 'concept:'
-WORDS_SET = 'keywords'
-EXPIRE = sys.maxint
+SNAPSHOT_NAME = 'concepts_index.pcl'
+# Number of concept updates after which the snapshot is rewritten,
+# the rest is written on exit
+SNAPSHOT_BATCH = 1000
+
+
+class ConceptIndex(object):
+    """
+    Word -> concept ids index, words are mapped to ids and each word id has
+    an array of sorted concept ids.
+    """
+
+    def __init__(self, filename=SNAPSHOT_NAME):
+        self.filename = filename
+        self._lock = threading.RLock()
+        self._words = []
+        self._word_ids = {}
+        self._postings = []
+        self._version = None
+        # updates not written to the snapshot yet
+        self._unsaved = 0
+
+    @property
+    def path(self):
+        return os.path.join(settings.CACHE_ROOT, self.filename)
+
+    @staticmethod
+    def _model():
+        from axel.stats.models import Collocations
+        return Collocations
+
+    def _table_version(self):
+        stats = self._model().objects.order_by().aggregate(count=Count('id'), max_id=Max('id'))
+        return stats['count'], stats['max_id']
+
+    def _word_id(self, word):
+        """Get or create id of the word"""
+        if word not in self._word_ids:
+            self._word_ids[word] = len(self._words)
+            self._words.append(word)
+            self._postings.append(array('l'))
+        return self._word_ids[word]
+
+    def build(self):
+        """Build the index from the collocations and store the snapshot"""
+        with self._lock:
+            self._words, self._word_ids, self._postings = [], {}, []
+            self._version = self._table_version()
+            concepts = self._model().objects.order_by('id').values_list('id', 'ngram')
+            for c_id, concept in concepts.iterator():
+                for word in set(concept.split()):
+                    # concepts are read in id order, postings stay sorted
+                    self._postings[self._word_id(word)].append(c_id)
+            self.save()
+
+    def save(self):
+        """Write the snapshot atomically"""
+        with self._lock:
+            if not os.path.exists(settings.CACHE_ROOT):
+                os.makedirs(settings.CACHE_ROOT)
+            data = {'version': self._version, 'words': self._words,
+                    'postings': [posting.tostring() for posting in self._postings]}
+            fd, tmp_path = tempfile.mkstemp(dir=settings.CACHE_ROOT)
+            with os.fdopen(fd, 'wb') as snapshot:
+                pickle.dump(data, snapshot, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, self.path)
+            self._unsaved = 0
+
+    def flush(self):
+        """Write the snapshot if there are unsaved updates"""
+        with self._lock:
+            if self._unsaved:
+                self.save()
+
+    def load(self):
+        """
+        Load the snapshot, rebuild if it is missing or outdated
+        """
+        with self._lock:
+            if self._version is not None:
+                return
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as snapshot:
+                    data = pickle.load(snapshot)
+                if data['version'] == self._table_version():
+                    self._words = data['words']
+                    self._word_ids = dict((word, i) for i, word in enumerate(self._words))
+                    self._postings = []
+                    for posting in data['postings']:
+                        self._postings.append(array('l'))
+                        self._postings[-1].fromstring(posting)
+                    self._version = data['version']
+                    return
+            self.build()
+
+    def update(self, c_id, keywords):
+        """
+        Add the concept to the postings of its words, the snapshot is rewritten
+        every SNAPSHOT_BATCH updates
+        :type c_id: int
+        :type keywords: unicode
+        """
+        self.load()
+        with self._lock:
+            version = self._table_version()
+            if version[0] - self._version[0] not in (0, 1):
+                # other concepts were changed meanwhile
+                self.build()
+                return
+            for word in set(keywords.split()):
+                posting = self._postings[self._word_id(word)]
+                pos = bisect_left(posting, c_id)
+                if pos == len(posting) or posting[pos] != c_id:
+                    posting.insert(pos, c_id)
+            self._version = version
+            self._unsaved += 1
+            if self._unsaved >= SNAPSHOT_BATCH:
+                self.save()
+
+    def __len__(self):
+        """Number of words"""
+        self.load()
+        return len(self._words)
+
+    def words(self):
+        """
+        :rtype: list
+        """
+        self.load()
+        return list(self._words)
+
+    def concepts(self, word):
+        """
+        :returns: sorted ids of the concepts containing the word
+        :rtype: array
+        """
+        self.load()
+        word_id = self._word_ids.get(word)
+        return self._postings[word_id] if word_id is not None else array('l')
+
+    def histogram(self):
+        """
+        :rtype: dict
+        :returns: dict of the form {concepts per word: words}
+        """
+        self.load()
+        with self._lock:
+            word_hist = defaultdict(int)
+            for posting in self._postings:
+                word_hist[len(posting)] += 1
+        return dict(word_hist)
+
+
+concept_index = ConceptIndex()
+# updates made by the process since the last snapshot
+atexit.register(concept_index.flush)
 
 
 def get_global_word_set():
@@ -18,28 +179,12 @@ def get_global_word_set():
     Safely get global word set
     :rtype: set
     """
-    if not cache.has_key(WORDS_SET):
-        build_index()
-    return cache.get(WORDS_SET)
+    return set(concept_index.words())
 
 
 def build_index():
-    """
-    Building index and putting it to cache
-    Each concept will have a separate cache entry for the ease of update.
-    Cache also
-    """
-    if cache.has_key(WORDS_SET):
-        return
-    from axel.stats.models import Collocations
-    index = defaultdict(list)
-    for id, concept in Collocations.objects.values_list('id', 'ngram'):
-        for word in concept.split():
-            index[word].append(id)
-    for key, values in index.iteritems():
-        cache.set(CONCEPT_PREFIX + key, values, EXPIRE)
-
-    cache.set(WORDS_SET, set(index.keys()), EXPIRE)
+    """Rebuild index and its snapshot, use `concept_index.load()` to reuse the snapshot"""
+    concept_index.build()
 
 
 def update_index(c_id, keywords):
@@ -48,20 +193,4 @@ def update_index(c_id, keywords):
     :type c_id: int
     :type keywords: unicode
     """
-    if not cache.has_key(WORDS_SET):
-        build_index()
-    extra_words_set = set()
-    for word in keywords.split():
-        index = cache.get(word)
-        if index:
-            index.append(c_id)
-            cache.set(CONCEPT_PREFIX + word, index, EXPIRE)
-        else:
-            extra_words_set.add(word)
-            cache.set(CONCEPT_PREFIX + word, [c_id], EXPIRE)
-
-    # If new words appeared - add them to global set
-    if extra_words_set:
-        global_set = cache.get(WORDS_SET)
-        global_set.update(extra_words_set)
-        cache.set(WORDS_SET, global_set, EXPIRE)
+    concept_index.update(c_id, keywords)
@@ -0,0 +1,160 @@
+"""
+Concept co-occurrence computed from the sparse article x concept incidence matrix
+"""
+from collections import defaultdict
+import heapq
+import threading
+
+import numpy as np
+from scipy import sparse
+from django.db.models import Count, Max
+
+
+# Number of neighbors kept for every concept
+TOP_NEIGHBORS = 50
+
+
+def corpus_version(cluster_id=None):
+    """
+    :returns: (count, max id) of the article collocations, changes on imports and deletions
+    :rtype: tuple
+    """
+    from axel.articles.models import ArticleCollocation
+    queryset = ArticleCollocation.objects.order_by()
+    if cluster_id:
+        queryset = queryset.filter(cluster_id=cluster_id)
+    stats = queryset.aggregate(count=Count('id'), max_id=Max('id'))
+    return stats['count'], stats['max_id'] or 0
+
+
+class ConceptMatrix(object):
+    """
+    Binary incidence matrix of articles and concepts, rows are articles, columns are
+    concepts. Co-occurrence counts are the entries of X.T * X.
+    """
+
+    def __init__(self, article_ids, ngrams, matrix, version=None):
+        """
+        :type article_ids: ndarray
+        :type ngrams: list
+        :type matrix: csr_matrix
+        """
+        self.article_ids = article_ids
+        self.ngrams = ngrams
+        self.ngram_ids = dict((ngram, i) for i, ngram in enumerate(ngrams))
+        self.matrix = matrix
+        self.version = version
+        self._cooccurrence = None
+        self._neighbors = None
+
+    @classmethod
+    def build(cls, cluster_id=None):
+        """
+        :param cluster_id: cluster of the articles, all articles by default
+        :rtype: ConceptMatrix
+        """
+        from axel.articles.models import ArticleCollocation
+        version = corpus_version(cluster_id)
+        queryset = ArticleCollocation.objects.order_by().filter(id__lte=version[1])
+        if cluster_id:
+            queryset = queryset.filter(cluster_id=cluster_id)
+        article_ids = {}
+        ngram_ids = {}
+        rows = []
+        cols = []
+        for article_id, ngram in queryset.values_list('article_id', 'ngram').iterator():
+            rows.append(article_ids.setdefault(article_id, len(article_ids)))
+            cols.append(ngram_ids.setdefault(ngram, len(ngram_ids)))
+        matrix = sparse.coo_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                   shape=(len(article_ids), len(ngram_ids))).tocsr()
+        # unique (ngram, article) pairs, but stay binary regardless
+        matrix.data[:] = 1
+        ngrams = [None] * len(ngram_ids)
+        for ngram, i in ngram_ids.iteritems():
+            ngrams[i] = ngram
+        article_array = np.zeros(len(article_ids), dtype=np.int64)
+        for article_id, i in article_ids.iteritems():
+            article_array[i] = article_id
+        return cls(article_array, ngrams, matrix, version)
+
+    @property
+    def cooccurrence(self):
+        """
+        Concept x concept co-occurrence counts, the diagonal holds document frequencies
+        :rtype: csr_matrix
+        """
+        if self._cooccurrence is None:
+            self._cooccurrence = (self.matrix.T * self.matrix).tocsr()
+        return self._cooccurrence
+
+    def edge_arrays(self):
+        """
+        Co-occurrence graph edges from the upper triangle, without self-loops
+        :rtype: tuple
+        :returns: (source concept ids, target concept ids, weights) arrays
+        """
+        upper = sparse.triu(self.cooccurrence, k=1).tocoo()
+        return upper.row, upper.col, upper.data
+
+    def _row_neighbors(self, i, n):
+        cooc = self.cooccurrence
+        start, end = cooc.indptr[i], cooc.indptr[i + 1]
+        cols = cooc.indices[start:end]
+        counts = cooc.data[start:end]
+        mask = cols != i
+        cols, counts = cols[mask], counts[mask]
+        order = np.lexsort((cols, -counts))[:n]
+        return [(int(cols[j]), int(counts[j])) for j in order]
+
+    def neighbors(self, n=TOP_NEIGHBORS):
+        """
+        Precomputed top co-occurring concepts
+        :rtype: list
+        :returns: list of [(concept id, count), ...] for every concept id
+        """
+        if self._neighbors is None or self._neighbors[0] < n:
+            self._neighbors = (n, [self._row_neighbors(i, n) for i in xrange(len(self.ngrams))])
+        if self._neighbors[0] == n:
+            return self._neighbors[1]
+        return [neighbors[:n] for neighbors in self._neighbors[1]]
+
+    def suggest(self, concepts, limit=10):
+        """
+        Concepts co-occurring with the selected ones most often, summed over the selection
+        :type concepts: list
+        :rtype: list
+        :returns: list of (ngram, co-occurrence count) pairs
+        """
+        selected = set(self.ngram_ids[ngram] for ngram in concepts if ngram in self.ngram_ids)
+        if not selected:
+            return []
+        neighbors = self.neighbors()
+        scores = defaultdict(int)
+        for i in selected:
+            for j, count in neighbors[i]:
+                if j not in selected:
+                    scores[j] += count
+        top = heapq.nlargest(limit, scores.iteritems(), key=lambda x: (x[1], -x[0]))
+        return [(self.ngrams[j], count) for j, count in top]
+
+
+class ConceptMatrixCache(object):
+    """Per cluster matrices of the current process, rebuilt when the corpus changes"""
+
+    def __init__(self):
+        self._matrices = {}
+        self._lock = threading.Lock()
+
+    def get(self, cluster_id=None):
+        """
+        :rtype: ConceptMatrix
+        """
+        with self._lock:
+            matrix = self._matrices.get(cluster_id)
+            if matrix is None or matrix.version != corpus_version(cluster_id):
+                matrix = ConceptMatrix.build(cluster_id)
+                matrix.neighbors()
+                self._matrices[cluster_id] = matrix
+            return matrix
+
+concept_matrices = ConceptMatrixCache()
@@ -1,3 +1,234 @@
+"""
+Database helpers: cached model attributes and write-behind buffering of their values
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+import json
+import threading
+
+from django.db import connections, router, transaction
+from django.db.models.fields import FieldDoesNotExist
+
+
+# Maximum number of rows updated by a single UPDATE statement, lowered further
+# by the backend limit of bound parameters
+BULK_UPDATE_BATCH = 500
+# Buffered instances after which the buffer flushes itself
+WRITE_BEHIND_MAX_PENDING = 5000
+
+
+def resolve_field(model, name):
+    """
+    Get concrete model field that stores the attribute, attributes like
+    `Collocation.extra_fields` are properties backed by an underscored column.
+    :rtype: Field
+    """
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return model._meta.get_field('_' + name)
+
+
+def load_json_column(raw):
+    """
+    Decode a json column value, values_list returns the stored text for json fields
+    as well as for text columns
+    :rtype: dict
+    """
+    return json.loads(raw) if isinstance(raw, basestring) else dict(raw or {})
+
+
+def dump_json_column(model, field_name, value):
+    """
+    Storage form of a json column value for bulk_update: text columns holding json
+    define serialize_<name> on the model and take json text, json fields take dicts
+    """
+    if hasattr(model, 'serialize_' + field_name):
+        return json.dumps(value, separators=(',', ':'))
+    return value
+
+
+def bulk_update(model, field_name, values, key=None):
+    """
+    Update a single column for many rows using batched CASE statements,
+    only the specified column is written.
+    Wrap calls into a transaction to apply several updates at once.
+    :param values: iterable of (key value, new value) pairs
+    :param key: name of the key field, primary key by default
+    :type model: Model
+    """
+    model = model._meta.concrete_model
+    field = resolve_field(model, field_name)
+    key_field = model._meta.get_field(key) if key else model._meta.pk
+    using = router.db_for_write(model)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    values = list(values)
+    if not values:
+        return
+
+    value_sql = 'CAST(%s AS {0})'.format(field.db_type(connection))
+    # every row binds the key twice and the value once
+    batch_size = max(min(BULK_UPDATE_BATCH,
+                         connection.ops.bulk_batch_size([key_field, field, key_field], values)), 1)
+    cursor = connection.cursor()
+    for i in xrange(0, len(values), batch_size):
+        batch = values[i:i + batch_size]
+        params = []
+        for key_value, value in batch:
+            params.append(key_field.get_db_prep_value(key_value, connection))
+            params.append(field.get_db_prep_save(value, connection))
+        params.extend([key_field.get_db_prep_value(key_value, connection)
+                       for key_value, _ in batch])
+        sql = 'UPDATE {table} SET {column} = CASE {key} {cases} END ' \
+              'WHERE {key} IN ({keys})'.format(
+            table=qn(model._meta.db_table), column=qn(field.column),
+            key=qn(key_field.column),
+            cases=' '.join(['WHEN %s THEN ' + value_sql] * len(batch)),
+            keys=', '.join(['%s'] * len(batch)))
+        cursor.execute(sql, params)
+    transaction.commit_unless_managed(using=using)
+
+
+class WriteBehindBuffer(object):
+    """
+    Collects computed cached values per model instance and writes them later with
+    field-limited UPDATEs, batched across instances.
+    Buffering is active only inside the `write_behind` context (request middleware, loops of
+    management commands), otherwise values are written immediately.
+    Keys of dict fields (see `db_cache`) are merged into the stored value on flush, so the
+    keys written by others in the meantime are kept.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def _state(self):
+        if not hasattr(self._local, 'depth'):
+            self._local.depth = 0
+            # (concrete model, pk) -> {attname: value}
+            self._local.pending = {}
+            # (concrete model, field name) -> {pk: {key: value}}
+            self._local.pending_keys = defaultdict(dict)
+        return self._local
+
+    @property
+    def active(self):
+        return self._state.depth > 0
+
+    def add(self, instance, field_name, key=None):
+        """
+        Schedule the value of the instance attribute for writing
+        :param key: key of the dict attribute to write, the whole value by default
+        :type instance: Model
+        """
+        model = instance._meta.concrete_model
+        field = resolve_field(model, field_name)
+        if not self.active or instance.pk is None:
+            # attributes converted lazily define serialize_<name>, see Collocation.extra_fields
+            serialize = getattr(instance, 'serialize_' + field_name, None)
+            if serialize is not None:
+                serialize()
+            instance.save_base(raw=True, update_fields=[field.name])
+            return
+        state = self._state
+        if key is not None:
+            keys = state.pending_keys[(model, field_name)].setdefault(instance.pk, {})
+            keys[key] = getattr(instance, field_name)[key]
+        else:
+            serialize = getattr(instance, 'serialize_' + field_name, None)
+            if serialize is not None:
+                serialize()
+            state.pending.setdefault((model, instance.pk), {})[field.attname] = \
+                getattr(instance, field.attname)
+        if self.pending_count >= WRITE_BEHIND_MAX_PENDING:
+            self.flush()
+
+    @property
+    def pending_count(self):
+        """Number of buffered rows"""
+        state = self._state
+        return len(state.pending) + sum(len(rows) for rows in state.pending_keys.itervalues())
+
+    @staticmethod
+    def _merge_keys(model, field_name, rows):
+        """
+        Apply the pending keys to the currently stored dicts
+        :param rows: dict of the form {pk: {key: value}}
+        :returns: list of (pk, new column value) pairs
+        :rtype: list
+        """
+        field = resolve_field(model, field_name)
+        pks = rows.keys()
+        values = []
+        for i in xrange(0, len(pks), BULK_UPDATE_BATCH):
+            chunk = pks[i:i + BULK_UPDATE_BATCH]
+            for pk, raw in model.objects.filter(pk__in=chunk).values_list('pk', field.attname):
+                stored = load_json_column(raw)
+                stored.update(rows[pk])
+                values.append((pk, dump_json_column(model, field_name, stored)))
+        return values
+
+    def flush(self):
+        """
+        Write all pending values, one batched UPDATE series per model column.
+        Dict keys are merged into the values stored at the time of the flush.
+        """
+        state = self._state
+        pending, state.pending = state.pending, {}
+        pending_keys, state.pending_keys = state.pending_keys, defaultdict(dict)
+        columns = defaultdict(list)
+        for (model, pk), fields in pending.iteritems():
+            for attname, value in fields.iteritems():
+                columns[(model, attname)].append((pk, value))
+        with transaction.commit_on_success():
+            for (model, attname), values in columns.iteritems():
+                bulk_update(model, attname, values)
+            for (model, field_name), rows in pending_keys.iteritems():
+                bulk_update(model, field_name, self._merge_keys(model, field_name, rows))
+
+    def discard(self):
+        """Drop pending values without writing them"""
+        self._state.pending = {}
+        self._state.pending_keys = defaultdict(dict)
+
+    def begin(self):
+        """Start buffering, contexts can be nested"""
+        self._state.depth += 1
+
+    def end(self):
+        """Stop buffering, pending values are written when the outermost context ends"""
+        state = self._state
+        state.depth -= 1
+        if not state.depth:
+            self.flush()
+
+    @contextmanager
+    def __call__(self):
+        """Buffer writes until the outermost context exits"""
+        self.begin()
+        try:
+            yield self
+        finally:
+            self.end()
+
+write_behind = WriteBehindBuffer()
+
+
+class WriteBehindMiddleware(object):
+    """Buffers cached value writes during the request and flushes them before the response"""
+
+    def process_request(self, request):
+        write_behind.begin()
+        request._write_behind = True
+
+    def process_response(self, request, response):
+        if getattr(request, '_write_behind', False):
+            request._write_behind = False
+            write_behind.end()
+        return response
+
 
 # TODO: make a blog post out of a technique
 class db_cache(object):
@@ -21,7 +252,7 @@ class db_cache(object):
                 value = f(object)
                 fields[f.__name__] = value
                 setattr(object, self.model_field, fields)
-                object.save_base(raw=True)
+                write_behind.add(object, self.model_field, key=f.__name__)
                 return value
         return wrapper
 
@@ -35,6 +266,6 @@ def db_cache_simple(func):
         else:
             value = func(self)
             setattr(self, '_' + func.__name__, value)
-            self.save_base(raw=True)
+            write_behind.add(self, '_' + func.__name__)
             return value
     return wrapper
@@ -0,0 +1,127 @@
+"""
+Per-article concept graphs (DBPedia categories, wikilinks) stored in a single SQLite
+database under CACHE_ROOT, with an LRU of loaded graphs in every process.
+"""
+from collections import OrderedDict
+import cPickle as pickle
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+import networkx as nx
+
+from axel.libs.sqlite_store import SQLiteStore
+
+
+STORE_NAME = 'article_graphs.sqlite'
+
+
+def graph_version(ngrams):
+    """
+    Version key of a graph built from the n-grams, changes with the input set
+    :type ngrams: iterable
+    :rtype: str
+    """
+    return hashlib.sha1(u'\n'.join(sorted(set(ngrams))).encode('utf-8')).hexdigest()
+
+
+class ArticleGraphStore(SQLiteStore):
+    """
+    Graphs keyed by article and graph kind, a stored graph is valid while its version
+    matches. Graphs are kept as pickled edge lists, every write is a single transaction.
+    Returned graphs are shared between callers and must not be modified.
+    """
+    SCHEMA = ('CREATE TABLE IF NOT EXISTS graphs (article_id INTEGER, kind TEXT, version TEXT, '
+              'edges BLOB, created REAL, PRIMARY KEY (article_id, kind))',)
+
+    def __init__(self, path=None, cache_size=None):
+        super(ArticleGraphStore, self).__init__(path or os.path.join(settings.CACHE_ROOT,
+                                                                     STORE_NAME))
+        self.cache_size = cache_size or getattr(settings, 'GRAPH_CACHE_SIZE', 128)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_get(self, key):
+        with self._lock:
+            graph = self._cache.pop(key, None)
+            if graph is not None:
+                self._cache[key] = graph
+            return graph
+
+    def _cache_set(self, key, graph):
+        with self._lock:
+            self._cache.pop(key, None)
+            self._cache[key] = graph
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def get(self, article_id, kind, version):
+        """
+        :returns: stored graph or None if missing or outdated
+        :rtype: nx.Graph
+        """
+        key = (article_id, kind, version)
+        graph = self._cache_get(key)
+        if graph is not None:
+            return graph
+        row = self._connection().execute('SELECT edges FROM graphs WHERE article_id = ? '
+                                         'AND kind = ? AND version = ?',
+                                         (article_id, kind, version)).fetchone()
+        if row is None:
+            return None
+        graph = nx.Graph()
+        graph.add_edges_from(pickle.loads(str(row[0])))
+        self._cache_set(key, graph)
+        return graph
+
+    def set(self, article_id, kind, version, graph):
+        """
+        :type graph: nx.Graph
+        """
+        edges = pickle.dumps(list(graph.edges_iter(data=True)), pickle.HIGHEST_PROTOCOL)
+        connection = self._connection()
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO graphs VALUES (?, ?, ?, ?, ?)',
+                               (article_id, kind, version, sqlite3.Binary(edges), time.time()))
+        self._cache_set((article_id, kind, version), graph)
+
+    def get_or_build(self, article_id, kind, version, build):
+        """
+        :param build: callable returning the graph when it is not stored
+        :rtype: nx.Graph
+        """
+        graph = self.get(article_id, kind, version)
+        if graph is None:
+            graph = build()
+            self.set(article_id, kind, version, graph)
+        return graph
+
+    def invalidate(self, article_id=None, kind=None):
+        """
+        Drop stored graphs of the article and/or kind, all graphs by default.
+        LRUs of other processes are only refreshed on version changes.
+        """
+        conditions = []
+        params = []
+        if article_id is not None:
+            conditions.append('article_id = ?')
+            params.append(article_id)
+        if kind is not None:
+            conditions.append('kind = ?')
+            params.append(kind)
+        query = 'DELETE FROM graphs'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        connection = self._connection()
+        with connection:
+            connection.execute(query, params)
+        with self._lock:
+            for key in self._cache.keys():
+                if (article_id is None or key[0] == article_id) and (kind is None or key[1] == kind):
+                    del self._cache[key]
+
+
+graph_store = ArticleGraphStore()
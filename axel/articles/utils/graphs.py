@@ -1,22 +1,105 @@
 """Various graph utilities"""
+import glob
+from itertools import izip
+import os
+import tempfile
+
 import networkx as nx
-from axel.articles.models import Article
+import numpy as np
+from django.conf import settings
+
+from axel.articles.utils.cooccurrence import ConceptMatrix, corpus_version
+
+
+class CollocationGraph(object):
+    """
+    Collocation co-occurrence graph stored as compact edge arrays,
+    edge weight is the number of articles where both collocations appear
+    """
+
+    def __init__(self, ngrams, sources, targets, weights):
+        """
+        :param ngrams: array of node names, edges refer to its indexes
+        :type sources: ndarray
+        :type targets: ndarray
+        :type weights: ndarray
+        """
+        self.ngrams = ngrams
+        self.sources = sources
+        self.targets = targets
+        self.weights = weights
+
+    @staticmethod
+    def _cache_path(cluster_id, version):
+        name = 'collocations_graph_{0}_{1}_{2}.npz'.format(cluster_id or 'all', *version)
+        return os.path.join(settings.CACHE_ROOT, name)
+
+    @classmethod
+    def build(cls, cluster_id=None):
+        """
+        :rtype: CollocationGraph
+        """
+        matrix = ConceptMatrix.build(cluster_id)
+        sources, targets, weights = matrix.edge_arrays()
+        return cls(np.array(matrix.ngrams, dtype=unicode), sources, targets, weights)
+
+    @classmethod
+    def load(cls, cluster_id=None):
+        """
+        Load the graph of the current corpus version from disk, build and store it if missing
+        :param cluster_id: cluster of the articles, all articles by default
+        :rtype: CollocationGraph
+        """
+        path = cls._cache_path(cluster_id, corpus_version(cluster_id))
+        try:
+            data = np.load(path)
+            try:
+                # arrays are read out of the archive on access, the file can be closed
+                return cls(data['ngrams'], data['sources'], data['targets'], data['weights'])
+            finally:
+                data.close()
+        except IOError:
+            # missing, or removed by a newer version meanwhile
+            pass
+        graph = cls.build(cluster_id)
+        graph.save(path)
+        return graph
+
+    def save(self, path):
+        """Store arrays atomically, graphs of older corpus versions are removed"""
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as graph_file:
+            np.savez(graph_file, ngrams=self.ngrams, sources=self.sources,
+                     targets=self.targets, weights=self.weights)
+        os.rename(tmp_path, path)
+        for old_path in glob.glob(path.rsplit('_', 2)[0] + '_*.npz'):
+            if old_path != path:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    # already removed by another process
+                    pass
+
+    def __len__(self):
+        """Number of edges"""
+        return len(self.weights)
+
+    def to_networkx(self):
+        """
+        :rtype: nx.Graph
+        """
+        graph = nx.Graph()
+        ngrams = self.ngrams.tolist()
+        graph.add_weighted_edges_from((ngrams[source], ngrams[target], weight)
+                                      for source, target, weight in
+                                      izip(self.sources.tolist(), self.targets.tolist(),
+                                           self.weights.tolist()))
+        return graph
 
 
-def get_nx_collocations_graph():
+def get_nx_collocations_graph(cluster_id=None):
     """Build collocations graph using networkx"""
-    colloc_graph = nx.Graph()
-    for article in Article.objects.all():
-        collocs = list(article.articlecollocation_set.all())
-        for i, c1 in enumerate(collocs):
-            for j in range(i+1,len(collocs)):
-                c2 = collocs[j]
-                if colloc_graph.has_edge(c1.ngram, c2.ngram):
-                    edge = colloc_graph[c1.ngram][c2.ngram]
-                    if edge.has_key('weight'):
-                        edge['weight'] += 1
-                    else:
-                        edge['weight'] = 2
-                else:
-                    colloc_graph.add_edge(c1.ngram, c2.ngram)
-    return colloc_graph
+    return CollocationGraph.load(cluster_id).to_networkx()
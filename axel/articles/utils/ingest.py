@@ -0,0 +1,132 @@
+"""
+Parallel PDF ingestion: PDFX extraction, cleaning, stemming and n-gram indexing run in
+worker processes, the parent copies PDFs to the storage and inserts articles in bulk
+"""
+from multiprocessing import Pool
+import json
+import os
+import subprocess
+import time
+import traceback
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, transaction
+
+from axel.libs.utils import StageTimer
+
+
+# Worker stages in processing order
+STAGES = ('pdfx', 'parse', 'clean', 'stem', 'index')
+# Number of articles inserted at once
+INSERT_BATCH = 50
+
+
+def extract_article(path):
+    """
+    Extract and index the PDF, runs in pool workers
+    :returns: (path, article fields or None on error, {stage: seconds}, error message)
+    :rtype: tuple
+    """
+    from axel.libs import nlp
+    from axel.libs.parse_pdfx_xml import parse_pdfx_xml
+    timings = {}
+    last = [time.time()]
+
+    def lap(stage):
+        now = time.time()
+        timings[stage] = now - last[0]
+        last[0] = now
+
+    try:
+        xml_path = path + 'x.xml'
+        if not os.path.exists(xml_path):
+            subprocess.check_call([settings.PDFX_PATH, path])
+        lap('pdfx')
+        text = parse_pdfx_xml(xml_path)
+        if text is None:
+            raise ValueError('PDFX output is missing')
+        lap('parse')
+        extracted = nlp.get_full_text(text)
+        lap('clean')
+        stemmed_text = nlp.Stemmer.stem_wordnet(extracted['text'])
+        lowered_text = nlp.Stemmer.stem_lower(extracted['text'])
+        lap('stem')
+        fields = {
+            'title': extracted['title'][:255],
+            'abstract': extracted['abstract'],
+            'text': extracted['text'],
+            'stemmed_text': stemmed_text,
+            'index': json.dumps(nlp.build_ngram_index(stemmed_text)),
+            'index_nonstemmed': dict(nlp.build_ngram_index(lowered_text)),
+        }
+        lap('index')
+        return path, fields, timings, ''
+    except Exception:
+        return path, None, timings, traceback.format_exc()
+
+
+def _insert(articles):
+    """Insert the batch, PDFs copied to the storage for it are removed if the insert fails"""
+    from axel.articles.models import Article
+    try:
+        with transaction.commit_on_success():
+            Article.objects.bulk_create(articles)
+    except Exception:
+        for article in articles:
+            article.pdf.delete(save=False)
+        raise
+
+
+def ingest_pdfs(paths, venue, year, cluster_id, workers=4):
+    """
+    Create articles of the cluster from the PDF files, articles are inserted with
+    bulk_create, so Article post_save handlers do not run for them
+    :type venue: Venue
+    :param workers: number of extraction processes
+    :returns: number of imported articles
+    :rtype: int
+    """
+    from axel.articles.models import Article
+    timer = StageTimer()
+    start = time.time()
+    imported = 0
+    articles = []
+    # forked workers must not share the database connection
+    connection.close()
+    pool = Pool(workers)
+    try:
+        for i, (path, fields, timings, error) in \
+                enumerate(pool.imap_unordered(extract_article, paths)):
+            for stage in STAGES:
+                if stage in timings:
+                    timer.add(stage, timings[stage])
+            if error:
+                print u'{0}/{1} extraction failed for {2}:\n{3}'.format(i + 1, len(paths), path,
+                                                                       error)
+                continue
+            insert_start = time.time()
+            article = Article(venue=venue, year=year, cluster_id=cluster_id, **fields)
+            with open(path, 'rb') as pdf:
+                article.pdf.save(os.path.basename(path), File(pdf), save=False)
+            articles.append(article)
+            if len(articles) == INSERT_BATCH:
+                _insert(articles)
+                imported += len(articles)
+                articles = []
+            timer.add('insert', time.time() - insert_start)
+            print '{0}/{1} extracted'.format(i + 1, len(paths))
+    finally:
+        pool.close()
+        pool.join()
+    insert_start = time.time()
+    _insert(articles)
+    imported += len(articles)
+    timer.add('insert', time.time() - insert_start, 0)
+
+    print 'Stage times, worker stages are summed over {0} workers:'.format(workers)
+    timer.report()
+    elapsed = time.time() - start
+    print 'Total: {0} of {1} PDFs in {2:.1f}s, {3:.2f} PDFs/s'.format(
+        imported, len(paths), elapsed, imported / elapsed if elapsed else 0)
+    return imported
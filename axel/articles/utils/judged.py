@@ -0,0 +1,158 @@
+"""Judged relevance data of the article collocations"""
+from collections import defaultdict
+import codecs
+import threading
+
+from django.conf import settings
+
+
+class JudgedData(object):
+    """
+    Relevance judgements of the collection, stored as `ngram,article,is_relevant` CSV lines,
+    where article is the string representation of the article.
+    The file is read on first access only, once per process, judgements are indexed
+    by article and by n-gram.
+    """
+
+    def __init__(self, filename, cluster_id):
+        """
+        :param filename: CSV file name relative to the project root
+        :param cluster_id: cluster of the judged articles
+        """
+        self.filename = filename
+        self.cluster_id = cluster_id
+        self._lock = threading.Lock()
+        self._data = None
+        self._by_article = None
+        self._by_ngram = None
+        self._relevance_sets = {}
+        self._article_keys = None
+
+    def _load(self):
+        """Read and index CSV file if not loaded yet"""
+        if self._data is not None:
+            return
+        with self._lock:
+            if self._data is not None:
+                return
+            data = {}
+            by_article = defaultdict(dict)
+            by_ngram = defaultdict(dict)
+            with codecs.open(settings.ABS_PATH(self.filename), 'r', 'utf-8') as judged_file:
+                for line in judged_file:
+                    line = line.rstrip('\r\n')
+                    if not line:
+                        continue
+                    key, is_rel = line.rsplit(',', 1)
+                    ngram, article = key.split(',', 1)
+                    is_rel = int(is_rel)
+                    data[(ngram, article)] = is_rel
+                    by_article[article][ngram] = is_rel
+                    by_ngram[ngram][article] = is_rel
+            self._by_article = dict(by_article)
+            self._by_ngram = dict(by_ngram)
+            self._data = data
+
+    def __len__(self):
+        self._load()
+        return len(self._data)
+
+    def __iter__(self):
+        """Iterate over (ngram, article key) pairs"""
+        self._load()
+        return iter(self._data)
+
+    def items(self):
+        """
+        :returns: list of ((ngram, article key), is_relevant) pairs
+        :rtype: list
+        """
+        self._load()
+        return self._data.items()
+
+    def count(self, is_rel):
+        """Number of judgements with the specified relevance value"""
+        self._load()
+        return sum(1 for value in self._data.itervalues() if value == is_rel)
+
+    def articles(self):
+        """
+        :returns: keys of all judged articles
+        :rtype: list
+        """
+        self._load()
+        return self._by_article.keys()
+
+    def article_key(self, article):
+        """
+        Get the key articles are judged under
+        :param article: Article object, article id or article key itself
+        :rtype: unicode
+        """
+        if isinstance(article, basestring):
+            return article
+        if isinstance(article, (int, long)):
+            from axel.articles.models import Article
+            article_keys = self._article_keys
+            if article_keys is None:
+                articles = Article.objects.listing().filter(cluster_id=self.cluster_id)
+                article_keys = dict((obj.id, unicode(obj)) for obj in articles)
+                self._article_keys = article_keys
+            if article not in article_keys:
+                # imported after the keys were loaded, bulk inserts send no signals
+                try:
+                    article_keys[article] = unicode(Article.objects.listing().get(id=article))
+                except Article.DoesNotExist:
+                    return None
+            return article_keys[article]
+        return unicode(article)
+
+    def clear_article_keys(self):
+        """Forget the article keys, called when articles change"""
+        self._article_keys = None
+
+    def for_article(self, article):
+        """
+        :param article: Article object, article id or article key
+        :returns: dict of judged ngrams of the article with their relevance
+        :rtype: dict
+        """
+        self._load()
+        return self._by_article.get(self.article_key(article), {})
+
+    def for_ngram(self, ngram):
+        """
+        :returns: dict of article keys where ngram was judged with its relevance
+        :rtype: dict
+        """
+        self._load()
+        return self._by_ngram.get(ngram, {})
+
+    def _relevance_set(self, article, is_rel):
+        key = (self.article_key(article), is_rel)
+        if key not in self._relevance_sets:
+            self._relevance_sets[key] = frozenset(ngram for ngram, value in
+                                                  self.for_article(key[0]).iteritems()
+                                                  if value == is_rel)
+        return self._relevance_sets[key]
+
+    def relevant(self, article):
+        """
+        :returns: set of ngrams judged as relevant for the article
+        :rtype: frozenset
+        """
+        return self._relevance_set(article, 1)
+
+    def irrelevant(self, article):
+        """
+        :returns: set of ngrams judged as irrelevant for the article
+        :rtype: frozenset
+        """
+        return self._relevance_set(article, 0)
+
+    def is_relevant(self, ngram, article):
+        """
+        :returns: relevance of the ngram inside the article, -1 if not judged
+        :rtype: int
+        """
+        return self.for_article(article).get(ngram, -1)
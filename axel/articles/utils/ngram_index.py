@@ -0,0 +1,181 @@
+"""
+In-process substring index over collocation n-grams, used for concept autocomplete
+and collocation filtering instead of `ngram__icontains` table scans.
+"""
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+import heapq
+from itertools import islice
+import threading
+import time
+
+from django.db.models import Count, Max
+from django.db.models.signals import post_save, post_delete
+
+
+# Seconds between checks whether the table changed in other processes
+VERSION_CHECK_INTERVAL = 60
+
+
+def _trigrams(text):
+    """
+    :rtype: set
+    """
+    return set(text[i:i + 3] for i in xrange(len(text) - 2))
+
+
+class NgramIndex(object):
+    """
+    N-grams of a model ordered by count, with a sorted prefix array and character
+    trigram postings. N-gram ids are their ranks by count, so postings sorted by id are
+    also sorted by count and the first verified matches are the top ones.
+    """
+
+    def __init__(self, model):
+        """
+        :type model: Model
+        """
+        self.model = model
+        self._lock = threading.RLock()
+        self._ngrams = []
+        # lowercased n-grams, matching is case insensitive
+        self._keys = []
+        self._counts = []
+        # (key, id) pairs sorted by key
+        self._prefix = []
+        # trigram -> array of ngram ids
+        self._postings = {}
+        self._version = None
+        self._checked = 0
+        self._stale = True
+
+    def _table_version(self):
+        stats = self.model.objects.order_by().aggregate(count=Count('id'), max_id=Max('id'))
+        return stats['count'], stats['max_id']
+
+    def build(self):
+        """Load n-grams with their counts and build the index"""
+        with self._lock:
+            version = self._table_version()
+            counts = defaultdict(int)
+            # article collocations have many rows per ngram
+            for ngram, count in self.model.objects.order_by().values_list('ngram', 'count')\
+                    .iterator():
+                counts[ngram] += count
+            ranked = sorted(counts.iteritems(), key=lambda x: (-x[1], x[0]))
+            self._ngrams = [ngram for ngram, _ in ranked]
+            self._keys = [ngram.lower() for ngram in self._ngrams]
+            self._counts = [count for _, count in ranked]
+            self._prefix = sorted((key, i) for i, key in enumerate(self._keys))
+            postings = defaultdict(lambda: array('l'))
+            for i, key in enumerate(self._keys):
+                for trigram in _trigrams(key):
+                    postings[trigram].append(i)
+            self._postings = dict(postings)
+            self._version = version
+            self._checked = time.time()
+            self._stale = False
+
+    def invalidate(self):
+        """Rebuild on the next search"""
+        self._stale = True
+
+    def added(self, ngram):
+        """Rebuild on the next search if the created row introduces a new n-gram"""
+        if not self._stale and ngram not in self:
+            self.invalidate()
+
+    def __contains__(self, ngram):
+        with self._lock:
+            key = ngram.lower()
+            for pos in xrange(bisect_left(self._prefix, (key,)), len(self._prefix)):
+                prefix_key, i = self._prefix[pos]
+                if prefix_key != key:
+                    return False
+                if self._ngrams[i] == ngram:
+                    return True
+            return False
+
+    def refresh(self):
+        """Rebuild if marked stale or if the table changed in another process"""
+        if not self._stale and time.time() - self._checked < VERSION_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if not self._stale:
+                self._checked = time.time()
+                if self._table_version() == self._version:
+                    return
+            self.build()
+
+    def _prefix_ids(self, query):
+        """Ids of n-grams starting with query, unordered"""
+        for pos in xrange(bisect_left(self._prefix, (query,)), len(self._prefix)):
+            key, i = self._prefix[pos]
+            if not key.startswith(query):
+                break
+            yield i
+
+    def _substring_ids(self, query):
+        """Ids of n-grams containing the query, ordered by count"""
+        postings = []
+        for trigram in _trigrams(query):
+            posting = self._postings.get(trigram)
+            if posting is None:
+                return
+            postings.append(posting)
+        # verify candidates of the shortest posting list, others are implied by the check
+        for i in min(postings, key=len):
+            if query in self._keys[i]:
+                yield i
+
+    def search(self, query, limit=None):
+        """
+        :param limit: number of top results by count, all by default
+        :rtype: list
+        :returns: list of (ngram, count) pairs, ordered by count
+        """
+        self.refresh()
+        query = query.lower().strip()
+        with self._lock:
+            if len(query) < 3:
+                # too short for trigrams, only prefixes are matched
+                ids = self._prefix_ids(query)
+                ids = heapq.nsmallest(limit, ids) if limit else sorted(ids)
+            else:
+                ids = self._substring_ids(query)
+                ids = list(islice(ids, limit))
+            return [(self._ngrams[i], self._counts[i]) for i in ids]
+
+
+class NgramIndexRegistry(object):
+    """
+    Per model n-gram indexes, invalidated when the n-gram set changes. Count updates
+    alone do not rebuild the index, so ranking by count may lag behind.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, model):
+        """
+        :type model: Model
+        :rtype: NgramIndex
+        """
+        if model not in self._indexes:
+            with self._lock:
+                if model not in self._indexes:
+                    self._indexes[model] = NgramIndex(model)
+                    post_save.connect(self._saved, sender=model, weak=False)
+                    post_delete.connect(self._invalidate, sender=model, weak=False)
+        return self._indexes[model]
+
+    def _saved(self, sender, instance, created, **kwargs):
+        if created:
+            self._indexes[sender].added(instance.ngram)
+
+    def _invalidate(self, sender, **kwargs):
+        self._indexes[sender].invalidate()
+
+ngram_indexes = NgramIndexRegistry()
@@ -0,0 +1,330 @@
+"""
+In-memory inverted index of article concepts, used to rank articles by TF-IDF.
+Index is built on first use, once per process. Saved article collocations are applied
+incrementally, every write also increments a file-locked version counter under CACHE_ROOT
+so that indexes of other processes rebuild on their next query.
+"""
+from __future__ import division
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+import fcntl
+import heapq
+from itertools import izip
+import math
+import os
+import threading
+
+from django.conf import settings
+
+from axel.articles.utils.boolean_query import parse_query, intersect_all, union_all, \
+    difference
+from axel.libs import nlp
+
+
+class RankedArticles(object):
+    """
+    Lazy ranked search result, supports `len` and slicing, so it can be passed to Paginator.
+    Only the requested top part of the ranking is sorted, through a heap.
+    """
+
+    def __init__(self, scores):
+        """
+        :param scores: dict of the form {article id: score}
+        """
+        self._scores = scores
+        self._ranked = []
+
+    def __len__(self):
+        return len(self._scores)
+
+    def _top(self, k):
+        """
+        :returns: top k (article id, score) pairs, sorted by score
+        :rtype: list
+        """
+        if k > len(self._ranked) and len(self._ranked) < len(self._scores):
+            # ties are broken by article id to make pages stable
+            self._ranked = heapq.nlargest(k, self._scores.iteritems(),
+                                          key=lambda x: (x[1], -x[0]))
+        return self._ranked[:k]
+
+    def scores(self, k=None):
+        """
+        :param k: number of results, all by default
+        :rtype: list
+        :returns: list of (article id, score) pairs
+        """
+        return self._top(len(self) if k is None else k)
+
+    def __getitem__(self, key):
+        """
+        Articles of the ranking slice with their `score` attribute set
+        :rtype: list
+        """
+        from axel.articles.models import Article
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop, step = key.indices(len(self))
+        ranked = self._top(stop)[start:stop:step]
+        articles = Article.objects.listing().in_bulk([article_id for article_id, _ in ranked])
+        result = []
+        for article_id, score in ranked:
+            article = articles[article_id]
+            article.score = score
+            result.append(article)
+        return result
+
+
+VERSION_NAME = 'search_index.version'
+
+
+class ConceptSearchIndex(object):
+    """
+    Concept -> postings index, postings are sorted article ids with parallel term weights.
+    Article norms are kept as sums of squared term weights, idf is derived from the posting
+    length at query time, so that incremental updates never touch other postings.
+    """
+
+    def __init__(self, version_path=None):
+        self._lock = threading.RLock()
+        # concept -> (article ids, term weights)
+        self._postings = {}
+        # article id -> sum of squared term weights
+        self._sq_norms = defaultdict(float)
+        self.version_path = version_path or os.path.join(settings.CACHE_ROOT, VERSION_NAME)
+        # version counter of the indexed data, None until built
+        self._version = None
+        self._stale = True
+        # sorted ids of all articles, and per venue and year
+        self._article_ids = array('l')
+        self._venues = {}
+        self._years = {}
+
+    @staticmethod
+    def _queryset():
+        """:rtype: QuerySet"""
+        from axel.articles.models import ArticleCollocation
+        return ArticleCollocation.objects.order_by()
+
+    @staticmethod
+    def term_weight(count):
+        """Sublinear term frequency"""
+        return 1 + math.log(count) if count > 0 else 0.
+
+    @staticmethod
+    def _read_counter(version_file):
+        try:
+            return int(version_file.read() or 0)
+        except ValueError:
+            return 0
+
+    def _stored_version(self):
+        try:
+            with open(self.version_path) as version_file:
+                fcntl.flock(version_file, fcntl.LOCK_SH)
+                return self._read_counter(version_file)
+        except IOError:
+            return 0
+
+    def touch(self):
+        """
+        Mark the indexes of all processes outdated, the counter is incremented
+        under an exclusive file lock
+        :rtype: tuple
+        :returns: counter values before and after the increment
+        """
+        directory = os.path.dirname(self.version_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        fd = os.open(self.version_path, os.O_RDWR | os.O_CREAT, 0644)
+        with os.fdopen(fd, 'r+') as version_file:
+            fcntl.flock(version_file, fcntl.LOCK_EX)
+            previous = self._read_counter(version_file)
+            version_file.seek(0)
+            version_file.truncate()
+            version_file.write(str(previous + 1))
+        return previous, previous + 1
+
+    def _load_articles(self):
+        """Load venue and year postings of all articles"""
+        from axel.articles.models import Article
+        venues = defaultdict(lambda: array('l'))
+        years = defaultdict(lambda: array('l'))
+        article_ids = array('l')
+        for article_id, venue, year in Article.objects.order_by('id')\
+                .values_list('id', 'venue__acronym', 'year').iterator():
+            article_ids.append(article_id)
+            venues[venue.lower()].append(article_id)
+            years[year].append(article_id)
+        self._article_ids = article_ids
+        self._venues = dict(venues)
+        self._years = dict(years)
+
+    def _add_postings(self, rows):
+        """
+        Add (id, ngram, article id, count) rows to the index
+        :rtype: int
+        :returns: number of added rows
+        """
+        added = 0
+        for _, ngram, article_id, count in rows:
+            weight = self.term_weight(count)
+            ids, weights = self._postings.setdefault(ngram, (array('l'), array('d')))
+            pos = bisect_left(ids, article_id)
+            if pos < len(ids) and ids[pos] == article_id:
+                self._sq_norms[article_id] -= weights[pos] ** 2
+                weights[pos] = weight
+            else:
+                ids.insert(pos, article_id)
+                weights.insert(pos, weight)
+            self._sq_norms[article_id] += weight ** 2
+            added += 1
+        return added
+
+    def build(self):
+        """Build the index from scratch"""
+        with self._lock:
+            # writes during the build change the version and cause another one
+            version = self._stored_version()
+            self._postings = {}
+            self._sq_norms = defaultdict(float)
+            rows = self._queryset().values_list('id', 'ngram', 'article_id', 'count').iterator()
+            self._add_postings(rows)
+            self._load_articles()
+            self._version = version
+            self._stale = False
+
+    def refresh(self):
+        """Rebuild if collocations were deleted or changed by another process"""
+        with self._lock:
+            if self._stale or self._stored_version() != self._version:
+                self.build()
+
+    def collocation_saved(self, collocation):
+        """
+        Apply the saved collocation to the built index, see the post_save handler
+        :type collocation: ArticleCollocation
+        """
+        with self._lock:
+            previous, current = self.touch()
+            if self._stale or self._version is None:
+                return
+            if previous != self._version:
+                # other processes wrote meanwhile
+                self._stale = True
+                return
+            new_article = collocation.article_id not in self._sq_norms
+            self._add_postings([(collocation.id, collocation.ngram, collocation.article_id,
+                                 collocation.count)])
+            if new_article:
+                self._load_articles()
+            self._version = current
+
+    def collocation_deleted(self, collocation):
+        """Deletions are not applied incrementally, the index is rebuilt on the next query"""
+        self.touch()
+        self._stale = True
+
+    def __len__(self):
+        """Number of indexed articles"""
+        return len(self._sq_norms)
+
+    def idf(self, concept):
+        postings = self._postings.get(concept)
+        if not postings:
+            return 0.
+        return math.log(len(self) / len(postings[0]))
+
+    def search(self, concepts):
+        """
+        Rank articles containing any of the concepts by cosine TF-IDF score
+        :type concepts: list
+        :rtype: RankedArticles
+        """
+        self.refresh()
+        with self._lock:
+            scores = defaultdict(float)
+            for concept in set(concepts):
+                postings = self._postings.get(concept)
+                if not postings:
+                    continue
+                # plus one keeps concepts present in every article in the ranking
+                idf = 1 + self.idf(concept)
+                for article_id, weight in izip(*postings):
+                    scores[article_id] += weight * idf
+            for article_id, score in scores.iteritems():
+                norm = self._sq_norms.get(article_id, 0)
+                scores[article_id] = score / math.sqrt(norm) if norm > 0 else 0.
+        return RankedArticles(dict(scores))
+
+    def _evaluate(self, node):
+        """
+        :type node: tuple
+        :returns: sorted ids of the matching articles
+        :rtype: list
+        """
+        kind = node[0]
+        if kind == 'concept':
+            return self._postings.get(node[1], (array('l'),))[0]
+        if kind == 'venue':
+            return self._venues.get(node[1].lower(), array('l'))
+        if kind == 'year':
+            return union_all(posting for year, posting in self._years.iteritems()
+                             if node[1] <= year <= node[2])
+        if kind == 'not':
+            return difference(self._article_ids, self._evaluate(node[1]))
+        if kind == 'or':
+            return union_all(self._evaluate(child) for child in node[1])
+        # AND, negated children are subtracted from the intersection of the others
+        positive = [self._evaluate(child) for child in node[1] if child[0] != 'not']
+        negative = [self._evaluate(child[1]) for child in node[1] if child[0] == 'not']
+        result = intersect_all(positive) if positive else self._article_ids
+        for posting in sorted(negative, key=len, reverse=True):
+            if not result:
+                break
+            result = difference(result, posting)
+        return result
+
+    @staticmethod
+    def _positive_concepts(node, negated=False):
+        """Concepts of the query not under NOT, used for ranking"""
+        if node[0] == 'concept':
+            return [] if negated else [node[1]]
+        if node[0] == 'not':
+            return ConceptSearchIndex._positive_concepts(node[1], not negated)
+        if node[0] in ('and', 'or'):
+            return [concept for child in node[1]
+                    for concept in ConceptSearchIndex._positive_concepts(child, negated)]
+        return []
+
+    def boolean_search(self, query):
+        """
+        Articles matching the boolean query, ranked by TF-IDF of its positive concepts,
+        see boolean_query for the syntax
+        :type query: unicode
+        :rtype: RankedArticles
+        :raises QueryParseError: on malformed queries
+        """
+        # stored n-grams are lemmatized, "networks" has to match "network"
+        tree = parse_query(query, nlp.Stemmer.stem_wordnet)
+        self.refresh()
+        with self._lock:
+            matched = self._evaluate(tree)
+            scores = dict.fromkeys(matched, 0.)
+            for concept in set(self._positive_concepts(tree)):
+                postings = self._postings.get(concept)
+                if not postings:
+                    continue
+                idf = 1 + self.idf(concept)
+                for article_id, weight in izip(*postings):
+                    if article_id in scores:
+                        scores[article_id] += weight * idf
+            for article_id, score in scores.iteritems():
+                norm = self._sq_norms.get(article_id, 0)
+                if score and norm > 0:
+                    scores[article_id] = score / math.sqrt(norm)
+        return RankedArticles(scores)
+
+
+search_index = ConceptSearchIndex()
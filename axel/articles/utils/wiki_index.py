@@ -0,0 +1,96 @@
+"""
+Staged population of the article Wikipedia text indexes:
+graph -> component -> text fetch -> index, every stage runs over all articles at once.
+"""
+from multiprocessing import Pool
+import time
+
+from django.db import connection, transaction
+import networkx as nx
+
+from axel.articles.utils.category_graph import category_graph
+from axel.articles.utils.db import bulk_update
+from axel.libs.utils import StageTimer
+from axel.stats.wiki_text import wiki_texts, merge_indexes
+
+
+# Number of article indexes written at once
+WRITE_BATCH = 100
+# Number of n-grams looked up by a single query
+NGRAM_BATCH = 500
+
+
+def populate_wiki_index(cluster_id, workers=4):
+    """
+    Build wiki_text_index of the cluster articles from the cached per-concept indexes
+    :param workers: number of processes fetching and lemmatizing the concept pages, each
+    of them has one Wikipedia request in flight
+    """
+    from axel.articles.models import Article, CLUSTERS_DICT
+    Model = CLUSTERS_DICT[cluster_id]
+    StatsModel = Model.COLLECTION_MODEL
+    timer = StageTimer()
+    articles = list(Article.objects.filter(cluster_id=cluster_id).only('id', 'cluster_id'))
+    total_start = time.time()
+
+    # fork the workers while the parent is small and has no open connections,
+    # forked workers must not share the database connection
+    connection.close()
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        with timer.stage('graph') as counter:
+            # expand categories of all articles with batched requests, graphs are
+            # then assembled from the category store
+            roots = StatsModel.source_ngrams(
+                Model.objects.filter(cluster_id=StatsModel.CLUSTER_ID).values('ngram'),
+                ('dbpedia', 'wiki_redirect'))
+            category_graph.expand(roots, 2)
+            graphs = {}
+            for article in articles:
+                graphs[article.id] = article.dbpedia_graph(redirects=True)
+                counter['items'] += 1
+
+        with timer.stage('component') as counter:
+            article_nodes = {}
+            for article_id, graph in graphs.iteritems():
+                # by default components are ordered descending by size
+                components = nx.connected_components(graph)
+                article_nodes[article_id] = [node for node in components[0]
+                                             if 'Category' not in node] if components else []
+            all_nodes = set()
+            for nodes in article_nodes.itervalues():
+                all_nodes.update(nodes)
+            all_nodes = list(all_nodes)
+            dbpedia_ngrams = set()
+            for i in xrange(0, len(all_nodes), NGRAM_BATCH):
+                dbpedia_ngrams.update(StatsModel.source_ngrams(all_nodes[i:i + NGRAM_BATCH],
+                                                               ('dbpedia',)))
+            article_concepts = {}
+            for article_id, nodes in article_nodes.iteritems():
+                article_concepts[article_id] = [node for node in nodes if node in dbpedia_ngrams]
+                counter['items'] += 1
+
+        with timer.stage('text fetch') as counter:
+            counter['items'] = wiki_texts.fill(dbpedia_ngrams, pool)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    with timer.stage('index') as counter:
+        values = []
+        for article_id, concepts in article_concepts.iteritems():
+            values.append((article_id, merge_indexes(wiki_texts.indexes(concepts).itervalues())))
+            if len(values) == WRITE_BATCH:
+                with transaction.commit_on_success():
+                    bulk_update(Article, 'wiki_text_index', values)
+                counter['items'] += len(values)
+                values = []
+        with transaction.commit_on_success():
+            bulk_update(Article, 'wiki_text_index', values)
+        counter['items'] += len(values)
+
+    timer.report()
+    elapsed = time.time() - total_start
+    print 'Total: {0} articles in {1:.1f}s, {2:.2f} articles/s'.format(
+        len(articles), elapsed, len(articles) / elapsed if elapsed else 0)
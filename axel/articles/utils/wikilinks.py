@@ -0,0 +1,76 @@
+"""
+Wikipedia links between concepts: link sets are fetched concurrently, edges are found
+through the inverted index of linked titles.
+"""
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+import re
+
+import networkx as nx
+
+from axel.libs.http import http_client, WIKI_API_URL
+
+
+DISAMBIGUATION_RE = re.compile(r' \(.+\)')
+
+
+def fetch_links(ngram):
+    """
+    Multi-word titles linked from the ngram page, lower-cased and without disambiguation
+    :type ngram: unicode
+    :rtype: set
+    """
+    params = {'action': 'query', 'titles': ngram, 'prop': 'links', 'plnamespace': 0,
+              'pllimit': 500, 'format': 'json'}
+    result = http_client.get_json(WIKI_API_URL, params=params)
+    try:
+        links = result['query']['pages'].values()[0]['links']
+    except KeyError:
+        return set()
+    links = [DISAMBIGUATION_RE.sub('', link['title'].lower()) for link in links]
+    return set([link for link in links if len(link.split()) > 1])
+
+
+def fetch_all_links(ngrams):
+    """
+    :returns: dict of the form {ngram: set of linked titles}
+    :rtype: dict
+    """
+    ngrams = list(set(ngrams))
+    if not ngrams:
+        return {}
+    pool = ThreadPool(min(http_client.max_concurrency, len(ngrams)))
+    try:
+        return dict(zip(ngrams, pool.map(fetch_links, ngrams)))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def link_edges(links):
+    """
+    Pairs of n-grams where either one links to the other, linear in the number of links
+    :param links: dict of the form {ngram: set of linked titles}
+    :rtype: set
+    :returns: set of (ngram, ngram) tuples, each pair once
+    """
+    linked_from = defaultdict(list)
+    for ngram, titles in links.iteritems():
+        for title in titles:
+            linked_from[title].append(ngram)
+    edges = set()
+    for ngram in links:
+        for source in linked_from.get(ngram, ()):
+            if source != ngram:
+                edges.add((min(source, ngram), max(source, ngram)))
+    return edges
+
+
+def wikilinks_graph(ngrams):
+    """
+    :type ngrams: iterable
+    :rtype: nx.Graph
+    """
+    graph = nx.Graph()
+    graph.add_edges_from(link_edges(fetch_all_links(ngrams)))
+    return graph
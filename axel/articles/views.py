@@ -1,16 +1,31 @@
-from django.http import Http404
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render_to_response
 from django.template import RequestContext
 from django.views.decorators.http import require_POST
 from django.views.generic.edit import FormView
-from django.views.generic import ListView, DetailView, TemplateView
+from django.views.generic import ListView, DetailView, TemplateView, View
 
 from axel.articles.forms import PDFUploadForm, ConceptAutocompleteForm
 from axel.articles.models import Article
+from axel.articles.utils.boolean_query import QueryParseError
+from axel.articles.utils.cooccurrence import concept_matrices
+from axel.articles.utils.ngram_index import ngram_indexes
+from axel.articles.utils.search_index import search_index
 from axel.libs.mixins import JSONResponseMixin
+from axel.libs.pagination import KeysetPaginator
 from axel.stats.models import Collocations
 
 
+# Number of concepts suggested by autocomplete
+AUTOCOMPLETE_LIMIT = 20
+# Number of related concepts suggested for the selection
+SUGGESTIONS_LIMIT = 10
+
+
 class PDFCollocationsView(FormView):
     """Extract and display collocations from pdf document"""
     template_name = 'articles/pdfcollocations.html'
@@ -43,6 +58,71 @@ class ArticleList(ListView):
     context_object_name = 'articles'
     template_name = 'articles/article_list.html'
     paginate_by = 50
+    # unique ordering for keyset pagination, both keys descend so that the
+    # (year, id) index of Article.Meta.index_together is scanned backwards
+    keyset_ordering = ('-year', '-id')
+
+    def get_page(self):
+        """
+        :rtype: KeysetPage
+        """
+        paginator = KeysetPaginator(Article.objects.listing(), self.keyset_ordering,
+                                    self.paginate_by)
+        try:
+            return paginator.page(after=self.request.GET.get('after'),
+                                  before=self.request.GET.get('before'))
+        except (ValueError, ValidationError):
+            raise Http404
+
+    def get_queryset(self):
+        self.page = self.get_page()
+        return self.page.object_list
+
+    def get_paginate_by(self, queryset):
+        """Page is already selected by the keyset"""
+        return None
+
+    def get_context_data(self, **kwargs):
+        context = super(ArticleList, self).get_context_data(**kwargs)
+        context['page_obj'] = self.page
+        context['is_paginated'] = self.page.has_other_pages()
+        return context
+
+
+class ArticleListJSONView(View):
+    """Streams the article list as JSON, pages are fetched with keyset queries"""
+    fields = ('id', 'title', 'year', 'venue__acronym', 'citations', 'link', 'cluster_id')
+    chunk_size = 500
+
+    def _stream(self, paginator, after):
+        yield '{"articles": ['
+        first = True
+        page = paginator.page(after=after)
+        while True:
+            for article in page:
+                if not first:
+                    yield ','
+                first = False
+                yield json.dumps(article)
+            if not page.has_next():
+                break
+            page = paginator.page(after=page.next_cursor)
+        yield ']}'
+
+    def get(self, request, *args, **kwargs):
+        queryset = Article.objects.order_by().values(*self.fields)
+        cluster_id = request.GET.get('cluster')
+        if cluster_id:
+            queryset = queryset.filter(cluster_id=cluster_id)
+        paginator = KeysetPaginator(queryset, ArticleList.keyset_ordering, self.chunk_size)
+        after = request.GET.get('after')
+        if after:
+            try:
+                paginator.decode_cursor(after)
+            except (ValueError, ValidationError):
+                raise Http404
+        return StreamingHttpResponse(self._stream(paginator, after),
+                                     content_type='application/json')
 
 
 class ArticleDetailView(DetailView):
@@ -60,17 +140,44 @@ class ConceptAutocompleteView(JSONResponseMixin, TemplateView):
         if form.is_valid():
             query = form.cleaned_data['query']
             # search concepts
-            results = Collocations.objects.filter(ngram__icontains=query)
-            results = [colloc.ngram+' '+str(colloc.count) for colloc in results]
+            results = ngram_indexes.get(Collocations).search(query, AUTOCOMPLETE_LIMIT)
+            results = [ngram + ' ' + str(count) for ngram, count in results]
             context = {'results': results}
             return JSONResponseMixin.render_to_response(self, context)
         raise Http404
 
 
+class ConceptSuggestionView(JSONResponseMixin, View):
+    """Concepts that co-occur most often with the selected ones"""
+
+    def get(self, request, *args, **kwargs):
+        concepts = request.GET.getlist('concepts')
+        matrix = concept_matrices.get(Collocations.CLUSTER_ID)
+        results = matrix.suggest(concepts, SUGGESTIONS_LIMIT)
+        return self.render_to_response({'results': [ngram + ' ' + str(count)
+                                                    for ngram, count in results]})
+
+
 @require_POST
 def filter_articles_view(request):
-    """View that shows filtered articles based on concepts"""
-    concepts = request.POST.getlist('concepts')
-    articles = Article.objects.filter(articlecollocation__ngram__in=concepts).distinct()
-    return render_to_response('articles/article_list.html', {'articles': articles},
-                        context_instance=RequestContext(request))
+    """
+    View that shows articles containing the concepts or matching the boolean query,
+    ranked by TF-IDF
+    """
+    boolean_query = request.POST.get('boolean_query', '').strip()
+    if boolean_query:
+        try:
+            results = search_index.boolean_search(boolean_query)
+        except QueryParseError as e:
+            return HttpResponseBadRequest(unicode(e))
+    else:
+        results = search_index.search(request.POST.getlist('concepts'))
+    paginator = Paginator(results, ArticleList.paginate_by)
+    try:
+        page = paginator.page(request.POST.get('page', 1))
+    except (PageNotAnInteger, EmptyPage):
+        page = paginator.page(1)
+    return render_to_response('articles/article_list.html',
+                              {'articles': page.object_list, 'page_obj': page,
+                               'paginator': paginator, 'is_paginated': page.has_other_pages()},
+                              context_instance=RequestContext(request))
@@ -1,38 +1,97 @@
 """Match extracted collocation with DBPedia entities"""
 
 from datetime import date
+import os
+import threading
+
+from django.conf import settings
 from lxml import etree
-import requests
-from suds.client import Client
-from suds.xsd.doctor import Import, ImportDoctor
+
+from axel.libs.http import http_client
 
 
 DBLP_URL = 'http://dblp.l3s.de/WS/aspl2.php?wsdl'
-imp = Import('http://schemas.xmlsoap.org/soap/encoding/',
-             location='http://schemas.xmlsoap.org/soap/encoding/')
-dblp_client = Client(DBLP_URL,plugins=[ImportDoctor(imp)])
 
-DBPEDIA_REQ = u'http://lookup.dbpedia.org/api/search' \
-              u'.asmx/KeywordSearch?QueryClass=&QueryString={0}&MaxHits=1'
+DBPEDIA_LOOKUP_URL = 'http://lookup.dbpedia.org/api/search.asmx/KeywordSearch'
 
+_local = threading.local()
 
-def perform_match(collocation):
+
+class MatchDeferred(Exception):
+    """External services are disabled by EXTERNAL_MATCH_OFFLINE, lookups stay queued"""
+
+
+def is_offline():
     """
-    :type collocation: Collocation
+    :rtype: bool
     """
-    source = []
-    # perform search using dbpedia
-    r = requests.get(DBPEDIA_REQ.format(collocation.ngram))
+    return getattr(settings, 'EXTERNAL_MATCH_OFFLINE', False)
+
+
+def get_dblp_client():
+    """
+    SOAP client is created on first use, once per thread, suds clients are not thread-safe.
+    The WSDL and imported schemas are cached under CACHE_ROOT, so only the first client
+    of a deployment downloads them.
+    :rtype: Client
+    """
+    if not hasattr(_local, 'dblp_client'):
+        from suds.cache import ObjectCache
+        from suds.client import Client
+        from suds.xsd.doctor import Import, ImportDoctor
+        imp = Import('http://schemas.xmlsoap.org/soap/encoding/',
+                     location='http://schemas.xmlsoap.org/soap/encoding/')
+        cache = ObjectCache(location=os.path.join(settings.CACHE_ROOT, 'suds'),
+                            days=getattr(settings, 'DBLP_WSDL_CACHE_DAYS', 30))
+        _local.dblp_client = Client(DBLP_URL, plugins=[ImportDoctor(imp)], cache=cache)
+    return _local.dblp_client
+
+
+def match_dbpedia(ngram):
+    """
+    :returns: True if DBPedia lookup has an entity labeled with the ngram
+    :rtype: bool
+    """
+    r = http_client.get(DBPEDIA_LOOKUP_URL,
+                        params={'QueryClass': '', 'QueryString': ngram, 'MaxHits': 1})
     xml = etree.fromstring(r.text.replace('encoding="utf-8"', ''))
     result = xml.find('.//{http://lookup.dbpedia.org/}Label')
     desc = xml.find('.//{http://lookup.dbpedia.org/}Description')
-    if result is not None and desc is not None and result.text.lower() == collocation.ngram:
-        source.append("dbpedia")
+    return result is not None and desc is not None and result.text.lower() == ngram
 
+
+def match_dblp(ngram):
+    """
+    :returns: True if ngram is a DBLP keyword
+    :rtype: bool
+    """
+    dblp_res = get_dblp_client().service.all_keywords_year(searchTerm=ngram, limit=1,
+                                                           startYear=1999,
+                                                           endYear=date.today().year)
+    return bool(dblp_res) and dblp_res[0].keyword.lower() == ngram
+
+
+def match_ngram(ngram):
+    """
+    :type ngram: unicode
+    :returns: list of sources where the ngram was found
+    :rtype: list
+    :raises MatchDeferred: in the offline mode
+    """
+    if is_offline():
+        raise MatchDeferred(ngram)
+    source = []
+    # perform search using dbpedia
+    if match_dbpedia(ngram):
+        source.append("dbpedia")
     # perform keyword search from dblp
-    dblp_res = dblp_client.service.all_keywords_year(searchTerm=collocation.ngram, limit=1,
-                                                     startYear=1999, endYear=date.today().year)
-    if dblp_res and dblp_res[0].keyword.lower() == collocation.ngram:
+    if match_dblp(ngram):
         source.append("dblp")
-
     return source
+
+
+def perform_match(collocation):
+    """
+    :type collocation: Collocation
+    """
+    return match_ngram(collocation.ngram)
@@ -0,0 +1,200 @@
+"""
+Shared HTTP client for the external services (Wikipedia, DBpedia, ACM DL):
+pooled keep-alive sessions, bounded concurrency, retries with backoff and
+an on-disk SQLite cache of successful GET responses.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+import requests
+from requests.adapters import HTTPAdapter
+
+from axel.libs.sqlite_store import SQLiteStore
+
+
+CACHE_NAME = 'http_cache.sqlite'
+WIKI_API_URL = 'http://en.wikipedia.org/w/api.php'
+SPARQL_ENDPOINT = 'http://dbpedia.org/sparql'
+# Responses with these statuses are retried
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CachedResponse(object):
+    """Response restored from the cache, mimics the used part of requests.Response"""
+
+    def __init__(self, url, status_code, content, encoding):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class ResponseCache(SQLiteStore):
+    """
+    SQLite table of response bodies keyed by the full request URL, entries expire after ttl
+    seconds
+    """
+    SCHEMA = ('CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, status INTEGER, '
+              'content BLOB, encoding TEXT, created REAL)',)
+
+    def get(self, url, ttl):
+        """
+        :returns: cached response or None if missing or expired
+        :rtype: CachedResponse
+        """
+        row = self._connection().execute('SELECT status, content, encoding FROM responses '
+                                         'WHERE url = ? AND created > ?',
+                                         (url, time.time() - ttl)).fetchone()
+        if row is None:
+            return None
+        status, content, encoding = row
+        return CachedResponse(url, status, str(content), encoding)
+
+    def set(self, url, response):
+        """
+        :type response: requests.Response
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                               (url, response.status_code, sqlite3.Binary(response.content),
+                                response.encoding or response.apparent_encoding, time.time()))
+
+    def purge(self, ttl):
+        """Delete expired entries"""
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM responses WHERE created <= ?', (time.time() - ttl,))
+
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM responses')
+
+
+class RateLimiter(object):
+    """Spaces out the calls of all threads to at most rate per second, 0 disables the limit"""
+
+    def __init__(self, rate):
+        self.interval = 1. / rate if rate else 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next call is allowed"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class HttpClient(object):
+    """
+    Thread-safe client, a single session keeps connections to every host alive and
+    a semaphore limits the number of requests in flight across all threads.
+    Session and semaphore belong to the process, forked children create their own on the
+    first request, so N processes have up to N * max_concurrency requests in flight.
+    """
+
+    def __init__(self, max_concurrency=None, retries=None, backoff=None, ttl=None,
+                 timeout=None, cache_path=None):
+        self.max_concurrency = max_concurrency or getattr(settings, 'HTTP_MAX_CONCURRENCY', 8)
+        self.retries = retries if retries is not None else getattr(settings, 'HTTP_RETRIES', 3)
+        self.backoff = backoff if backoff is not None else getattr(settings, 'HTTP_BACKOFF', 1.)
+        self.ttl = ttl or getattr(settings, 'HTTP_CACHE_TTL', 30 * 24 * 3600)
+        self.timeout = timeout or getattr(settings, 'HTTP_TIMEOUT', 30)
+        self.cache = ResponseCache(cache_path or os.path.join(settings.CACHE_ROOT, CACHE_NAME))
+        self._pid = None
+        self._session = None
+        self._semaphore = None
+
+    def _check_process(self):
+        """Create session and semaphore in a new process, inherited sockets are not shared"""
+        if self._pid == os.getpid():
+            return
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_concurrency,
+                              pool_maxsize=self.max_concurrency)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        self._session = session
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        # set last, other threads use the objects once the pid matches
+        self._pid = os.getpid()
+
+    @property
+    def session(self):
+        """
+        :rtype: requests.Session
+        """
+        self._check_process()
+        return self._session
+
+    @staticmethod
+    def build_url(url, params=None):
+        """
+        :returns: URL with the encoded query string, used as the cache key
+        :rtype: str
+        """
+        if not params:
+            return url
+        return requests.Request('GET', url, params=params).prepare().url
+
+    def get(self, url, params=None, headers=None, ttl=None, cache=True):
+        """
+        GET the url, successful responses are cached for ttl seconds
+        :param cache: False to bypass the cache
+        :rtype: requests.Response or CachedResponse
+        :raises requests.RequestException: when retries are exhausted
+        """
+        url = self.build_url(url, params)
+        ttl = ttl or self.ttl
+        if cache:
+            response = self.cache.get(url, ttl)
+            if response is not None:
+                return response
+        response = self._request(url, headers)
+        if cache and response.status_code == 200:
+            self.cache.set(url, response)
+        return response
+
+    def get_json(self, url, params=None, headers=None, ttl=None, cache=True):
+        """
+        :rtype: dict
+        """
+        return self.get(url, params, headers, ttl, cache).json()
+
+    def _request(self, url, headers):
+        self._check_process()
+        attempt = 0
+        while True:
+            with self._semaphore:
+                try:
+                    response = self._session.get(url, headers=headers, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt >= self.retries:
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                        return response
+            # sleep outside of the semaphore to let other requests through
+            time.sleep(self.backoff * 2 ** attempt)
+            attempt += 1
+
+
+http_client = HttpClient()
@@ -45,12 +45,25 @@ class AttributeFilterView(TemplateView):
     model_fields_attr = None
 
     def _FilterForm(self, field_list):
-        """:rtype: Form"""
+        """
+        :param field_list: (attribute, label, form field class[, lookup]) tuples,
+        lookup defaults to `regex`
+        :rtype: Form
+        """
         fields = {}
-        for attribute, label, field_type in field_list:
-            fields[attribute + '__regex'] = field_type(label=label)
+        for field_info in field_list:
+            attribute, label, field_type = field_info[:3]
+            lookup = field_info[3] if len(field_info) > 3 else 'regex'
+            fields['{0}__{1}'.format(attribute, lookup)] = field_type(label=label, required=False)
         return type('AttributeForm', (forms.Form,), fields)
 
+    def filter_queryset(self, queryset, filter_values):
+        """
+        Apply cleaned form values, override to filter over related tables
+        :rtype: QuerySet
+        """
+        return queryset.filter(**filter_values)
+
     def get_context_data(self, **kwargs):
         context = super(AttributeFilterView, self).get_context_data(**kwargs)
         if not self.queryset:
@@ -64,8 +77,11 @@ class AttributeFilterView(TemplateView):
         fields = getattr(self.queryset.model, self.model_fields_attr)
         form = self._FilterForm(fields)(self.request.POST or None)
         if form.is_valid():
-            filter_values = dict([(field, value) for field, value in form.cleaned_data.iteritems()])
-            self.queryset = self.queryset.filter(**filter_values)
+            # skip empty fields
+            filter_values = dict([(field, value) for field, value in form.cleaned_data.iteritems()
+                                  if value not in (None, '')])
+            if filter_values:
+                self.queryset = self.filter_queryset(self.queryset, filter_values)
         context[self.context_form_name] = form
         return context
 
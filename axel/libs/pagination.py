@@ -0,0 +1,119 @@
+"""Keyset (seek) pagination, pages are located by the last row keys instead of OFFSET"""
+from django.db.models import Q
+
+
+CURSOR_SEPARATOR = ':'
+
+
+class KeysetPage(object):
+    """Page of objects with cursors to the neighbouring pages"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator(object):
+    """
+    Paginate the queryset by a unique ordering, like ('-year', '-id'). Cursors encode
+    key values of the boundary rows, so every page is a single indexed range query.
+    Keep the directions of all keys equal and back the ordering with a composite
+    index: mixed directions cannot be served by one index scan, and the seek predicate
+    is an OR of prefixes, not a row value comparison, which some backends only
+    turn into an index range for same-direction keys.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        """
+        :param ordering: field names with optional '-' for descending order, last field
+        should be unique
+        :type queryset: QuerySet
+        """
+        self.queryset = queryset
+        self.ordering = ordering
+        self.per_page = per_page
+        self.fields = [name.lstrip('-') for name in ordering]
+
+    def _reversed_ordering(self):
+        return [name[1:] if name.startswith('-') else '-' + name for name in self.ordering]
+
+    def encode_cursor(self, obj):
+        """
+        :param obj: model instance or a dict for `values()` querysets
+        :rtype: str
+        """
+        if isinstance(obj, dict):
+            values = [obj[field] for field in self.fields]
+        else:
+            values = [getattr(obj, field) for field in self.fields]
+        return CURSOR_SEPARATOR.join(str(value) for value in values)
+
+    def decode_cursor(self, cursor):
+        """
+        :rtype: list
+        :raises ValueError: on malformed cursors
+        """
+        values = cursor.split(CURSOR_SEPARATOR)
+        if len(values) != len(self.fields):
+            raise ValueError('Invalid cursor: {0}'.format(cursor))
+        model = self.queryset.model
+        return [model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)]
+
+    def _seek(self, ordering, values):
+        """
+        Filter rows following the key values in the specified ordering,
+        lexicographic comparison expanded into OR of prefixes
+        :rtype: Q
+        """
+        condition = Q()
+        for i, name in enumerate(ordering):
+            field = name.lstrip('-')
+            prefix = dict(zip(self.fields[:i], values[:i]))
+            prefix[field + ('__lt' if name.startswith('-') else '__gt')] = values[i]
+            condition |= Q(**prefix)
+        return condition
+
+    def page(self, after=None, before=None):
+        """
+        :param after: cursor of the last row of the previous page
+        :param before: cursor of the first row of the next page
+        :rtype: KeysetPage
+        """
+        if before:
+            ordering = self._reversed_ordering()
+            queryset = self.queryset.filter(self._seek(ordering, self.decode_cursor(before)))
+        else:
+            ordering = self.ordering
+            queryset = self.queryset
+            if after:
+                queryset = queryset.filter(self._seek(ordering, self.decode_cursor(after)))
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(after)
+        if not rows:
+            return KeysetPage(rows)
+        return KeysetPage(rows,
+                          next_cursor=self.encode_cursor(rows[-1]) if has_next else None,
+                          previous_cursor=self.encode_cursor(rows[0]) if has_previous else None)
@@ -0,0 +1,45 @@
+"""Base for the on-disk SQLite stores kept under CACHE_ROOT"""
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore(object):
+    """
+    Every thread and process gets its own connection, tables are created on the first one.
+    Subclasses list their DDL statements in SCHEMA.
+    """
+    SCHEMA = ()
+    # number of bound parameters used per IN (...) query, SQLite allows 999
+    CHUNK_SIZE = 500
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            with connection:
+                for statement in self.SCHEMA:
+                    connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def _select_in(self, query, values):
+        """
+        Run the query with a single IN (%s) placeholder over chunks of values
+        :rtype: generator
+        """
+        values = list(values)
+        connection = self._connection()
+        for i in xrange(0, len(values), self.CHUNK_SIZE):
+            chunk = values[i:i + self.CHUNK_SIZE]
+            for row in connection.execute(query % ','.join('?' * len(chunk)), chunk):
+                yield row
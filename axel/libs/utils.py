@@ -1,3 +1,5 @@
+from collections import OrderedDict
+from contextlib import contextmanager
 import time
 import traceback
 
@@ -114,3 +116,32 @@ def print_progress(iterable, percent_step=1):
         if i and not i % abs_step:
             print "{0:.2%} processed".format(i/total)
         yield obj
+
+
+class StageTimer(object):
+    """Wall time and processed items of the pipeline stages"""
+
+    def __init__(self):
+        self.stages = OrderedDict()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time the block, the yielded dict counts processed items under 'items'
+        """
+        counter = {'items': 0}
+        start = time.time()
+        print '{0}...'.format(name)
+        yield counter
+        self.stages[name] = (time.time() - start, counter['items'])
+
+    def add(self, name, elapsed, items=1):
+        """Account time spent outside of the stage block, e.g. by pool workers"""
+        stage_elapsed, stage_items = self.stages.get(name, (0, 0))
+        self.stages[name] = (stage_elapsed + elapsed, stage_items + items)
+
+    def report(self):
+        for name, (elapsed, items) in self.stages.iteritems():
+            rate = items / elapsed if elapsed else 0
+            print '{0:<12} {1:>8.1f}s {2:>8} items {3:>8.1f} items/s'.format(name, elapsed, items,
+                                                                             rate)
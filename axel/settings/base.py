@@ -53,6 +53,25 @@ MEDIA_URL = ''
 # Example: "/home/media/media.lawrence.com/static/"
 STATIC_ROOT = ABS_PATH('static')
 
+# Directory for snapshots of in-process indexes
+CACHE_ROOT = ABS_PATH('cache')
+
+# External services client, see axel.libs.http
+HTTP_MAX_CONCURRENCY = 8
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 1.
+HTTP_TIMEOUT = 30
+# Cached responses expire after 30 days
+HTTP_CACHE_TTL = 30 * 24 * 3600
+
+# Defer DBPedia/DBLP matching of the collocations, lookups stay queued until disabled
+EXTERNAL_MATCH_OFFLINE = False
+# Days to keep the parsed DBLP WSDL under CACHE_ROOT
+DBLP_WSDL_CACHE_DAYS = 30
+
+# Article graphs kept in memory by every process, see axel.articles.utils.graph_store
+GRAPH_CACHE_SIZE = 128
+
 # URL prefix for static files.
 # Example: "http://media.lawrence.com/static/"
 STATIC_URL = '/static/'
@@ -104,6 +123,8 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    # flush cached attribute values computed during the request
+    'axel.articles.utils.db.WriteBehindMiddleware',
     )
 
 ROOT_URLCONF = PROJECT_NAME + '.urls'
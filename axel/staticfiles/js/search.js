@@ -6,7 +6,7 @@ $(document).ready(function() {
     var $concept_form = $('#concept_form');
 
     // setup concept autocomplete
-    $concept_form.find('input:text').typeahead({
+    $concept_form.find('input:text:not([name=boolean_query])').typeahead({
         source: function (query, process) {
             return $.getJSON($concept_form.attr('action'), $concept_form.serialize(), function (data) {
                 return process(data.results);
@@ -16,14 +16,7 @@ $(document).ready(function() {
             return true;
         },
         updater: function(item) {
-            // Update list of concepts
-            var $container = $('#selected_concepts');
-            var $label = $container.find('.label.hidden').clone();
-            item = item.replace(new RegExp('\\s(\\d+)$'), function ($1, match) {
-                return ''
-            });
-            $label.removeClass('hidden').text(item).append('<button class="close">×</button>');
-            $container.append($label);
+            addConcept(item);
         },
         highlighter: function (item) {
             var query = this.query.replace(/[\-\[\]{}()*+?.,\\\^$|#\s]/g, '\\$&');
@@ -43,13 +36,60 @@ $(document).ready(function() {
             $('#concept_form').find('div.search').append($('<input name="concepts" type="hidden" value="'+$(item).text().slice(0, -1)+'">'));
             return $(item).text().slice(0, -1);
         });
-        $.post($(this).attr('data-url'), $('#concept_form').serialize(), function(data){
+        showArticles($(this).attr('data-url'), 1);
+    });
+
+    function showArticles(url, page) {
+        $.post(url, $('#concept_form').serialize() + '&page=' + page, function(data){
             // show articles
             $('#search_results').empty().append(data);
+        }).fail(function(xhr) {
+            // malformed boolean query
+            $('#search_results').empty().append($('<div class="alert alert-error"></div>').text(xhr.responseText));
         });
+    }
+
+    // ranked results are paginated through the same POST request
+    $(document).on('click', '#search_results .pagination a', function(e) {
+        e.preventDefault();
+        var page = $(this).attr('href').replace('?page=', '');
+        if (page) {
+            showArticles($('#show_articles').attr('data-url'), page);
+        }
     });
 
     $(document).on('click', '#selected_concepts .label .close', function() {
         $(this).parent().remove();
+        updateSuggestions();
+    });
+
+    $(document).on('click', '#suggested_concepts .label', function() {
+        addConcept($(this).text());
     });
+
+    function addConcept(item) {
+        // Update list of concepts, strip the count
+        var $container = $('#selected_concepts');
+        var $label = $container.find('.label.hidden').clone();
+        item = item.replace(new RegExp('\\s(\\d+)$'), function ($1, match) {
+            return ''
+        });
+        $label.removeClass('hidden').text(item).append('<button class="close">×</button>');
+        $container.append($label);
+        updateSuggestions();
+    }
+
+    function updateSuggestions() {
+        // Suggest concepts co-occurring with the selected ones
+        var $container = $('#suggested_concepts');
+        var concepts = $.map($('#selected_concepts').find('span.label:not(.hidden)'), function(item) {
+            return $(item).text().slice(0, -1);
+        });
+        $.getJSON($container.attr('data-url'), $.param({concepts: concepts}, true), function (data) {
+            $container.find('.label').remove();
+            $.each(data.results, function(i, item) {
+                $container.append($('<span class="label label-info"></span>').text(item)).append(' ');
+            });
+        });
+    }
 });
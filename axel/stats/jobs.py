@@ -0,0 +1,108 @@
+"""Long running maintenance jobs executed outside of the request"""
+import json
+import threading
+import traceback
+
+from django.db import connection, transaction
+from django.utils import timezone
+from test_collection.views import _get_model_from_string
+
+from axel.articles.utils.db import bulk_update, dump_json_column, load_json_column, \
+    resolve_field
+from axel.stats.models import CacheInvalidationJob
+
+
+# Number of rows loaded and rewritten at once
+INVALIDATION_CHUNK = 1000
+
+
+def _invalidation_rows(model, column, attribute):
+    """
+    :returns: rows that may store the attribute, filtered by the database
+    :rtype: QuerySet
+    """
+    # json key is always quoted, false positives are re-checked after parsing
+    return model.objects.order_by('pk').filter(
+        **{column + '__contains': json.dumps(attribute)})
+
+
+def run_invalidation_job(job_id):
+    """
+    Remove the cached attribute from all rows in chunks, only the rows that
+    contain the attribute are written, with a single column update per chunk.
+    The job is idempotent, a restarted job starts over.
+    """
+    job = CacheInvalidationJob.objects.get(pk=job_id)
+    jobs = CacheInvalidationJob.objects.filter(pk=job_id)
+    try:
+        model = _get_model_from_string(job.model_name)
+        field = resolve_field(model, 'extra_fields')
+        rows = _invalidation_rows(model, field.name, job.attribute)
+        jobs.update(status=CacheInvalidationJob.STATUS_RUNNING, total=rows.count(), processed=0,
+                    heartbeat=timezone.now())
+
+        last_pk = None
+        processed = 0
+        while True:
+            chunk = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+            chunk = list(chunk.values_list('pk', field.name)[:INVALIDATION_CHUNK])
+            if not chunk:
+                break
+            values = []
+            for pk, raw in chunk:
+                fields = load_json_column(raw)
+                if job.attribute in fields:
+                    del fields[job.attribute]
+                    values.append((pk, dump_json_column(model, 'extra_fields', fields)))
+            with transaction.commit_on_success():
+                bulk_update(model, field.name, values)
+            last_pk = chunk[-1][0]
+            processed += len(chunk)
+            jobs.update(processed=processed, heartbeat=timezone.now())
+        jobs.update(status=CacheInvalidationJob.STATUS_DONE, finished=timezone.now())
+    except Exception:
+        jobs.update(status=CacheInvalidationJob.STATUS_FAILED, error=traceback.format_exc(),
+                    finished=timezone.now())
+        raise
+
+
+def _run_in_background(job_id):
+    def run():
+        try:
+            run_invalidation_job(job_id)
+        finally:
+            # thread has its own database connection
+            connection.close()
+
+    thread = threading.Thread(target=run, name='invalidate-{0}'.format(job_id))
+    thread.daemon = True
+    thread.start()
+
+
+def resume_stale_jobs():
+    """
+    Restart the jobs whose worker died with the web process, every job is
+    claimed by a conditional update so it is restarted only once
+    :returns: ids of the restarted jobs
+    :rtype: list
+    """
+    resumed = []
+    for job_id, heartbeat in CacheInvalidationJob.stale().values_list('id', 'heartbeat'):
+        claimed = CacheInvalidationJob.objects.filter(pk=job_id, heartbeat=heartbeat)\
+            .update(status=CacheInvalidationJob.STATUS_PENDING, heartbeat=timezone.now())
+        if claimed:
+            _run_in_background(job_id)
+            resumed.append(job_id)
+    return resumed
+
+
+def start_invalidation_job(model_name, attribute):
+    """
+    Create the job and run it in a background thread, stale jobs are resumed as well
+    :rtype: CacheInvalidationJob
+    """
+    resume_stale_jobs()
+    job = CacheInvalidationJob.objects.create(model_name=model_name, attribute=attribute,
+                                              heartbeat=timezone.now())
+    _run_in_background(job.id)
+    return job
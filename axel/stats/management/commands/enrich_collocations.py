@@ -0,0 +1,112 @@
+"""Process queued DBPedia/DBLP lookups of the collocations"""
+from multiprocessing.pool import ThreadPool
+from optparse import make_option
+import traceback
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+
+from axel.articles.utils.db import bulk_update
+from axel.libs.external_match import match_ngram, is_offline
+from axel.stats.models import STATS_CLUSTERS_DICT, EnrichmentTask
+
+
+def _lookup(ngram):
+    """
+    :returns: (ngram, source or None on error, error message)
+    :rtype: tuple
+    """
+    try:
+        return ngram, match_ngram(ngram), None
+    except Exception:
+        return ngram, None, traceback.format_exc()
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--cluster', '-c',
+                    action='store',
+                    dest='cluster',
+                    help='cluster id for article type'),
+        make_option('--workers', '-w',
+                    action='store',
+                    dest='workers',
+                    type='int',
+                    default=8,
+                    help='number of concurrent lookups, defaults to 8'),
+        make_option('--batch', '-b',
+                    action='store',
+                    dest='batch',
+                    type='int',
+                    default=100,
+                    help='number of tasks written at once, defaults to 100'),
+        make_option('--max-attempts',
+                    action='store',
+                    dest='max_attempts',
+                    type='int',
+                    default=3,
+                    help='failed lookups are retried up to this number of times, defaults to 3'),
+    )
+    help = 'Drains the enrichment queue: looks up collocation sources and stores them in bulk'
+
+    def handle(self, *args, **options):
+        cluster_id = options['cluster']
+        if not cluster_id:
+            raise CommandError("need to specify cluster id")
+        self.StatsModel = STATS_CLUSTERS_DICT[cluster_id]
+        self.max_attempts = options['max_attempts']
+        tasks = EnrichmentTask.objects.filter(cluster_id=cluster_id,
+                                              status=EnrichmentTask.STATUS_PENDING)
+        print 'Pending lookups: {0}'.format(tasks.count())
+        if is_offline():
+            print 'EXTERNAL_MATCH_OFFLINE is set, lookups stay queued'
+            return
+        pool = ThreadPool(options['workers'])
+        last_id = 0
+        processed = 0
+        try:
+            while True:
+                batch = list(tasks.filter(id__gt=last_id).order_by('id')
+                             .values_list('id', 'ngram')[:options['batch']])
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+                results = pool.map(_lookup, [ngram for _, ngram in batch])
+                self._store(dict((ngram, task_id) for task_id, ngram in batch), results)
+                processed += len(batch)
+                print '{0} processed'.format(processed)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _store(self, task_ids, results):
+        """
+        Write found sources and task statuses for the batch
+        :param task_ids: dict of the form {ngram: task id}
+        :param results: list of (ngram, source, error) tuples
+        """
+        sources = dict((ngram, source) for ngram, source, _ in results if source is not None)
+        failed = [task_ids[ngram] for ngram, source, _ in results if source is None]
+        for ngram, source, error in results:
+            if error:
+                print u'Lookup failed for {0}:\n{1}'.format(ngram, error)
+
+        values = []
+        for collocation in self.StatsModel.objects.filter(ngram__in=sources.keys())\
+                .only('id', 'ngram', '_extra_fields'):
+            fields = collocation.extra_fields
+            fields['source'] = sources[collocation.ngram]
+            collocation.extra_fields = fields
+            collocation.serialize_extra_fields()
+            values.append((collocation.id, collocation._extra_fields))
+
+        with transaction.commit_on_success():
+            bulk_update(self.StatsModel, '_extra_fields', values)
+            EnrichmentTask.objects.filter(id__in=[task_ids[ngram] for ngram in sources])\
+                .update(status=EnrichmentTask.STATUS_DONE)
+            if failed:
+                EnrichmentTask.objects.filter(id__in=failed).update(attempts=F('attempts') + 1)
+                EnrichmentTask.objects.filter(id__in=failed, attempts__gte=self.max_attempts)\
+                    .update(status=EnrichmentTask.STATUS_FAILED)
+        self.StatsModel.update_features(sources.keys())
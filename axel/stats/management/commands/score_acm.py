@@ -0,0 +1,113 @@
+"""Score collocations by the number of ACM Digital Library search results"""
+from multiprocessing.pool import ThreadPool
+from optparse import make_option
+import time
+import traceback
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from axel.libs.http import RateLimiter
+from axel.stats.models import STATS_CLUSTERS_DICT, AcmSearchCount
+from axel.stats.scores.dl_acm_search import acm_search_result_count, ACM_SEARCH_URL
+
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--cluster', '-c',
+                    action='store',
+                    dest='cluster',
+                    help='cluster id for article type'),
+        make_option('--workers', '-w',
+                    action='store',
+                    dest='workers',
+                    type='int',
+                    default=4,
+                    help='number of concurrent searches, defaults to 4'),
+        make_option('--rate', '-r',
+                    action='store',
+                    dest='rate',
+                    type='float',
+                    default=1.,
+                    help='maximum searches per second, 0 for no limit, defaults to 1'),
+        make_option('--batch', '-b',
+                    action='store',
+                    dest='batch',
+                    type='int',
+                    default=100,
+                    help='number of results written at once, defaults to 100'),
+        make_option('--max-attempts',
+                    action='store',
+                    dest='max_attempts',
+                    type='int',
+                    default=3,
+                    help='failed searches are retried up to this number of times, defaults to 3'),
+        make_option('--url',
+                    action='store',
+                    dest='url',
+                    default=ACM_SEARCH_URL,
+                    help='ACM DL search page'),
+    )
+    help = 'Fetches ACM DL result counts of the cluster n-grams, resumes after the scored ones'
+
+    def handle(self, *args, **options):
+        cluster_id = options['cluster']
+        if not cluster_id:
+            raise CommandError("need to specify cluster id")
+        self.url = options['url']
+        self.max_attempts = options['max_attempts']
+        self.limiter = RateLimiter(options['rate'])
+        finished = AcmSearchCount.objects.filter(Q(status=AcmSearchCount.STATUS_DONE) |
+                                                 Q(attempts__gte=self.max_attempts))
+        ngrams = STATS_CLUSTERS_DICT[cluster_id].objects.exclude(ngram__in=finished.values('ngram'))
+        print 'N-grams to score: {0}'.format(ngrams.count())
+
+        pool = ThreadPool(options['workers'])
+        start = time.time()
+        last_id = 0
+        processed = failed = 0
+        try:
+            while True:
+                batch = list(ngrams.filter(id__gt=last_id).order_by('id')
+                             .values_list('id', 'ngram')[:options['batch']])
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+                results = pool.map(self._lookup, [ngram for _, ngram in batch])
+                self._store(results)
+                processed += len(results)
+                failed += len([error for _, _, error in results if error])
+                elapsed = time.time() - start
+                print '{0} processed, {1} failed, {2:.2f} n-grams/s'.format(processed, failed,
+                                                                           processed / elapsed)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _lookup(self, ngram):
+        """
+        :returns: (ngram, result count or None on error, error message)
+        :rtype: tuple
+        """
+        self.limiter.wait()
+        try:
+            return ngram, acm_search_result_count(ngram, self.url, cache=False), ''
+        except Exception:
+            return ngram, None, traceback.format_exc()
+
+    def _store(self, results):
+        """
+        Replace the rows of the batch n-grams, failed attempts are accumulated
+        :param results: list of (ngram, count, error) tuples
+        """
+        ngrams = [ngram for ngram, _, _ in results]
+        with transaction.commit_on_success():
+            attempts = dict(AcmSearchCount.objects.filter(ngram__in=ngrams)
+                            .values_list('ngram', 'attempts'))
+            AcmSearchCount.objects.filter(ngram__in=ngrams).delete()
+            AcmSearchCount.objects.bulk_create([
+                AcmSearchCount(ngram=ngram, count=count, error=error,
+                               status=AcmSearchCount.STATUS_FAILED if error else AcmSearchCount.STATUS_DONE,
+                               attempts=attempts.get(ngram, 0) + 1)
+                for ngram, count, error in results])
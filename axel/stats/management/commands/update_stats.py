@@ -1,11 +1,13 @@
 """Match extracted collocation with DBPedia entities"""
 from __future__ import division
-from collections import defaultdict
 from optparse import make_option
 
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
 
 from axel.articles.models import CLUSTERS_DICT
+from axel.articles.utils.db import bulk_update, write_behind
 from axel.stats.models import STATS_CLUSTERS_DICT
 from axel.libs.utils import print_progress
 
@@ -16,6 +18,11 @@ class Command(BaseCommand):
                     action='store',
                     dest='cluster',
                     help='cluster id for article type'),
+        make_option('--no-input', '--noinput',
+                    action='store_false',
+                    dest='interactive',
+                    default=True,
+                    help='create new and delete obsolete ngrams without prompting'),
     )
 
     help = 'Updates aggregated statistics for the specified cluster, like max POS tag, total counts'
@@ -25,52 +32,80 @@ class Command(BaseCommand):
         self.cluster_id = cluster_id = options['cluster']
         if not cluster_id:
             raise CommandError("need to specify cluster id")
+        self.interactive = options['interactive']
         self.Model = CLUSTERS_DICT[cluster_id].objects
         self.StatsModel = STATS_CLUSTERS_DICT[cluster_id].objects
+        print 'Collecting total counts...'
+        self.total_counts = self._collect_total_counts()
         # synchronize ngrams first
         self._add_delete_stats()
         self._update_total_counts()
+        self._update_occurrence_stats()
         self._update_max_pos_tags()
+        self._update_features()
+
+    def _collect_total_counts(self):
+        """
+        :returns: sum of article counts for each ngram of the cluster, single GROUP BY
+        :rtype: dict
+        """
+        return dict(self.Model.order_by().values_list('ngram').annotate(total=Sum('count')))
+
+    def _confirm(self, question):
+        if not self.interactive:
+            return True
+        return raw_input(question + ' (y/n): ') == 'y'
 
     def _update_total_counts(self):
         print 'Update total counts:'
-        self.StatsModel.all().update(count=0)
-        total_counts = defaultdict(lambda: 0)
-        print 'Collecting new counts...'
-        for ngram, count in print_progress(self.Model.values_list('ngram', 'count'), 10):
-            total_counts[ngram] += count
-        print 'Updating total counts...'
-        for ngram, count in print_progress(total_counts.items(), 5):
-            self.StatsModel.filter(ngram=ngram).update(count=count)
-            self.Model.filter(ngram=ngram).update(total_count=count)
+        stats_model = self.StatsModel.model
+        colloc_table = self.Model.model._meta.db_table
+        stats_table = stats_model._meta.db_table
+        qn = connection.ops.quote_name
+        with transaction.commit_on_success():
+            print 'Updating collection counts...'
+            self.StatsModel.all().update(count=0)
+            bulk_update(stats_model, 'count', self.total_counts.iteritems(), key='ngram')
+            print 'Updating article collocation total counts...'
+            cursor = connection.cursor()
+            cursor.execute('UPDATE {0} SET total_count = (SELECT {1}.count FROM {1} '
+                           'WHERE {1}.ngram = {0}.ngram) WHERE cluster_id = %s AND ngram IN '
+                           '(SELECT ngram FROM {1})'.format(qn(colloc_table), qn(stats_table)),
+                           [self.cluster_id])
+
+    def _update_occurrence_stats(self):
+        print 'Update document frequencies and count histograms'
+        STATS_CLUSTERS_DICT[self.cluster_id].update_occurrence_stats()
 
     def _update_max_pos_tags(self):
         print 'Update max POS tags'
         self.StatsModel.all().update(_max_pos_tag=None)
-        for c in print_progress(self.StatsModel.all(), 5):
-            _ = c.max_pos_tag
+        # computed tags are written in batches
+        with write_behind():
+            for c in print_progress(self.StatsModel.all(), 5):
+                _ = c.max_pos_tag
+
+    def _update_features(self):
+        print 'Update collocation features'
+        STATS_CLUSTERS_DICT[self.cluster_id].update_features()
 
     def _add_delete_stats(self):
-        cur_ngrams = set(self.Model.values_list('ngram', flat=True))
+        cur_ngrams = set(self.total_counts)
         cur_stat_ngrams = set(self.StatsModel.values_list('ngram', flat=True))
         print 'New ngrams:'
         new_ngrams = cur_ngrams.difference(cur_stat_ngrams)
         print new_ngrams
         if new_ngrams:
-            answer = raw_input('Create new? (y/n): ')
-            if answer == 'y':
+            if self._confirm('Create new?'):
                 for ngram in new_ngrams:
-                    count = sum(self.Model.filter(ngram=ngram).values_list('count', flat=True))
-                    stat_ngram = self.StatsModel.create(ngram=ngram, count=count)
-                    _ = stat_ngram.max_pos_tag
-                    self.Model.filter(ngram=ngram).update(total_count=count)
+                    # total counts and POS tags are updated afterwards
+                    self.StatsModel.create(ngram=ngram, count=self.total_counts[ngram])
                 print 'Created'
 
         print 'Obsolete ngrams:'
         obsolete = cur_stat_ngrams.difference(cur_ngrams)
         print obsolete
         if obsolete:
-            answer = raw_input('Delete? (y/n): ')
-            if answer == 'y':
+            if self._confirm('Delete?'):
                 self.StatsModel.filter(ngram__in=obsolete).delete()
                 print 'Deleted'
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'Collocations'
+        db.create_table(u'stats_collocations', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('ngram', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('count', self.gf('django.db.models.fields.IntegerField')(default=1)),
+            ('_extra_fields', self.gf('django.db.models.fields.TextField')(default='{}')),
+            ('_df_score', self.gf('django.db.models.fields.IntegerField')(null=True, blank=True)),
+            ('_max_pos_tag', self.gf('django.db.models.fields.CharField')(max_length=100, null=True)),
+            ('_pos_tag_prev', self.gf('django.db.models.fields.CharField')(max_length=100, null=True)),
+            ('_pos_tag_after', self.gf('django.db.models.fields.CharField')(max_length=100, null=True)),
+            ('_ms_ngram_score', self.gf('django.db.models.fields.DecimalField')(default=0, max_digits=9, decimal_places=6)),
+        ))
+        db.send_create_signal(u'stats', ['Collocations'])
+
+        # Adding model 'SWCollocations'
+        db.create_table(u'stats_swcollocations', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('ngram', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('count', self.gf('django.db.models.fields.IntegerField')(default=1)),
+            ('_extra_fields', self.gf('django.db.models.fields.TextField')(default='{}')),
+            ('_df_score', self.gf('django.db.models.fields.IntegerField')(null=True, blank=True)),
+            ('_max_pos_tag', self.gf('django.db.models.fields.CharField')(max_length=100, null=True)),
+            ('_pos_tag_prev', self.gf('django.db.models.fields.CharField')(max_length=100, null=True)),
+            ('_pos_tag_after', self.gf('django.db.models.fields.CharField')(max_length=100, null=True)),
+            ('_ms_ngram_score', self.gf('django.db.models.fields.DecimalField')(default=0, max_digits=9, decimal_places=6)),
+        ))
+        db.send_create_signal(u'stats', ['SWCollocations'])
+
+    def backwards(self, orm):
+        # Deleting model 'Collocations'
+        db.delete_table(u'stats_collocations')
+
+        # Deleting model 'SWCollocations'
+        db.delete_table(u'stats_swcollocations')
+
+    models = {
+        u'stats.collocations': {
+            'Meta': {'ordering': "['-count']", 'object_name': 'Collocations'},
+            '_df_score': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            '_extra_fields': ('django.db.models.fields.TextField', [], {'default': "'{}'"}),
+            '_max_pos_tag': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_ms_ngram_score': ('django.db.models.fields.DecimalField', [], {'default': '0', 'max_digits': '9', 'decimal_places': '6'}),
+            '_pos_tag_after': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_pos_tag_prev': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '1'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        },
+        u'stats.swcollocations': {
+            'Meta': {'ordering': "['-count']", 'object_name': 'SWCollocations'},
+            '_df_score': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            '_extra_fields': ('django.db.models.fields.TextField', [], {'default': "'{}'"}),
+            '_max_pos_tag': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_ms_ngram_score': ('django.db.models.fields.DecimalField', [], {'default': '0', 'max_digits': '9', 'decimal_places': '6'}),
+            '_pos_tag_after': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_pos_tag_prev': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '1'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'max_length': '255'})
+        }
+    }
+
+    complete_apps = ['stats']
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+from django.db.models import Count, Sum
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Merge duplicated n-grams before adding the constraint
+        for model in (orm.Collocations, orm.SWCollocations):
+            duplicates = model.objects.values('ngram').annotate(num=Count('id'))\
+                .filter(num__gt=1).values_list('ngram', flat=True)
+            for ngram in duplicates:
+                rows = model.objects.filter(ngram=ngram).order_by('id')
+                count = rows.aggregate(count=Sum('count'))['count']
+                rows.exclude(id=rows[0].id).delete()
+                model.objects.filter(ngram=ngram).update(count=count)
+
+        # Adding unique constraint on 'Collocations', fields ['ngram']
+        db.create_unique(u'stats_collocations', ['ngram'])
+
+        # Adding unique constraint on 'SWCollocations', fields ['ngram']
+        db.create_unique(u'stats_swcollocations', ['ngram'])
+
+    def backwards(self, orm):
+        # Removing unique constraint on 'SWCollocations', fields ['ngram']
+        db.delete_unique(u'stats_swcollocations', ['ngram'])
+
+        # Removing unique constraint on 'Collocations', fields ['ngram']
+        db.delete_unique(u'stats_collocations', ['ngram'])
+
+    models = {
+        u'stats.collocations': {
+            'Meta': {'ordering': "['-count']", 'object_name': 'Collocations'},
+            '_df_score': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            '_extra_fields': ('django.db.models.fields.TextField', [], {'default': "'{}'"}),
+            '_max_pos_tag': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_ms_ngram_score': ('django.db.models.fields.DecimalField', [], {'default': '0', 'max_digits': '9', 'decimal_places': '6'}),
+            '_pos_tag_after': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_pos_tag_prev': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '1'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '255'})
+        },
+        u'stats.swcollocations': {
+            'Meta': {'ordering': "['-count']", 'object_name': 'SWCollocations'},
+            '_df_score': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            '_extra_fields': ('django.db.models.fields.TextField', [], {'default': "'{}'"}),
+            '_max_pos_tag': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_ms_ngram_score': ('django.db.models.fields.DecimalField', [], {'default': '0', 'max_digits': '9', 'decimal_places': '6'}),
+            '_pos_tag_after': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_pos_tag_prev': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '1'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '255'})
+        }
+    }
+
+    complete_apps = ['stats']
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding field 'Collocations._occur_distribution'
+        db.add_column(u'stats_collocations', '_occur_distribution',
+                      self.gf('django.db.models.fields.TextField')(null=True, blank=True),
+                      keep_default=False)
+
+        # Adding field 'SWCollocations._occur_distribution'
+        db.add_column(u'stats_swcollocations', '_occur_distribution',
+                      self.gf('django.db.models.fields.TextField')(null=True, blank=True),
+                      keep_default=False)
+
+    def backwards(self, orm):
+        # Deleting field 'Collocations._occur_distribution'
+        db.delete_column(u'stats_collocations', '_occur_distribution')
+
+        # Deleting field 'SWCollocations._occur_distribution'
+        db.delete_column(u'stats_swcollocations', '_occur_distribution')
+
+    models = {
+        u'stats.collocations': {
+            'Meta': {'ordering': "['-count']", 'object_name': 'Collocations'},
+            '_df_score': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            '_extra_fields': ('django.db.models.fields.TextField', [], {'default': "'{}'"}),
+            '_max_pos_tag': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_occur_distribution': ('django.db.models.fields.TextField', [], {'null': 'True', 'blank': 'True'}),
+            '_ms_ngram_score': ('django.db.models.fields.DecimalField', [], {'default': '0', 'max_digits': '9', 'decimal_places': '6'}),
+            '_pos_tag_after': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_pos_tag_prev': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '1'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '255'})
+        },
+        u'stats.swcollocations': {
+            'Meta': {'ordering': "['-count']", 'object_name': 'SWCollocations'},
+            '_df_score': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            '_extra_fields': ('django.db.models.fields.TextField', [], {'default': "'{}'"}),
+            '_max_pos_tag': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_occur_distribution': ('django.db.models.fields.TextField', [], {'null': 'True', 'blank': 'True'}),
+            '_ms_ngram_score': ('django.db.models.fields.DecimalField', [], {'default': '0', 'max_digits': '9', 'decimal_places': '6'}),
+            '_pos_tag_after': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_pos_tag_prev': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '1'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '255'})
+        }
+    }
+
+    complete_apps = ['stats']
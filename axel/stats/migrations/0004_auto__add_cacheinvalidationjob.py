@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'CacheInvalidationJob'
+        db.create_table(u'stats_cacheinvalidationjob', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('model_name', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('attribute', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('status', self.gf('django.db.models.fields.CharField')(default='pending', max_length=10)),
+            ('total', self.gf('django.db.models.fields.IntegerField')(default=0)),
+            ('processed', self.gf('django.db.models.fields.IntegerField')(default=0)),
+            ('error', self.gf('django.db.models.fields.TextField')(default='', blank=True)),
+            ('created', self.gf('django.db.models.fields.DateTimeField')(auto_now_add=True, blank=True)),
+            ('finished', self.gf('django.db.models.fields.DateTimeField')(null=True, blank=True)),
+        ))
+        db.send_create_signal(u'stats', ['CacheInvalidationJob'])
+
+    def backwards(self, orm):
+        # Deleting model 'CacheInvalidationJob'
+        db.delete_table(u'stats_cacheinvalidationjob')
+
+    models = {
+        u'stats.cacheinvalidationjob': {
+            'Meta': {'ordering': "['-created']", 'object_name': 'CacheInvalidationJob'},
+            'attribute': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'created': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'error': ('django.db.models.fields.TextField', [], {'default': "''", 'blank': 'True'}),
+            'finished': ('django.db.models.fields.DateTimeField', [], {'null': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'model_name': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'processed': ('django.db.models.fields.IntegerField', [], {'default': '0'}),
+            'status': ('django.db.models.fields.CharField', [], {'default': "'pending'", 'max_length': '10'}),
+            'total': ('django.db.models.fields.IntegerField', [], {'default': '0'})
+        },
+        u'stats.collocations': {
+            'Meta': {'ordering': "['-count']", 'object_name': 'Collocations'},
+            '_df_score': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            '_extra_fields': ('django.db.models.fields.TextField', [], {'default': "'{}'"}),
+            '_max_pos_tag': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_occur_distribution': ('django.db.models.fields.TextField', [], {'null': 'True', 'blank': 'True'}),
+            '_ms_ngram_score': ('django.db.models.fields.DecimalField', [], {'default': '0', 'max_digits': '9', 'decimal_places': '6'}),
+            '_pos_tag_after': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_pos_tag_prev': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '1'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '255'})
+        },
+        u'stats.swcollocations': {
+            'Meta': {'ordering': "['-count']", 'object_name': 'SWCollocations'},
+            '_df_score': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            '_extra_fields': ('django.db.models.fields.TextField', [], {'default': "'{}'"}),
+            '_max_pos_tag': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_occur_distribution': ('django.db.models.fields.TextField', [], {'null': 'True', 'blank': 'True'}),
+            '_ms_ngram_score': ('django.db.models.fields.DecimalField', [], {'default': '0', 'max_digits': '9', 'decimal_places': '6'}),
+            '_pos_tag_after': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_pos_tag_prev': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '1'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '255'})
+        }
+    }
+
+    complete_apps = ['stats']
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'CollocationFeature'
+        db.create_table(u'stats_collocationfeature', (
+            (u'id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('cluster_id', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('ngram', self.gf('django.db.models.fields.CharField')(max_length=255)),
+            ('pos_tag', self.gf('django.db.models.fields.CharField')(max_length=100, null=True, db_index=True)),
+            ('pos_start', self.gf('django.db.models.fields.CharField')(max_length=30, null=True, db_index=True)),
+            ('pos_end', self.gf('django.db.models.fields.CharField')(max_length=30, null=True, db_index=True)),
+            ('is_dbpedia', self.gf('django.db.models.fields.BooleanField')(default=False, db_index=True)),
+            ('is_dblp', self.gf('django.db.models.fields.BooleanField')(default=False, db_index=True)),
+            ('is_wiki_redirect', self.gf('django.db.models.fields.BooleanField')(default=False, db_index=True)),
+            ('df', self.gf('django.db.models.fields.IntegerField')(default=0, db_index=True)),
+            ('count', self.gf('django.db.models.fields.IntegerField')(default=0, db_index=True)),
+            ('ms_ngram_score', self.gf('django.db.models.fields.FloatField')(default=0, db_index=True)),
+        ))
+        db.send_create_signal(u'stats', ['CollocationFeature'])
+
+        # Adding unique constraint on 'CollocationFeature', fields ['cluster_id', 'ngram']
+        db.create_unique(u'stats_collocationfeature', ['cluster_id', 'ngram'])
+
+    def backwards(self, orm):
+        # Removing unique constraint on 'CollocationFeature', fields ['cluster_id', 'ngram']
+        db.delete_unique(u'stats_collocationfeature', ['cluster_id', 'ngram'])
+
+        # Deleting model 'CollocationFeature'
+        db.delete_table(u'stats_collocationfeature')
+
+    models = {
+        u'stats.cacheinvalidationjob': {
+            'Meta': {'ordering': "['-created']", 'object_name': 'CacheInvalidationJob'},
+            'attribute': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'created': ('django.db.models.fields.DateTimeField', [], {'auto_now_add': 'True', 'blank': 'True'}),
+            'error': ('django.db.models.fields.TextField', [], {'default': "''", 'blank': 'True'}),
+            'finished': ('django.db.models.fields.DateTimeField', [], {'null': 'True', 'blank': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'model_name': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'processed': ('django.db.models.fields.IntegerField', [], {'default': '0'}),
+            'status': ('django.db.models.fields.CharField', [], {'default': "'pending'", 'max_length': '10'}),
+            'total': ('django.db.models.fields.IntegerField', [], {'default': '0'})
+        },
+        u'stats.collocationfeature': {
+            'Meta': {'unique_together': "(('cluster_id', 'ngram'),)", 'object_name': 'CollocationFeature'},
+            'cluster_id': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '0', 'db_index': 'True'}),
+            'df': ('django.db.models.fields.IntegerField', [], {'default': '0', 'db_index': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'is_dblp': ('django.db.models.fields.BooleanField', [], {'default': 'False', 'db_index': 'True'}),
+            'is_dbpedia': ('django.db.models.fields.BooleanField', [], {'default': 'False', 'db_index': 'True'}),
+            'is_wiki_redirect': ('django.db.models.fields.BooleanField', [], {'default': 'False', 'db_index': 'True'}),
+            'ms_ngram_score': ('django.db.models.fields.FloatField', [], {'default': '0', 'db_index': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'pos_end': ('django.db.models.fields.CharField', [], {'max_length': '30', 'null': 'True', 'db_index': 'True'}),
+            'pos_start': ('django.db.models.fields.CharField', [], {'max_length': '30', 'null': 'True', 'db_index': 'True'}),
+            'pos_tag': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True', 'db_index': 'True'})
+        },
+        u'stats.collocations': {
+            'Meta': {'ordering': "['-count']", 'object_name': 'Collocations'},
+            '_df_score': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            '_extra_fields': ('django.db.models.fields.TextField', [], {'default': "'{}'"}),
+            '_max_pos_tag': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_occur_distribution': ('django.db.models.fields.TextField', [], {'null': 'True', 'blank': 'True'}),
+            '_ms_ngram_score': ('django.db.models.fields.DecimalField', [], {'default': '0', 'max_digits': '9', 'decimal_places': '6'}),
+            '_pos_tag_after': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_pos_tag_prev': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '1'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '255'})
+        },
+        u'stats.swcollocations': {
+            'Meta': {'ordering': "['-count']", 'object_name': 'SWCollocations'},
+            '_df_score': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            '_extra_fields': ('django.db.models.fields.TextField', [], {'default': "'{}'"}),
+            '_max_pos_tag': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_occur_distribution': ('django.db.models.fields.TextField', [], {'null': 'True', 'blank': 'True'}),
+            '_ms_ngram_score': ('django.db.models.fields.DecimalField', [], {'default': '0', 'max_digits': '9', 'decimal_places': '6'}),
+            '_pos_tag_after': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            '_pos_tag_prev': ('django.db.models.fields.CharField', [], {'max_length': '100', 'null': 'True'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '1'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'ngram': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '255'})
+        }
+    }
+
+    complete_apps = ['stats']
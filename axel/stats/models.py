@@ -1,24 +1,29 @@
 from __future__ import division
 import json
+import operator
 
 from collections import defaultdict
-from django.db import models
+from datetime import timedelta
+from django.db import models, transaction
+from django.db.models import Count, Q
 from django import forms
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from axel.articles.utils.db import db_cache_simple, db_cache
-from axel.libs.external_match import perform_match
+from axel.articles.utils.db import db_cache_simple, db_cache, bulk_update, BULK_UPDATE_BATCH
 import axel.stats.scores as scores
 
 
 class Collocation(models.Model):
     """Aggregated collocation statistics model"""
-    ngram = models.CharField(max_length=255)
+    ngram = models.CharField(max_length=255, unique=True)
     count = models.IntegerField(default=1)
     # extra fields will store pre-computed scores
     _extra_fields = models.TextField(default='{}')
     _df_score = models.IntegerField(null=True, blank=True)
+    # histogram of the n-gram counts inside articles, as [[count, articles], ...]
+    _occur_distribution = models.TextField(null=True, blank=True)
     _max_pos_tag = models.CharField(null=True, max_length=100)
     _pos_tag_prev = models.CharField(null=True, max_length=100)
     _pos_tag_after = models.CharField(null=True, max_length=100)
@@ -26,7 +31,13 @@ class Collocation(models.Model):
 
     CLUSTER_ID = 'ABSTRACT'
     CACHED_FIELDS = ()
-    FILTERED_FIELDS = ()
+    # (feature attribute, label, form field, lookup), filtered over CollocationFeature
+    FILTERED_FIELDS = (('pos_tag', 'Part of Speech', forms.CharField, 'exact'),
+                       ('pos_start', 'Compressed POS start', forms.CharField, 'exact'),
+                       ('pos_end', 'Compressed POS end', forms.CharField, 'exact'),
+                       ('is_dbpedia', 'DBpedia', forms.NullBooleanField, 'exact'),
+                       ('is_dblp', 'DBLP', forms.NullBooleanField, 'exact'),
+                       ('df', 'Min document frequency', forms.IntegerField, 'gte'))
 
     class Meta:
         """Meta info"""
@@ -43,17 +54,39 @@ class Collocation(models.Model):
         :rtype: QuerySet
         """
         from axel.articles.models import ArticleCollocation
-        return ArticleCollocation.objects.filter(article__cluster_id=self.CLUSTER_ID)
+        return ArticleCollocation.objects.filter(cluster_id=self.CLUSTER_ID)
 
     @property
     def extra_fields(self):
-        """Load from json"""
-        return json.loads(self._extra_fields)
+        """
+        Load from json, the stored value is parsed only once per instance,
+        parsed dict is kept until `_extra_fields` is replaced.
+        :rtype: dict
+        """
+        cached = self.__dict__.get('_extra_fields_cache')
+        if cached is None or cached[0] is not self._extra_fields:
+            cached = (self._extra_fields, json.loads(self._extra_fields))
+            self._extra_fields_cache = cached
+        return cached[1]
 
     @extra_fields.setter
     def extra_fields(self, value):
-        """Convert to json"""
-        self._extra_fields = json.dumps(value)
+        """Mark as modified, conversion to json happens on save"""
+        self._extra_fields_cache = (self._extra_fields, value)
+        self._extra_fields_dirty = True
+
+    def serialize_extra_fields(self):
+        """Convert to compact json if extra fields were modified"""
+        if self.__dict__.get('_extra_fields_dirty'):
+            value = self._extra_fields_cache[1]
+            self._extra_fields = json.dumps(value, separators=(',', ':'))
+            self._extra_fields_cache = (self._extra_fields, value)
+            self._extra_fields_dirty = False
+
+    def save_base(self, *args, **kwargs):
+        """Serialize modified extra fields before any save, including raw ones"""
+        self.serialize_extra_fields()
+        super(Collocation, self).save_base(*args, **kwargs)
 
     @property
     @db_cache('extra_fields')
@@ -66,17 +99,10 @@ class Collocation(models.Model):
 
     @property
     def wikipedia_text(self):
-        import requests
-        from django.utils.html import strip_tags
-        from axel.libs import nlp
+        from axel.stats.wiki_text import wiki_texts
         if not 'dbpedia' in self.source:
             return ''
-        query = u'http://en.wikipedia.org/w/api.php?action=parse&page={0}&redirects&format=json'
-        result = json.loads(requests.get(query.format(self.ngram.replace(' ', '_'))).text)
-        try:
-            return nlp.Stemmer.stem_wordnet(strip_tags(result['parse']['text']['*']))
-        except KeyError:
-            return ''
+        return wiki_texts.text(self.ngram)
 
     @property
     def count_score(self):
@@ -121,31 +147,111 @@ class Collocation(models.Model):
     @db_cache_simple
     def df_score(self):
         """
-        Document frequency
+        Document frequency, precomputed by update_occurrence_stats
         :rtype: int
         """
-        from axel.articles.models import ArticleCollocation
-        return ArticleCollocation.objects.filter(ngram=self.ngram).count()
+        return self.occurrence_stats([self.ngram])[self.ngram][0]
 
     @property
+    @db_cache_simple
     def occur_distribution(self):
         """
+        Precomputed by update_occurrence_stats
         :rtype: str
         :returns: histogram data in a string form suitable for highcharts
         """
-        counts = defaultdict(lambda: 0)
-        for count in self._articlecollocations.filter(ngram=self.ngram).values_list('count',
-                                                                                    flat=True):
-            counts[count] += 1
+        return self.occurrence_stats([self.ngram])[self.ngram][1]
+
+    @classmethod
+    def occurrence_stats(cls, ngrams=None):
+        """
+        Calculate document frequency and count histogram with a single GROUP BY pass
+        over the article collocations of the cluster.
+        :param ngrams: n-grams to calculate for, all collection n-grams by default
+        :rtype: dict
+        :returns: dict of the form {ngram: (df, histogram data)}
+        """
+        from axel.articles.models import ArticleCollocation
+        queryset = ArticleCollocation.objects.filter(cluster_id=cls.CLUSTER_ID)
+        if ngrams is None:
+            ngrams = cls.objects.values_list('ngram', flat=True)
+        else:
+            queryset = queryset.filter(ngram__in=ngrams)
+        histograms = defaultdict(list)
+        # reset ordering, otherwise ordering fields get into GROUP BY
+        for ngram, count, articles in queryset.order_by().values_list('ngram', 'count')\
+                .annotate(articles=Count('id')):
+            histograms[ngram].append([count, articles])
 
-        histogram_data = str(sorted(counts.items())).replace('(', '[').replace(')', ']')
-        return histogram_data
+        result = {}
+        for ngram in ngrams:
+            histogram = sorted(histograms[ngram])
+            result[ngram] = (sum([articles for count, articles in histogram]),
+                             json.dumps(histogram))
+        return result
+
+    @classmethod
+    def update_occurrence_stats(cls, ngrams=None):
+        """
+        Store document frequencies and count histograms for the specified n-grams
+        :param ngrams: n-grams to update, all collection n-grams by default
+        """
+        stats = cls.occurrence_stats(ngrams)
+        with transaction.commit_on_success():
+            bulk_update(cls, '_df_score', [(ngram, df) for ngram, (df, _) in stats.iteritems()],
+                        key='ngram')
+            bulk_update(cls, '_occur_distribution', [(ngram, histogram) for ngram, (_, histogram)
+                                                     in stats.iteritems()], key='ngram')
+
+    @classmethod
+    def feature_ngrams(cls, **lookups):
+        """
+        N-grams of the cluster with the features matching lookups, usable as a subquery
+        :rtype: QuerySet
+        """
+        return CollocationFeature.objects.filter(cluster_id=cls.CLUSTER_ID, **lookups)\
+            .values('ngram')
+
+    @classmethod
+    def source_ngrams(cls, ngrams, sources):
+        """
+        N-grams matched in any of the external sources, read from the feature table or
+        from the cached source field while update_stats has not filled the table
+        :param ngrams: n-grams to check, list or values('ngram') subquery
+        :param sources: source names, like 'dbpedia' and 'wiki_redirect'
+        :rtype: set
+        """
+        features = CollocationFeature.objects.filter(cluster_id=cls.CLUSTER_ID)
+        if features.exists():
+            lookup = reduce(operator.or_, [Q(**{'is_' + source: True}) for source in sources])
+            return set(features.filter(lookup, ngram__in=ngrams).values_list('ngram', flat=True))
+        return set(collocation.ngram for collocation in cls.objects.filter(ngram__in=ngrams)
+                   if set(sources).intersection(collocation.source))
+
+    @classmethod
+    def features_dict(cls, ngrams=None):
+        """
+        :param ngrams: n-grams to load features for, all cluster n-grams by default
+        :rtype: dict
+        :returns: dict of the form {ngram: CollocationFeature}
+        """
+        queryset = CollocationFeature.objects.filter(cluster_id=cls.CLUSTER_ID)
+        if ngrams is not None:
+            queryset = queryset.filter(ngram__in=ngrams)
+        return dict((feature.ngram, feature) for feature in queryset)
+
+    @classmethod
+    def update_features(cls, ngrams=None):
+        """
+        Rebuild feature rows from the cached statistics
+        :param ngrams: n-grams to update, all collection n-grams by default
+        """
+        CollocationFeature.refresh(cls, ngrams)
 
 
 class Collocations(Collocation):
     """Aggregated collocation statistics model for Computer Science"""
     CACHED_FIELDS = ('context',)
-    FILTERED_FIELDS = (('_pos_tag', 'Part of Speech', forms.CharField),)
     CLUSTER_ID = 'CS_COLLOCS'
 
 
@@ -165,16 +271,199 @@ class SWCollocations(Collocation):
         return self.ngram in scores.ontology
 
 
+class CollocationFeature(models.Model):
+    """
+    Typed copy of the collocation features scattered across POS tag columns and
+    extra fields JSON, indexed for filtering and classification
+    """
+    cluster_id = models.CharField(max_length=255)
+    ngram = models.CharField(max_length=255)
+    pos_tag = models.CharField(max_length=100, null=True, db_index=True)
+    # compressed first and last tags, see RULES_DICT_START and RULES_DICT_END
+    pos_start = models.CharField(max_length=30, null=True, db_index=True)
+    pos_end = models.CharField(max_length=30, null=True, db_index=True)
+    is_dbpedia = models.BooleanField(default=False, db_index=True)
+    is_dblp = models.BooleanField(default=False, db_index=True)
+    is_wiki_redirect = models.BooleanField(default=False, db_index=True)
+    df = models.IntegerField(default=0, db_index=True)
+    count = models.IntegerField(default=0, db_index=True)
+    ms_ngram_score = models.FloatField(default=0, db_index=True)
+
+    class Meta:
+        """Meta info"""
+        unique_together = ('cluster_id', 'ngram')
+
+    def __unicode__(self):
+        """String representation"""
+        return u'{0}: {1}'.format(self.cluster_id, self.ngram)
+
+    @classmethod
+    def from_collocation(cls, collocation):
+        """
+        :type collocation: Collocation
+        :rtype: CollocationFeature
+        """
+        max_pos_tag = collocation._max_pos_tag
+        source = collocation.extra_fields.get('source', [])
+        feature = cls(cluster_id=collocation.CLUSTER_ID, ngram=collocation.ngram,
+                      pos_tag=max_pos_tag, is_dbpedia='dbpedia' in source,
+                      is_dblp='dblp' in source, is_wiki_redirect='wiki_redirect' in source,
+                      df=collocation._df_score or 0, count=collocation.count,
+                      ms_ngram_score=float(collocation._ms_ngram_score or 0))
+        if max_pos_tag:
+            feature.pos_start = scores.compress_pos_tag(max_pos_tag, scores.RULES_DICT_START)
+            feature.pos_end = scores.compress_pos_tag(max_pos_tag, scores.RULES_DICT_END)
+        return feature
+
+    @classmethod
+    def refresh(cls, model, ngrams=None):
+        """
+        Replace feature rows of the stats model n-grams, POS tags and source are taken as
+        cached, missing values are not computed here
+        :param ngrams: n-grams to refresh, all model n-grams by default
+        :type model: Collocation
+        """
+        collocations = model.objects.all()
+        features = cls.objects.filter(cluster_id=model.CLUSTER_ID)
+        if ngrams is not None:
+            collocations = collocations.filter(ngram__in=ngrams)
+            features = features.filter(ngram__in=ngrams)
+        new_features = [cls.from_collocation(collocation) for collocation in
+                        collocations.only('ngram', 'count', '_extra_fields', '_max_pos_tag',
+                                          '_df_score', '_ms_ngram_score')]
+        with transaction.commit_on_success():
+            features.delete()
+            cls.objects.bulk_create(new_features, batch_size=BULK_UPDATE_BATCH)
+
+
+class CacheInvalidationJob(models.Model):
+    """Background removal of a cached attribute from the extra fields of a model"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = ((STATUS_PENDING, 'Pending'), (STATUS_RUNNING, 'Running'),
+                      (STATUS_DONE, 'Done'), (STATUS_FAILED, 'Failed'))
+    # unfinished job without a heartbeat for this long has lost its worker
+    STALE_AFTER = timedelta(minutes=5)
+
+    model_name = models.CharField(max_length=255)
+    attribute = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # number of rows that may contain the attribute and number of rows already checked
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    error = models.TextField(default='', blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    # updated by the worker on every processed chunk
+    heartbeat = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """Meta info"""
+        ordering = ['-created']
+
+    def __unicode__(self):
+        """String representation"""
+        return u'{0}.{1}: {2}'.format(self.model_name, self.attribute, self.status)
+
+    @classmethod
+    def stale(cls):
+        """
+        Unfinished jobs whose worker stopped updating the heartbeat
+        :rtype: QuerySet
+        """
+        deadline = timezone.now() - cls.STALE_AFTER
+        # jobs started before heartbeats were recorded have none
+        return cls.objects.filter(Q(heartbeat__lt=deadline) |
+                                  Q(heartbeat__isnull=True, created__lt=deadline),
+                                  status__in=(cls.STATUS_PENDING, cls.STATUS_RUNNING))
+
+    def as_dict(self):
+        """
+        :returns: job progress, suitable for json
+        :rtype: dict
+        """
+        return {'job_id': self.id, 'model_name': self.model_name, 'attribute': self.attribute,
+                'status': self.status, 'total': self.total, 'processed': self.processed,
+                'error': self.error}
+
+
+class EnrichmentTask(models.Model):
+    """
+    Queued lookup of the collocation source in DBPedia and DBLP,
+    processed by the enrich_collocations command
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = ((STATUS_PENDING, 'Pending'), (STATUS_DONE, 'Done'),
+                      (STATUS_FAILED, 'Failed'))
+
+    cluster_id = models.CharField(max_length=255)
+    ngram = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING,
+                              db_index=True)
+    attempts = models.IntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Meta info"""
+        unique_together = ('cluster_id', 'ngram')
+
+    def __unicode__(self):
+        """String representation"""
+        return u'{0}: {1} ({2})'.format(self.cluster_id, self.ngram, self.status)
+
+    @classmethod
+    def enqueue(cls, cluster_id, ngram):
+        """Schedule the lookup, pending lookups are not duplicated"""
+        task, created = cls.objects.get_or_create(cluster_id=cluster_id, ngram=ngram)
+        if not created and task.status != cls.STATUS_PENDING:
+            cls.objects.filter(pk=task.pk).update(status=cls.STATUS_PENDING, attempts=0)
+
+
+class AcmSearchCount(models.Model):
+    """
+    Number of ACM Digital Library results for the exact n-gram phrase,
+    filled by the score_acm command
+    """
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = ((STATUS_DONE, 'Done'), (STATUS_FAILED, 'Failed'))
+
+    ngram = models.CharField(max_length=255, unique=True)
+    count = models.IntegerField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, db_index=True)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(default='', blank=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __unicode__(self):
+        """String representation"""
+        return u'{0}: {1}'.format(self.ngram, self.count)
+
+    @classmethod
+    def counts(cls, ngrams):
+        """
+        :returns: dict of the form {ngram: result count} for the scored n-grams
+        :rtype: dict
+        """
+        return dict(cls.objects.filter(ngram__in=ngrams, status=cls.STATUS_DONE)
+                    .values_list('ngram', 'count'))
+
+
 def set_source_field(sender, instance, created, **kwargs):
     """
-    Increment collocation count on create for ArticleCollocation
-    :type instance: ArticleCollocation
+    Queue the external source lookup on create for the stats collocation,
+    lookup runs outside of the request or import
+    :type instance: Collocation
     """
     if kwargs.get('raw'):
         return
     if created:
-        instance.extra_fields = {'source': perform_match(instance)}
-        instance.save_base(raw=True)
+        EnrichmentTask.enqueue(instance.CLUSTER_ID, instance.ngram)
 
 post_save.connect(set_source_field, sender=Collocations)
 post_save.connect(set_source_field, sender=SWCollocations)
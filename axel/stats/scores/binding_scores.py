@@ -280,13 +280,9 @@ def populate_article_dict(model, score_func, cutoff=1):
     :type model: Model
     """
     article_dict = defaultdict(dict)
-    article_rel_dict = defaultdict(dict)
-    for key, is_rel in model.judged_data.iteritems():
-        ngram, article_id = key.split(',')
-        is_rel = int(is_rel)
-        article_rel_dict[article_id][ngram] = is_rel
 
     for article in print_progress(Article.objects.filter(cluster_id=model.CLUSTER_ID)):
+        judged_ngrams = model.judged_data.for_article(article.id)
         text = article.stemmed_text
         # create correspondence dict
         corr_dict1 = defaultdict(set)
@@ -304,7 +300,7 @@ def populate_article_dict(model, score_func, cutoff=1):
                 if p_ngram != ngram.ngram and ngram.ngram in p_ngram:
                     part_count += 1
             try:
-                is_rel = article_rel_dict[unicode(article)][ngram.ngram]
+                is_rel = judged_ngrams[ngram.ngram]
             except KeyError:
                 continue
             ngram_abs_count = text.count(ngram.ngram)
@@ -331,13 +327,9 @@ def populate_article_dict_ML(model, cutoff=1):
     :type model: Model
     """
     article_dict = defaultdict(dict)
-    article_rel_dict = defaultdict(dict)
-    for key, is_rel in model.judged_data.iteritems():
-        ngram, article_id = key.split(',')
-        is_rel = int(is_rel)
-        article_rel_dict[article_id][ngram] = is_rel
 
     for article in print_progress(Article.objects.filter(cluster_id=model.CLUSTER_ID)):
+        judged_ngrams = model.judged_data.for_article(article.id)
         text = article.stemmed_text
         # create correspondence dict
         all_ngrams = list(model.objects.filter(article=article).values_list('ngram', flat=True))
@@ -348,7 +340,7 @@ def populate_article_dict_ML(model, cutoff=1):
                 if p_ngram != ngram.ngram and ngram.ngram in p_ngram:
                     part_count += 1
             try:
-                is_rel = article_rel_dict[unicode(article)][ngram.ngram]
+                is_rel = judged_ngrams[ngram.ngram]
             except KeyError:
                 continue
             ngram_abs_count = text.count(ngram.ngram)
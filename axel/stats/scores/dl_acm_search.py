@@ -1,30 +1,40 @@
 from lxml import html
-import urllib
-import requests
 import re
 
+from axel.libs.http import http_client
 
+
+ACM_SEARCH_URL = 'http://dl.acm.org/results.cfm'
+HEADERS = {'User-Agent': "Mozilla/6.0 (Windows NT 6.2; WOW64; rv:16.0.1) Gecko/20121011 Firefox/16.0.1"}
 COUNT_RE = re.compile(r'Results 1 - \d{1,2} of ([\d,]+)')
 TITLE_RE = re.compile(r'<A HREF=".*?" class="medium-text" target="_self">(.*?)</A>')
 
 
-def acm_search_result_count(ngram):
-    """Get search result count from ACM Digital Library"""
-    headers = {'User-Agent': "Mozilla/6.0 (Windows NT 6.2; WOW64; rv:16.0.1) Gecko/20121011 Firefox/16.0.1"}
-    #lxml_content = html.fromstring(requests.get('http://dl.acm.org', headers=headers).content)
-    # extract search form action
-    ngram = urllib.quote_plus(ngram.encode('utf-8'))
-    result = requests.get('http://dl.acm.org/results.cfm?query=%22{0}%22'.format(ngram),
-                          headers=headers).content
-    return int(COUNT_RE.findall(result)[0].replace(',', ''))
+def _search(query, url=ACM_SEARCH_URL, cache=True):
+    """
+    :returns: content of the ACM DL results page for the exact phrase query
+    :rtype: str
+    :raises IOError: on unsuccessful responses
+    """
+    response = http_client.get(url, params={'query': u'"{0}"'.format(query)}, headers=HEADERS,
+                               cache=cache)
+    if response.status_code != 200:
+        raise IOError('ACM DL responded with status {0}'.format(response.status_code))
+    return response.content
+
+
+def acm_search_result_count(ngram, url=ACM_SEARCH_URL, cache=True):
+    """
+    Get search result count from ACM Digital Library
+    :param url: search page, replaced by a local server in tests
+    :raises ValueError: when the page has no result count
+    """
+    counts = COUNT_RE.findall(_search(ngram, url, cache))
+    if not counts:
+        raise ValueError(u'No result count for {0}'.format(ngram))
+    return int(counts[0].replace(',', ''))
 
 
 def acm_search_result_title(title):
     """Get search result count from ACM Digital Library"""
-    headers = {'User-Agent': "Mozilla/6.0 (Windows NT 6.2; WOW64; rv:16.0.1) Gecko/20121011 Firefox/16.0.1"}
-    #lxml_content = html.fromstring(requests.get('http://dl.acm.org', headers=headers).content)
-    # extract search form action
-    ngram = urllib.quote_plus(title.encode('utf-8'))
-    result = requests.get('http://dl.acm.org/results.cfm?query=%22{0}%22'.format(ngram),
-                          headers=headers).content
-    return TITLE_RE.findall(result)[0]
+    return TITLE_RE.findall(_search(title))[0]
@@ -1,10 +1,30 @@
 """Part-of-speech calculation"""
 from collections import defaultdict
+import re
 import nltk
 
 from axel.libs.nlp import Stemmer
 
 
+# compression rules for the first and the last tag of the ngram POS tag
+RULES_DICT_START = [(u'STOP_WORD', re.compile(r'(NONE|DT|CC|MD|RP|JJR|JJS|\:)')),
+                    (u'NUMBER_STARTS', re.compile('^CD')),
+                    (u'ADVERB_STARTS', re.compile('^RB')),
+                    (u'PREP_START', re.compile(r'(^IN)')),
+                    (u'NNS_START', re.compile(r'^NNS')),
+                    (u'VB_STARTS', re.compile(r'^VB')),
+                    (u'NN_STARTS', re.compile(r'^NN')),
+                    (u'JJ_STARTS', re.compile(r'^JJ'))]
+RULES_DICT_END = [(u'STOP_WORD', re.compile(r'(NONE|DT|CC|MD|RP|JJR|JJS|\:)')),
+                  (u'NUMBER_ENDS', re.compile('CD$')),
+                  (u'ADVERB_ENDS', re.compile('RB.?$')),
+                  (u'PREP_ENDS', re.compile(r'(IN$)')),
+                  (u'NNS_ENDS', re.compile(r'NNS$')),
+                  (u'VB_ENDS', re.compile(r'VB.?$')),
+                  (u'NN_ENDS', re.compile(r'NN(P|PS)?$')),
+                  (u'JJ_ENDS', re.compile(r'JJ.?$'))]
+
+
 def compress_pos_tag(max_ngram, rules_dict):
     """compress POS ngram tag
     :param rules_dict: correspondence rules on how to compress tags,
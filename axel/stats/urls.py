@@ -24,5 +24,7 @@ urlpatterns = patterns('axel.stats.views',
 
     # Clear cache
     url(r'^(?P<model_name>[^/]+)/clear/$', user_passes_test(lambda u: u.is_superuser)(
-        ClearCachedAttrView.as_view()), name='clear_attribute')
+        ClearCachedAttrView.as_view()), name='clear_attribute'),
+    url(r'^jobs/(?P<job_id>\d+)/$', user_passes_test(lambda u: u.is_superuser)(
+        InvalidationJobStatusView.as_view()), name='invalidation_job')
 )
@@ -4,24 +4,31 @@ import json
 import re
 
 from django.contrib.contenttypes.models import ContentType
-from django.core.cache import cache
 from django.core.urlresolvers import reverse
-from django.http import HttpResponseRedirect
-from django.views.generic import TemplateView, FormView
+from django.http import HttpResponseRedirect, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.generic import TemplateView, FormView, View
 from test_collection.models import TaggedCollection
 from test_collection.views import CollectionModelView, _get_model_from_string,\
     TestCollectionOverview
 
-from axel.articles.utils.concepts_index import WORDS_SET, CONCEPT_PREFIX
+from axel.articles.utils.concepts_index import concept_index
+from axel.articles.utils.ngram_index import ngram_indexes
 from axel.libs.nlp import build_ngram_index
-from axel.libs.mixins import AttributeFilterView
+from axel.libs.mixins import AttributeFilterView, JSONResponseMixin
 from axel.stats import scores
 from axel.stats.forms import ScoreCacheResetForm, NgramBindingForm
+from axel.stats.jobs import start_invalidation_job, resume_stale_jobs
+from axel.stats.models import CacheInvalidationJob
 from axel.stats.scores import binding_scores
 from axel.stats.scores.binding_scores import populate_article_dict, caclculate_MAP
 from axel.stats.scores.ngram_ranking import NgramMeasureScoring
 
 
+# Maximal number of n-grams matched by the collection filter query
+FILTER_LIMIT = 500
+
+
 class CollocationMainView(TestCollectionOverview):
     """Main conceptual search view"""
     template_name = "stats/overview.html"
@@ -37,14 +44,25 @@ class FilteredCollectionModelView(CollectionModelView):
         return super(FilteredCollectionModelView, self).get(request, *args, **kwargs)
 
     def generate_queryset(self, model):
-        """filter ngram by query here, filter only unjudged results"""
-        return model.objects.filter(ngram__icontains=self.query)
+        """
+        filter ngram by query here, filter only unjudged results,
+        only the FILTER_LIMIT most frequent matching n-grams are listed
+        """
+        if not self.query:
+            return model.objects.all()
+        ngrams = [ngram for ngram, _ in ngram_indexes.get(model).search(self.query,
+                                                                        FILTER_LIMIT)]
+        return model.objects.filter(ngram__in=ngrams)
 
 
 class CollocationAttributeFilterView(AttributeFilterView):
     """Class to define all defaults for Collocation objects"""
     model_fields_attr = 'FILTERED_FIELDS'
 
+    def filter_queryset(self, queryset, filter_values):
+        """Filter over indexed feature columns"""
+        return queryset.filter(ngram__in=queryset.model.feature_ngrams(**filter_values))
+
 
 class ConceptIndexStats(TemplateView):
     # TODO: inherit from FILTERVIEW?
@@ -59,17 +77,14 @@ class ConceptIndexStats(TemplateView):
         context = super(ConceptIndexStats, self).get_context_data(**kwargs)
 
         model = _get_model_from_string(self.kwargs['model_name'])
-        global_word_set = cache.get(WORDS_SET)
-        counts = defaultdict(lambda: 0)
-        for word in global_word_set:
-            counts[len(cache.get(CONCEPT_PREFIX + word))] += 1
+        counts = concept_index.histogram()
 
         context['histogram_data'] = str(counts.items()).replace('(', '[').replace(')', ']')
-        context['word_count'] = len(global_word_set)
+        context['word_count'] = len(concept_index)
         context['concept_count'] = model.objects.count()
 
         word_counts = defaultdict(lambda: 0)
-        for collocation in model.objects.values_list("ngram", flat=True):
+        for collocation in model.objects.values_list("ngram", flat=True).iterator():
             word_counts[len(collocation.split())] += 1
         context['col_word_len_hist'] = str(word_counts.items()).replace('(', '[').replace(')', ']')
         return context
@@ -282,9 +297,10 @@ class NgramWordBindingDistributionView(CollocationAttributeFilterView):
         return context
 
     def _populate_article_dict(self, pos_tag, score_func):
-        self.queryset = self.queryset.values_list('ngram', flat=True)
         if pos_tag:
-            self.queryset = self.queryset.filter(_pos_tag__regex='^{0}$'.format(pos_tag))
+            self.queryset = self.queryset.filter(
+                ngram__in=self.queryset.model.feature_ngrams(pos_tag=pos_tag))
+        self.queryset = self.queryset.values_list('ngram', flat=True)
         return populate_article_dict(self.queryset, score_func)
 
 
@@ -303,19 +319,18 @@ class ClearCachedAttrView(FormView):
 
     def form_valid(self, form):
         """
-        clear cache
+        Start clearing the cache in background, ajax requests get the job to poll,
+        other requests get the job id in the redirect query string
         """
-        attribute = form.cleaned_data['attr']
-        model = _get_model_from_string(self.model_name)
-        for obj in model.objects.all():
-            fields = obj.extra_fields
-            if attribute in fields:
-                del fields[attribute]
-                obj.extra_fields = fields
-                obj.save()
+        job = start_invalidation_job(self.model_name, form.cleaned_data['attr'])
+        if self.request.is_ajax():
+            data = job.as_dict()
+            data['status_url'] = reverse('invalidation_job', args=[job.id])
+            return HttpResponse(json.dumps(data), content_type='application/json')
 
         next_url = self.request.GET.get('next', reverse('testcollection_model',
                                         args=[self.model_name]))
+        next_url += '{0}job_id={1}'.format('&' if '?' in next_url else '?', job.id)
         return HttpResponseRedirect(next_url)
 
     def get_context_data(self, **kwargs):
@@ -323,3 +338,13 @@ class ClearCachedAttrView(FormView):
         context = super(ClearCachedAttrView, self).get_context_data(**kwargs)
         context['model_name'] = self.model_name
         return context
+
+
+class InvalidationJobStatusView(JSONResponseMixin, View):
+    """Progress of the cache invalidation job, polled by the client"""
+
+    def get(self, request, *args, **kwargs):
+        # jobs of a dead worker are restarted while someone is waiting for them
+        resume_stale_jobs()
+        job = get_object_or_404(CacheInvalidationJob, pk=self.kwargs['job_id'])
+        return self.render_to_response(job.as_dict())
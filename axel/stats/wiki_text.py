@@ -0,0 +1,130 @@
+"""
+Per-concept cache of the stemmed Wikipedia page text and its n-gram index, so a page is
+downloaded and lemmatized once for all articles referring to the concept
+"""
+from collections import defaultdict
+import cPickle as pickle
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+
+from axel.libs.sqlite_store import SQLiteStore
+
+
+STORE_NAME = 'wiki_text.sqlite'
+
+
+def fetch_wikipedia_text(ngram):
+    """
+    Download the concept page and lemmatize its text
+    :type ngram: unicode
+    :returns: stemmed text, empty if the page does not exist
+    :rtype: unicode
+    """
+    from django.utils.html import strip_tags
+    from axel.libs import nlp
+    from axel.libs.http import http_client, WIKI_API_URL
+    params = {'action': 'parse', 'page': ngram.replace(' ', '_'), 'redirects': '',
+              'format': 'json'}
+    result = http_client.get_json(WIKI_API_URL, params=params)
+    try:
+        return nlp.Stemmer.stem_wordnet(strip_tags(result['parse']['text']['*']))
+    except KeyError:
+        return u''
+
+
+def build_concept_entry(ngram):
+    """
+    Compute the cache entry, runs in pool workers
+    :rtype: tuple
+    :returns: (ngram, stemmed text, n-gram index dict)
+    """
+    from axel.libs import nlp
+    text = fetch_wikipedia_text(ngram)
+    return ngram, text, dict(nlp.build_ngram_index(text))
+
+
+def merge_indexes(indexes):
+    """
+    Sum n-gram counts of several indexes
+    :type indexes: iterable
+    :rtype: dict
+    """
+    merged = defaultdict(int)
+    for index in indexes:
+        for ngram, count in index.iteritems():
+            merged[ngram] += count
+    return dict(merged)
+
+
+class WikiTextStore(SQLiteStore):
+    """Stemmed texts and pickled n-gram indexes keyed by the concept"""
+    SCHEMA = ('CREATE TABLE IF NOT EXISTS concepts (ngram TEXT PRIMARY KEY, text TEXT, '
+              'ngram_index BLOB, created REAL)',)
+
+    def __init__(self, path=None):
+        super(WikiTextStore, self).__init__(path or os.path.join(settings.CACHE_ROOT, STORE_NAME))
+
+    def cached(self, ngrams):
+        """
+        :returns: the concepts present in the store
+        :rtype: set
+        """
+        return set(row[0] for row in
+                   self._select_in('SELECT ngram FROM concepts WHERE ngram IN (%s)', ngrams))
+
+    def set(self, ngram, text, index):
+        connection = self._connection()
+        with connection:
+            connection.execute('INSERT OR REPLACE INTO concepts VALUES (?, ?, ?, ?)',
+                               (ngram, text,
+                                sqlite3.Binary(pickle.dumps(index, pickle.HIGHEST_PROTOCOL)),
+                                time.time()))
+
+    def text(self, ngram):
+        """
+        Stemmed page text, fetched and stored when missing
+        :rtype: unicode
+        """
+        row = self._connection().execute('SELECT text FROM concepts WHERE ngram = ?',
+                                         (ngram,)).fetchone()
+        if row is not None:
+            return row[0]
+        ngram, text, index = build_concept_entry(ngram)
+        self.set(ngram, text, index)
+        return text
+
+    def indexes(self, ngrams):
+        """
+        :returns: dict of the form {ngram: n-gram index dict} for the stored concepts
+        :rtype: dict
+        """
+        return dict((ngram, pickle.loads(str(index))) for ngram, index in
+                    self._select_in('SELECT ngram, ngram_index FROM concepts WHERE ngram IN (%s)',
+                                    ngrams))
+
+    def fill(self, ngrams, pool=None):
+        """
+        Fetch and index the concepts missing in the store
+        :param pool: process pool to fetch and lemmatize the pages in parallel, every worker
+        has its own HTTP session and fetches one page at a time
+        :type pool: multiprocessing.Pool
+        :returns: number of fetched concepts
+        :rtype: int
+        """
+        missing = list(set(ngrams).difference(self.cached(ngrams)))
+        entries = pool.imap_unordered(build_concept_entry, missing) if pool \
+            else (build_concept_entry(ngram) for ngram in missing)
+        for ngram, text, index in entries:
+            self.set(ngram, text, index)
+        return len(missing)
+
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute('DELETE FROM concepts')
+
+
+wiki_texts = WikiTextStore()
@@ -20,8 +20,9 @@ if __name__ == "__main__":
 
     if settings_module is not None:
         environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
-    from axel.articles.utils.concepts_index import build_index
-    build_index()
+    from axel.articles.utils.concepts_index import concept_index
+    # reuses the snapshot, rebuilt only when missing or outdated
+    concept_index.load()
 
     from django.core.management import execute_from_command_line
     execute_from_command_line(sys.argv)